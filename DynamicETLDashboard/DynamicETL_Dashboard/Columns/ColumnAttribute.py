@@ -6,12 +6,12 @@
 
 from Columns.ColumnRelationships import RelationshipEnum
 import copy
-import dateutil.parser as dateparser
 from decimal import Decimal
-from pandas import DataFrame
+from pandas import DataFrame, factorize, Series
 import numpy as np
 import re
 from sortedcontainers import SortedSet
+from Utilities.DateParser import DateParser
 
 class ColumnAttribute(object):
     """
@@ -20,6 +20,8 @@ class ColumnAttribute(object):
     __datePattern = re.compile('^[0-9]{1,2}[//-_][0-9]{1,2}//[0-9]{2,4}$')
     __dtypeToSQLType = { 'o' : 'varchar(max)', 'int64' : 'int', 'datetime64[ns]' : 'datetime', 'float64' : 'decimal(30,10)' }
     __floatPattern = re.compile('\.[0-9]')
+    __maxScale = 15
+    __maxUniques = 25
     __numericPattern = re.compile('^[0-9]+(\.[0-9]+)$')
     __tSQLTypes = set(__dtypeToSQLType.values())
     def __init__(self, name, isnullable = None, isunique = None, uniquecount = None, uniques = None, type = None):
@@ -170,35 +172,71 @@ class ColumnAttribute(object):
         """
         return copy.deepcopy(__tSQLTypes)
 
-    def ParseColumn(self, column):
+    def ParseColumn(self, column, etl = None):
         """
         * Determine the type and attributes of the column.
         Inputs:
         * column: Expecting pandas Series or list-like container.
+        Optional:
+        * etl: Name of ETL (or other data source) to cache detected date formats for.
+        """
+        profile = ColumnAttribute.Profile(column, etl)
+        self.__uniqueCount = profile['UniqueCount']
+        self.__isNullable = profile['IsNullable']
+        self.__isUnique = profile['IsUnique']
+        if not profile['Uniques'] is None:
+            self.__uniques = profile['Uniques']
+        self.__type = profile['Type']
+
+    @classmethod
+    def Profile(cls, column, etl = None):
         """
-        uniques = column.drop_duplicates()
-        self.__uniqueCount = len(uniques.dropna())
-        self.__isNullable = any(column.isna())
-        self.__isUnique = True if self.__uniqueCount == len(column) else False
-        if self.__uniqueCount < 25:
-            self.__uniques = uniques.dropna()
-        # Determine the narrowest column type:
-        if self.__uniqueCount == 0:
+        * Return { Statistic -> Value } containing NumNulls, IsNullable, IsUnique, 
+        UniqueCount, Uniques (distinct values if fewer than 25, else None), narrowest 
+        SQL Type, and MinValue, MaxValue, Precision and Scale for numeric columns
+        (None otherwise), hashing column once and checking types of distinct values 
+        together instead of one at a time.
+        Inputs:
+        * column: Expecting pandas Series or list-like container.
+        Optional:
+        * etl: Name of ETL (or other data source) to cache detected date formats for.
+        """
+        column = column if isinstance(column, Series) else Series(column)
+        isNull = column.isna().to_numpy()
+        codes, _ = factorize(column)
+        hasValue = codes >= 0
+        # Positions of first occurrence of each distinct value:
+        _, first = np.unique(codes[hasValue], return_index = True)
+        positions = np.flatnonzero(hasValue)[first]
+        profile = { 'NumNulls' : int(isNull.sum()), 'IsNullable' : bool(isNull.any()), 'UniqueCount' : len(positions), 
+                   'Uniques' : None, 'MinValue' : None, 'MaxValue' : None, 'Precision' : None, 'Scale' : None }
+        profile['IsUnique'] = profile['UniqueCount'] == len(column)
+        if profile['UniqueCount'] < ColumnAttribute.__maxUniques:
+            profile['Uniques'] = column.iloc[positions]
+        # Determine the narrowest column type from non-null distinct values:
+        if profile['UniqueCount'] == 0:
             # If all NULLS, default to varchar(max):
-            typeStr = 'varchar(max)'
+            profile['Type'] = 'varchar(max)'
+            return profile
+        distinct = column.iloc[positions]
+        typeStr = ColumnAttribute.__InferDType(column, distinct)
+        if not typeStr in ['object', 'str', 'string']:
+            typeStr = ColumnAttribute.DTypeToTSQLType(typeStr)
         else:
-            # See if Pandas DataFrame has determined types, or check column types manually:
-            typeStr = DataFrame(list(uniques)).dtypes[0].name.lower()
-            if typeStr != 'object':
-                typeStr = ColumnAttribute.DTypeToTSQLType(typeStr.lower())
-            else:
-                # Verify that DataFrame has determine type effectively:
-                typeStr = ColumnAttribute.__DetermineColType(uniques)
-                if typeStr == 'o':
-                    typeStr = 'varchar(max)'
-                elif typeStr in ColumnAttribute.__dtypeToSQLType:
-                    typeStr = ColumnAttribute.__dtypeToSQLType[typeStr]
-        self.__type = typeStr
+            # Verify that DataFrame has determine type effectively:
+            typeStr = ColumnAttribute.__DetermineColType(distinct, etl)
+            if typeStr == 'o':
+                typeStr = 'varchar(max)'
+            elif typeStr in ColumnAttribute.__dtypeToSQLType:
+                typeStr = ColumnAttribute.__dtypeToSQLType[typeStr]
+        profile['Type'] = typeStr
+        if typeStr in ['float', 'bigint', 'int', 'smallint', 'tinyint'] or 'decimal' in str(typeStr):
+            numbers = distinct[distinct.notna()].to_numpy()
+            try:
+                profile.update(ColumnAttribute.__NumericRange(numbers if numbers.dtype.kind in 'iuf' else numbers.astype(np.float64)))
+            except (TypeError, ValueError, OverflowError):
+                pass
+        return profile
 
     def ToReportCell(self, header):
         """
@@ -247,11 +285,7 @@ class ColumnAttribute(object):
         """
         * Determine if value is a datetime object.
         """
-        try:
-            temp = dateparser.parse(val)
-            return True
-        except:
-            return False
+        return not DateParser.Parse(val) is None
     ################
     # Private Helpers:
     ################
@@ -279,18 +313,70 @@ class ColumnAttribute(object):
         return 'decimal(%d,%d)' % (prec,scale)
 
     @staticmethod
-    def __DetermineColType(column):
+    def __InferDType(column, distinct):
         """
-        * Determine appropriate type for data.
+        * Return name of dtype pandas infers for distinct values,
+        using column dtype directly for numeric and datetime columns.
         """
-        typeStr = ColumnAttribute.__GetType(column[0])
+        kind = getattr(column.dtype, 'kind', 'O')
+        if kind == 'b':
+            return 'bool'
+        elif kind == 'i' or (kind == 'u' and distinct.max() <= np.iinfo(np.int64).max):
+            return 'int64'
+        elif kind == 'f':
+            return 'float64'
+        elif kind == 'M':
+            return 'datetime64[ns]'
+        return DataFrame(list(distinct)).dtypes.iloc[0].name.lower()
+
+    @staticmethod
+    def __DetermineColType(column, etl = None):
+        """
+        * Determine appropriate type for data, where all values
+        must have same type as first value.
+        """
+        typeStr = ColumnAttribute.__GetType(column.iloc[0])
         if typeStr == 'o':
             return typeStr
-        for num, val in enumerate(column):
-            if num != 0 and typeStr != ColumnAttribute.__GetType(val):
-                # Set type to object if of mixed types:
-                return 'o'
-        return typeStr
+        values = column.to_numpy(dtype = object)
+        if typeStr == 'float':
+            return typeStr if ColumnAttribute.__AllNumeric(values) else 'o'
+        elif any([ColumnAttribute.IsInt(val) or ColumnAttribute.IsFloat(val) for val in values]):
+            # Set type to object if of mixed types:
+            return 'o'
+        # Parse all distinct values at once using detected date format:
+        return 'o' if DateParser.ParseColumn(column, column.name, etl).isna().any() else typeStr
+
+    @staticmethod
+    def __AllNumeric(values):
+        """
+        * Determine if all values can be converted to int or float,
+        converting all values in single pass.
+        """
+        try:
+            values.astype(np.float64)
+            return True
+        except (TypeError, ValueError, OverflowError):
+            # Check values individually (ex: integers too large for float):
+            return all([ColumnAttribute.IsInt(val) or ColumnAttribute.IsFloat(val) for val in values])
+
+    @staticmethod
+    def __NumericRange(numbers):
+        """
+        * Return MinValue, MaxValue, Precision and Scale (number of
+        decimal places needed, up to 15) of distinct non-null numbers.
+        """
+        if numbers.dtype.kind == 'f':
+            numbers = numbers[np.isfinite(numbers)]
+        if len(numbers) == 0:
+            return {}
+        minValue, maxValue = numbers.min(), numbers.max()
+        scale = 0
+        if numbers.dtype.kind == 'f':
+            while scale < ColumnAttribute.__maxScale and not (np.round(numbers, scale) == numbers).all():
+                scale += 1
+        intDigits = len(str(int(max(abs(int(minValue)), abs(int(maxValue)))))) if max(abs(minValue), abs(maxValue)) >= 1 else 0
+        return { 'MinValue' : minValue, 'MaxValue' : maxValue, 'Precision' : max(intDigits + scale, 1), 'Scale' : scale }
     @staticmethod
     def __GetType(val):
         if ColumnAttribute.IsInt(val) or ColumnAttribute.IsFloat(val):
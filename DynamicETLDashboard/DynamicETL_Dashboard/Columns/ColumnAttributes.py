@@ -7,10 +7,12 @@
 
 from Columns.ColumnAttribute import ColumnAttribute
 from Columns.ColumnRelationships import ColumnRelationships
+from Columns.ColumnSketch import ColumnSketch
 from datetime import datetime
+from ETL.DataReader import DataReader
+import numpy as np
 import os
-import pandas
-from pandas import DataFrame
+from pandas import concat, DataFrame
 from sortedcontainers import SortedDict
 import time
 
@@ -18,7 +20,9 @@ class ColumnAttributes(object):
     """
     * Container of multiple ColAttributes for single entity.
     """
-    def __init__(self, path, fileDateFormat = None, sheet = None, delim = None, skiprows = None):
+    # Number of rows sampled to estimate relationships if profiling in chunks:
+    __chunkSampleRows = 100000
+    def __init__(self, path, fileDateFormat = None, sheet = None, delim = None, skiprows = None, data = None, chunkRows = None, workers = None, sampleRows = None, etl = None):
         """
         * Instantiate object containing meta information about
         dataset located at path.
@@ -29,15 +33,30 @@ class ColumnAttributes(object):
         'regex' as attributes.
         * sheet: String name of sheet in workbook located at path.
         * delim: String delimiter for csv file.
+        * data: DataFrame already read from path (ex: sheet read with 
+        other sheets in workbook). Reads file if not provided.
+        * chunkRows: Number of rows to profile at a time using mergeable 
+        ColumnSketches, holding one chunk of csv file in memory. Column 
+        relationships are estimated from random sample of rows if provided.
+        * workers: Maximum number of processes used to map column relationships.
+        * sampleRows: Number of rows sampled to estimate column relationships, only
+        counting all rows of uncertain relationships. Maps exactly if not provided.
+        * etl: Name of ETL (or other data source) to cache detected date formats for. 
+        Uses folder containing file if not provided.
         """
         self.__path = path
+        self.__etl = os.path.dirname(os.path.abspath(path)) if etl is None else etl
         self.__colcount = None
         self.__sheetname = sheet
         # Map { ColName -> ColAttribute }:
         self.__attributes = SortedDict()
         self.__error = ''
+        self.__sketches = None
         self.__GetFileDate(fileDateFormat)
-        self.__ParseFile(delim,skiprows)
+        if chunkRows is None:
+            self.__ParseFile(delim,skiprows,data,workers,sampleRows)
+        else:
+            self.__ParseChunks(delim,skiprows,data,chunkRows,sampleRows)
 
     def __eq__(self, attributes):
         """
@@ -82,6 +101,12 @@ class ColumnAttributes(object):
     def Relationships(self):
         return self.__relationships
     @property
+    def Sketches(self):
+        """
+        * { ColName -> ColumnSketch } if profiled in chunks, else None.
+        """
+        return self.__sketches
+    @property
     def RowCount(self):
         return self.__rowCount
     @property
@@ -94,6 +119,30 @@ class ColumnAttributes(object):
     ######################
     # Interface Methods:
     ######################
+    @classmethod
+    def FromWorkbook(cls, path, sheets, fileDateFormat = None, skiprows = None, chunkRows = None, workers = None, sampleRows = None, etl = None):
+        """
+        * Return { SheetName -> ColumnAttributes } for sheets in workbook at path,
+        reading all sheets in single pass. Sheets are read separately if workbook 
+        cannot be read, so each ColumnAttributes stores its own error.
+        Inputs:
+        * path: String path to xls/xlsx workbook.
+        * sheets: List of sheet names.
+        Optional:
+        * fileDateFormat: dictionary containing 'dateformat' and 
+        'regex' as attributes.
+        * skiprows: Number of rows to skip at start of each sheet.
+        * chunkRows: Number of rows to profile at a time using ColumnSketches.
+        * workers: Maximum number of processes used to map column relationships.
+        * sampleRows: Number of rows sampled to estimate column relationships.
+        * etl: Name of ETL (or other data source) to cache detected date formats for.
+        """
+        try:
+            sheetData = DataReader.ReadSheets(path, sheets, skiprows)
+        except Exception:
+            sheetData = {}
+        return { sheet : ColumnAttributes(path, fileDateFormat, sheet = sheet, skiprows = skiprows, data = sheetData.get(sheet), chunkRows = chunkRows, workers = workers, sampleRows = sampleRows, etl = etl) for sheet in sheets }
+
     @classmethod
     def LeastRestrictive(cls, colAttrLeft, colAttrRight):
         """
@@ -121,30 +170,62 @@ class ColumnAttributes(object):
     ######################
     # Private Helpers:
     ######################
-    def __ParseFile(self, delim = None, skiprows = None):
+    def __ParseFile(self, delim = None, skiprows = None, data = None, workers = None, sampleRows = None):
         """
         * Parse column all column attributes in DataFrame.
         """
         try:
-            data = self.__GetFileData(delim, skiprows)
+            data = self.__GetFileData(delim, skiprows) if data is None else data
         except BaseException as ex:
             self.__error = str(ex)
             return
 
         # Store attributes of each column:
-        self.__ParseHeaderRow(data)
+        self.__ParseHeaderRow(data.columns)
         for col in data.columns:
-            self.__attributes[col].ParseColumn(data[col])
+            self.__attributes[col].ParseColumn(data[col], self.__etl)
         # Map all relationships between columns:
-        self.__relationships = ColumnRelationships(data)
+        if sampleRows is None:
+            self.__relationships = ColumnRelationships(data, workers)
+        else:
+            self.__relationships = ColumnRelationships.Approximate(data, sampleRows, workers = workers)
+
+    def __ParseChunks(self, delim = None, skiprows = None, data = None, chunkRows = None, sampleRows = None):
+        """
+        * Parse all column attributes by adding each chunk of rows
+        to mergeable sketch of each column, and estimate relationships 
+        from uniform random sample of rows.
+        """
+        sampleRows = ColumnAttributes.__chunkSampleRows if sampleRows is None else sampleRows
+        random = np.random.default_rng(0)
+        sample, keys = DataFrame(), np.zeros(0)
+        try:
+            chunks = self.__GetFileChunks(delim, skiprows, chunkRows) if data is None else (data.iloc[start:start + chunkRows] for start in range(0, max(len(data), 1), chunkRows))
+            self.__sketches = {}
+            for chunk in chunks:
+                for col in chunk.columns:
+                    self.__sketches.setdefault(col, ColumnSketch(col)).Update(chunk[col], self.__etl)
+                # Keep rows with smallest random keys:
+                sample = concat([sample, chunk]) if len(sample) else chunk
+                keys = np.concatenate([keys, random.random(len(chunk))])
+                if len(keys) > sampleRows:
+                    keep = np.sort(np.argpartition(keys, sampleRows)[:sampleRows])
+                    sample, keys = sample.iloc[keep], keys[keep]
+        except BaseException as ex:
+            self.__error = str(ex)
+            return
+        self.__ParseHeaderRow(list(self.__sketches))
+        self.__attributes = { col : self.__sketches[col].ToAttribute() for col in self.__sketches }
+        self.__rowCount = max([sketch.NumRows for sketch in self.__sketches.values()], default = 0)
+        self.__relationships = ColumnRelationships.FromSketches(sample.reset_index(drop = True), self.__sketches)
 
-    def __ParseHeaderRow(self, data):
+    def __ParseHeaderRow(self, columns):
         """
         * Parse header row in file.
         """
-        self.__attributes = { col : ColumnAttribute(col) for col in data.columns }
+        self.__attributes = { col : ColumnAttribute(col) for col in columns }
         # Map column name to index and back:
-        self.__colNumToCol = { num : col for num, col in enumerate(data.columns) }
+        self.__colNumToCol = { num : col for num, col in enumerate(columns) }
         self.__colToColNum = { self.__colNumToCol[num] : num for num in self.__colNumToCol }
 
     def __GetFileDate(self, format):
@@ -168,11 +249,23 @@ class ColumnAttributes(object):
         * Pull dataset from file at stored path.
         """
         if '.csv' in self.__path:
-            return pandas.read_csv(self.__path,skiprows = skiprows,delimiter = delim)
-        elif self.__path.endswith('.xls'):
-            return pandas.read_excel(self.__path,skiprows = skiprows,sheet_name = (0 if self.__sheetname is None else self.__sheetname))
-        elif self.__path.endswith('.xlsx'):
-            data = pandas.read_excel(self.__path,skiprows = skiprows,sheet_name = (0 if self.__sheetname is None else self.__sheetname),engine = 'openpyxl')
-            return data
+            return DataReader.ReadCsv(self.__path,delim,skiprows)
+        elif self.__path.endswith('.xls') or self.__path.endswith('.xlsx'):
+            sheet = 0 if self.__sheetname is None else self.__sheetname
+            return DataReader.ReadSheets(self.__path,[sheet],skiprows)[sheet]
         else:
-            raise ValueError('%s extension is invalid.' % self.__path[self.__path.find('.'):])
\ No newline at end of file
+            raise ValueError('%s extension is invalid.' % self.__path[self.__path.find('.'):])
+
+    def __GetFileChunks(self, delim = None, skiprows = None, chunkRows = None):
+        """
+        * Yield chunks of dataset from file at stored path. Workbook
+        sheets are read entirely before being split into chunks.
+        """
+        if '.csv' in self.__path:
+            with DataReader.ReadCsv(self.__path,delim,skiprows,chunksize = chunkRows) as reader:
+                for chunk in reader:
+                    yield chunk
+        else:
+            data = self.__GetFileData(delim, skiprows)
+            for start in range(0, max(len(data), 1), chunkRows):
+                yield data.iloc[start:start + chunkRows]
\ No newline at end of file
@@ -5,22 +5,42 @@
 # * Map all relationships between columns.
 
 from abc import abstractmethod, ABC
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from itertools import combinations, product
 import numpy as np
-from pandas import DataFrame
+import os
+from pandas import DataFrame, factorize, unique
 from sortedcontainers import SortedDict
 
 class ColumnRelationships(object):
     """
     * Immutable object that store relationships between columns.
     """
-    def __init__(self, data):
+    # Maximum ratio of possible pairs of distinct values to rows to count pairs in matrix:
+    __bitmapRatio = 8
+    # Default confidence that approximate relationships are correct, number of sampled rows
+    # and fraction of rows that can violate a "one" relationship. Confidence of "one" is the
+    # probability of sampling no violations if tolerance of rows were violations, so default
+    # confidence is reached once about 46000 sampled rows repeat a value, and relationships 
+    # violated by fewer than tolerance of rows can be estimated as "one":
+    __confidence = 0.99
+    __sampleRows = 100000
+    __tolerance = 0.0001
+    # Minimum number of (pair, row) combinations to map relationships in worker processes:
+    __minParallelCells = 50000000
+    # Codes and number of distinct values of columns in worker process:
+    __workerCodes = None
+    __workerUniques = None
+    def __init__(self, data, workers = None):
         """
         Inputs:
         * data: Expecting dataframe of columns.
+        Optional:
+        * workers: Maximum number of processes used to map relationships. 
+        Uses number of cores for large datasets if not provided.
         """
-        self.__relationships = ColumnRelationships.MapRelationships(data)
+        self.__relationships = ColumnRelationships.MapRelationships(data, workers)
     ###############
     # Properties:
     ###############
@@ -37,35 +57,283 @@ class ColumnRelationships(object):
         * countinfo: If True, fills cell with "leftcount_rightcount", else fills with
         full relationship name, ex "one_one".
         """
-        return ColumnRelationships.__AsDataFrame(self.__relationships, countinfo)
+        return ColumnRelationships.__AsDataFrame(self.__relationships, lambda rel : rel.CountStr if countinfo == True else rel.TypeStr)
+
+    def ToConfidenceFrame(self):
+        """
+        * Return full symmetric dataframe matrix containing confidence that each
+        relationship is correct (1 if mapped exactly).
+        """
+        return ColumnRelationships.__AsDataFrame(self.__relationships, lambda rel : rel.Confidence)
 
     @classmethod
-    def MapRelationships(cls, data):
+    def MapRelationships(cls, data, workers = None):
         """
-        * Map all relationships between columns in passed data.
+        * Map all relationships between columns in passed data, converting
+        each column to integer codes once and counting distinct pairs of codes.
+        Pairs containing unique or constant columns are mapped without counting.
         Inputs:
         * data: Expecting dataframe of columns.
+        Optional:
+        * workers: Maximum number of processes used to map relationships. 
+        Uses number of cores for large datasets if not provided.
         Output:
         * Returns lower triangular Dataframe of relationships with columns as dimensions.
         """
         results = SortedDict({col : {} for col in data.columns})
-        combs = combinations(data.columns, 2)
-        for comb in combs:
-            if comb[0] != comb[1]:
-                results[comb[0]][comb[1]] = cls.__MapRelationships(data, comb[0], comb[1])
+        columns = list(data.columns)
+        codes, numUniques, maxCounts, hasNulls = ColumnRelationships.__Factorize(data)
+        remaining = []
+        for left, right in combinations(range(len(columns)), 2):
+            counts = ColumnRelationships.__KnownCounts(numUniques, maxCounts, hasNulls, len(data), left, right)
+            if counts is None:
+                remaining.append((left, right))
+            else:
+                results[columns[left]][columns[right]] = ColumnRelationships.__ToRelationship(*counts)
+        for (left, right), counts in zip(remaining, ColumnRelationships.__CountPairs(codes, numUniques, remaining, workers)):
+            results[columns[left]][columns[right]] = ColumnRelationships.__ToRelationship(*counts)
         return results
+
+    @classmethod
+    def Approximate(cls, data, sampleRows = None, confidence = None, workers = None):
+        """
+        * Return ColumnRelationships estimated from random sample of rows and exact
+        distinct counts of each column, counting all rows only for pairs whose 
+        relationship is below confidence. Counts of estimated relationships are 
+        lower bounds.
+        Inputs:
+        * data: Expecting dataframe of columns.
+        Optional:
+        * sampleRows: Number of rows to sample. Maps exactly if data has fewer rows.
+        * confidence: Minimum confidence (between 0 and 1) that relationship is correct
+        to not count all rows.
+        * workers: Maximum number of processes used to count all rows of uncertain pairs.
+        """
+        sampleRows, confidence = ColumnRelationships.__ValidateApproximate(sampleRows, confidence)
+        if len(data) <= sampleRows:
+            return ColumnRelationships(data, workers)
+        columns = list(data.columns)
+        codes, numUniques, maxCounts, hasNulls = ColumnRelationships.__Factorize(data)
+        rows = np.sort(np.random.default_rng(0).choice(len(data), sampleRows, replace = False))
+        sampleCodes, sampleUniques = ColumnRelationships.__Refactorize(codes[:, rows])
+        results, uncertain = SortedDict({col : {} for col in columns}), []
+        for left, right in combinations(range(len(columns)), 2):
+            counts = ColumnRelationships.__KnownCounts(numUniques, maxCounts, hasNulls, len(data), left, right)
+            if counts is None:
+                counts = ColumnRelationships.__EstimateCounts(sampleCodes, sampleUniques, numUniques, numUniques == len(data), hasNulls, left, right)
+                if counts[2] < confidence:
+                    uncertain.append((left, right))
+            results[columns[left]][columns[right]] = ColumnRelationships.__ToRelationship(*counts)
+        # Count all rows of pairs near decision boundary:
+        for (left, right), counts in zip(uncertain, ColumnRelationships.__CountPairs(codes, numUniques, uncertain, workers)):
+            results[columns[left]][columns[right]] = ColumnRelationships.__ToRelationship(*counts)
+        return ColumnRelationships.__FromRelationships(results)
+
+    @classmethod
+    def FromSketches(cls, sample, sketches):
+        """
+        * Return ColumnRelationships estimated from uniform random sample of rows and
+        ColumnSketches of each column in all rows, without counting all rows. 
+        Counts are lower bounds. Maps exactly if sample contains all rows.
+        Inputs:
+        * sample: Dataframe containing sample of rows.
+        * sketches: { Column -> ColumnSketch } for each column in sample.
+        """
+        if all([len(sample) >= sketches[col].NumRows for col in sample.columns]):
+            return ColumnRelationships(sample)
+        columns = list(sample.columns)
+        sampleCodes, sampleUniques, _, _ = ColumnRelationships.__Factorize(sample)
+        uniqueCounts = np.array([sketches[col].UniqueCount for col in columns], dtype = np.float64)
+        uniqueErrors = np.array([sketches[col].UniqueError for col in columns], dtype = np.float64)
+        # Only columns counted exactly are certainly unique:
+        isUnique = np.array([sketches[col].IsUnique and not sketches[col].IsApproximate for col in columns], dtype = bool)
+        hasNulls = np.array([sketches[col].IsNullable for col in columns], dtype = bool)
+        results = SortedDict({col : {} for col in columns})
+        for left, right in combinations(range(len(columns)), 2):
+            counts = ColumnRelationships.__EstimateCounts(sampleCodes, sampleUniques, uniqueCounts * (1 - uniqueErrors), isUnique, hasNulls, left, right, uniqueCounts * (1 + uniqueErrors))
+            results[columns[left]][columns[right]] = ColumnRelationships.__ToRelationship(*counts)
+        return ColumnRelationships.__FromRelationships(results)
+
+    @classmethod
+    def InitializeWorker(cls, codes, numUniques):
+        """
+        * Store column codes used by MapPairs (in worker process).
+        Inputs:
+        * codes: Integer array of shape (# of columns, # of rows) with -1 for nulls.
+        * numUniques: Integer array of number of distinct values of each column.
+        """
+        ColumnRelationships.__workerCodes = codes
+        ColumnRelationships.__workerUniques = numUniques
+
+    @classmethod
+    def MapPairs(cls, pairs):
+        """
+        * Return list of (left max, right max) group counts for pairs
+        of column numbers, using codes stored by InitializeWorker.
+        Inputs:
+        * pairs: List of (left column number, right column number) tuples.
+        """
+        codes, numUniques = ColumnRelationships.__workerCodes, ColumnRelationships.__workerUniques
+        return [ColumnRelationships.__PairCounts(codes[left], numUniques[left], codes[right], numUniques[right]) for left, right in pairs]
     ###############
     # Private Helpers:
     ###############
     @classmethod
-    def __MapRelationships(cls, data, col1, col2):
+    def __FromRelationships(cls, relationships):
+        """
+        * Return ColumnRelationships storing mapped relationships.
+        """
+        result = cls.__new__(cls)
+        result.__relationships = relationships
+        return result
+
+    @staticmethod
+    def __ValidateApproximate(sampleRows, confidence):
+        """
+        * Validate approximation arguments, returning defaults if not provided.
+        """
+        errs = []
+        sampleRows = ColumnRelationships.__sampleRows if sampleRows is None else sampleRows
+        confidence = ColumnRelationships.__confidence if confidence is None else confidence
+        if not isinstance(sampleRows, int):
+            errs.append('sampleRows must be an integer.')
+        elif sampleRows < 1:
+            errs.append('sampleRows must be positive.')
+        if not isinstance(confidence, (int, float)):
+            errs.append('confidence must be numeric.')
+        elif not 0 <= confidence <= 1:
+            errs.append('confidence must be between 0 and 1.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        return sampleRows, confidence
+
+    @staticmethod
+    def __CountPairs(codes, numUniques, pairs, workers = None):
+        """
+        * Return list of (left max, right max) group counts for pairs of column numbers,
+        spreading pairs across worker processes for large datasets.
+        """
+        workers = (os.cpu_count() if len(pairs) * codes.shape[1] >= ColumnRelationships.__minParallelCells else 1) if workers is None else workers
+        if workers == 1 or len(pairs) <= 1:
+            ColumnRelationships.InitializeWorker(codes, numUniques)
+            allCounts = ColumnRelationships.MapPairs(pairs)
+            ColumnRelationships.InitializeWorker(None, None)
+            return allCounts
+        # Spread pairs across workers, each holding codes of all columns:
+        workers = min(workers, len(pairs))
+        batches = [pairs[num::workers] for num in range(workers)]
+        with ProcessPoolExecutor(workers, initializer = ColumnRelationships.InitializeWorker, initargs = (codes, numUniques)) as executor:
+            batchCounts = list(executor.map(ColumnRelationships.MapPairs, batches))
+        counts = { pair : pairCounts for batch, batchCount in zip(batches, batchCounts) for pair, pairCounts in zip(batch, batchCount) }
+        return [counts[pair] for pair in pairs]
+
+    @staticmethod
+    def __Refactorize(codes):
+        """
+        * Return codes renumbered to be consecutive for each column (nulls
+        remaining -1), and number of distinct values of each column.
+        """
+        newCodes = np.empty_like(codes)
+        numUniques = np.zeros(codes.shape[0], dtype = np.int64)
+        for num in range(codes.shape[0]):
+            uniques, newCodes[num] = np.unique(codes[num], return_inverse = True)
+            # Nulls (-1) are sorted first:
+            hasNull = len(uniques) > 0 and uniques[0] < 0
+            newCodes[num] -= hasNull
+            numUniques[num] = len(uniques) - hasNull
+        return newCodes, numUniques
+
+    @staticmethod
+    def __EstimateCounts(sampleCodes, sampleUniques, numUniques, isUnique, hasNulls, left, right, maxUniques = None):
+        """
+        * Return (left max, right max, confidence) estimated from sampled codes of pair of columns.
+        Pairs with all null column and sampled counts above 1 are certain, and a "one" side is certain if its column is unique,
+        or certainly "many" if neither column has nulls and other column has more distinct
+        values. Otherwise confidence is probability of observing no violations among sampled
+        rows repeating value of column if tolerance of all rows were violations.
+        """
+        maxUniques = numUniques if maxUniques is None else maxUniques
+        counts = list(ColumnRelationships.__PairCounts(sampleCodes[left], sampleUniques[left], sampleCodes[right], sampleUniques[right]))
+        isPair = (sampleCodes[left] >= 0) & (sampleCodes[right] >= 0)
+        confidence = 1
+        if maxUniques[left] == 0 or maxUniques[right] == 0:
+            # All null column is never paired with values:
+            return counts[0], counts[1], confidence
+        for side, (first, second) in enumerate([(left, right), (right, left)]):
+            if counts[side] > 1 or isUnique[first]:
+                continue
+            elif not hasNulls[first] and not hasNulls[second] and numUniques[second] > maxUniques[first]:
+                # More distinct values than column being grouped by:
+                counts[side] = 2
+                continue
+            repeats = isPair.sum() - len(unique(sampleCodes[first][isPair]))
+            confidence = min(confidence, 1 - (1 - ColumnRelationships.__tolerance) ** repeats)
+        return counts[0], counts[1], confidence
+
+    @staticmethod
+    def __Factorize(data):
+        """
+        * Return integer codes of shape (# of columns, # of rows) with nulls as -1, and 
+        number of distinct values, maximum count of any value and if has nulls for each column.
+        """
+        codes = np.empty((len(data.columns), len(data)), dtype = np.int32 if len(data) < 2 ** 31 else np.int64)
+        numUniques = np.zeros(len(data.columns), dtype = np.int64)
+        maxCounts = np.zeros(len(data.columns), dtype = np.int64)
+        hasNulls = np.zeros(len(data.columns), dtype = bool)
+        for num in range(len(data.columns)):
+            colCodes, uniques = factorize(data.iloc[:, num])
+            codes[num] = colCodes
+            numUniques[num] = len(uniques)
+            hasNulls[num] = (colCodes < 0).any()
+            maxCounts[num] = np.bincount(colCodes[colCodes >= 0]).max() if len(uniques) else 0
+        return codes, numUniques, maxCounts, hasNulls
+
+    @staticmethod
+    def __KnownCounts(numUniques, maxCounts, hasNulls, numRows, left, right):
+        """
+        * Return (left max, right max) group counts for pair of columns
+        if either is unique or constant, otherwise None.
+        """
+        for first, second, reverse in [(left, right, False), (right, left, True)]:
+            counts = None
+            if numUniques[first] == numRows and numRows > 0:
+                # Each value of unique column is paired with one row:
+                counts = (1, int(maxCounts[second])) if numUniques[second] > 0 else (0, np.nan)
+            elif numUniques[first] == 1 and not hasNulls[first]:
+                # Constant column is paired with every distinct value:
+                counts = (int(numUniques[second]), 1 if numUniques[second] > 0 else np.nan)
+            if not counts is None:
+                return counts[::-1] if reverse else counts
+        return None
+
+    @staticmethod
+    def __PairCounts(leftCodes, leftUniques, rightCodes, rightUniques):
+        """
+        * Return (left max, right max), the maximum number of distinct non-null values 
+        of each column paired with a non-null value of the other column.
+        """
+        isPair = (leftCodes >= 0) & (rightCodes >= 0)
+        base = max(rightUniques, 1)
+        pairs = leftCodes[isPair].astype(np.int64) * base + rightCodes[isPair]
+        if leftUniques * base <= ColumnRelationships.__bitmapRatio * len(leftCodes):
+            # Mark each distinct pair in matrix of all possible pairs:
+            seen = np.zeros(max(leftUniques, 1) * base, dtype = bool)
+            seen[pairs] = True
+            seen = seen.reshape(max(leftUniques, 1), base)
+            leftCounts, rightCounts = seen.sum(axis = 1), seen.sum(axis = 0)
+        else:
+            pairs = unique(pairs)
+            leftCounts, rightCounts = np.bincount(pairs // base, minlength = leftUniques), np.bincount(pairs % base, minlength = rightUniques)
+        leftMax = int(leftCounts.max()) if leftUniques > 0 else np.nan
+        rightMax = int(rightCounts.max()) if rightUniques > 0 else np.nan
+        return leftMax, rightMax
+
+    @staticmethod
+    def __ToRelationship(left_max, right_max, confidence = 1):
         """
         * Determine if one-to-one/one-to-many/many-to-one/many-to-many relationship exists
         between columns.
         """
-        colset = data[[col1, col2]].drop_duplicates([col1, col2])
-        left_max = colset.groupby(col1).count().max()[0]
-        right_max = colset.groupby(col2).count().max()[0]
         if left_max==1:
             if right_max==1:
                 enum = RelationshipEnum.ONE_TO_ONE 
@@ -76,10 +344,10 @@ class ColumnRelationships(object):
                 enum = RelationshipEnum.MANY_TO_ONE
             else:
                 enum = RelationshipEnum.MANY_TO_MANY
-        return ColumnRelationship(enum, left_max, right_max)
+        return ColumnRelationship(enum, left_max, right_max, confidence)
 
     @staticmethod
-    def __AsDataFrame(data, countinfo):
+    def __AsDataFrame(data, cell):
         """
         * Convert stored dictionary into symmetric DataFrame.
         """
@@ -91,9 +359,9 @@ class ColumnRelationships(object):
                 if subkey == key:
                     newdata[key][subkey] = '='
                 elif subkey not in data[key]:
-                    newdata[key][subkey] = data[subkey][key].Reverse().CountStr if countinfo == True else data[subkey][key].Reverse().TypeStr
+                    newdata[key][subkey] = cell(data[subkey][key].Reverse())
                 else:
-                    newdata[key][subkey] = data[key][subkey].CountStr if countinfo == True else data[key][subkey].TypeStr
+                    newdata[key][subkey] = cell(data[key][subkey])
         
         return DataFrame(newdata)
 
@@ -113,10 +381,11 @@ class ColumnRelationship:
                             RelationshipEnum.ONE_TO_MANY : "one_many",
                             RelationshipEnum.MANY_TO_MANY : "many_many", 
                             RelationshipEnum.MANY_TO_ONE : "many_one" }
-    def __init__(self, enum, leftcount, rightcount):
+    def __init__(self, enum, leftcount, rightcount, confidence = 1):
         self.__type = enum
         self.__leftcount = leftcount
         self.__rightcount = rightcount
+        self.__confidence = confidence
     def __eq__(self, val):
         return self.__type == val.Type
     def __str__(self):
@@ -128,6 +397,12 @@ class ColumnRelationship:
     # Properties:
     #############
     @property
+    def Confidence(self):
+        """
+        * Return confidence (between 0 and 1) that relationship is correct.
+        """
+        return self.__confidence
+    @property
     def CountStr(self):
         """
         * Return string of form "<KeyGroupByCount>_<ValueGroupByCount>".
@@ -157,4 +432,4 @@ class ColumnRelationship:
             enum = RelationshipEnum.ONE_TO_MANY
         elif self.__type == RelationshipEnum.ONE_TO_MANY:
             enum = RelationshipEnum.MANY_TO_ONE
-        return ColumnRelationship(enum, self.__rightcount, self.__leftcount) 
\ No newline at end of file
+        return ColumnRelationship(enum, self.__rightcount, self.__leftcount, self.__confidence) 
\ No newline at end of file
@@ -0,0 +1,311 @@
+#####################################
+# ColumnSketch.py
+#####################################
+# Description:
+# * Mergeable fixed size summary of column values,
+# updated one chunk at a time so that columns can be profiled
+# in bounded memory and summaries of chunks and files combined.
+
+from Columns.ColumnAttribute import ColumnAttribute
+import copy
+import numpy as np
+from pandas import concat, factorize, Series
+from pandas.util import hash_pandas_object
+
+class ColumnSketch(object):
+    """
+    * Summary of column containing row and null counts, a HyperLogLog
+    estimate of distinct values (exact while few values are distinct),
+    least restrictive type, value range, precision and maximum string length.
+    """
+    # Number of bits of hash used to select HyperLogLog register (~0.8% error):
+    __precision = 14
+    # Maximum number of distinct value hashes stored before estimating UniqueCount:
+    __exactLimit = 10000
+    __maxUniques = 25
+    # Least to most restrictive numeric types:
+    __numericTypes = ['tinyint', 'smallint', 'int', 'bigint', 'decimal', 'float']
+    def __init__(self, name):
+        """
+        * Create empty sketch for column.
+        Inputs:
+        * name: String column name.
+        """
+        if not isinstance(name, str):
+            raise Exception('name must be a string.')
+        self.__colName = name
+        self.__numRows = 0
+        self.__numNulls = 0
+        self.__hashes = np.zeros(0, dtype = np.uint64)
+        self.__registers = np.zeros(1 << ColumnSketch.__precision, dtype = np.uint8)
+        self.__uniques = Series(dtype = object)
+        self.__type = None
+        self.__minValue = None
+        self.__maxValue = None
+        self.__intDigits = None
+        self.__scale = None
+        self.__maxLength = 0
+
+    ###################
+    # Properties:
+    ###################
+    @property
+    def ColumnName(self):
+        return self.__colName
+    @property
+    def IsApproximate(self):
+        """
+        * Indicate if UniqueCount is estimated.
+        """
+        return self.__hashes is None
+    @property
+    def IsNullable(self):
+        return self.__numNulls > 0
+    @property
+    def IsUnique(self):
+        """
+        * Indicate if column is known to be unique. Always False if 
+        UniqueCount is estimated, since estimate cannot rule out duplicates.
+        """
+        if self.__numRows == 0 or self.__numNulls > 0 or self.IsApproximate:
+            return False
+        return len(self.__hashes) == self.__numRows
+    @property
+    def MaxLength(self):
+        return self.__maxLength
+    @property
+    def MaxValue(self):
+        return self.__maxValue
+    @property
+    def MinValue(self):
+        return self.__minValue
+    @property
+    def NumNulls(self):
+        return self.__numNulls
+    @property
+    def NumRows(self):
+        return self.__numRows
+    @property
+    def Precision(self):
+        return None if self.__intDigits is None else max(self.__intDigits + self.__scale, 1)
+    @property
+    def Scale(self):
+        return self.__scale
+    @property
+    def Type(self):
+        if self.__type is None:
+            # If all NULLS, default to varchar(max):
+            return 'varchar(max)'
+        elif self.__type in ColumnSketch.__numericTypes[0:4] and self.__numNulls > 0:
+            # Integer columns with nulls are read as floats:
+            return 'decimal(30, 10)'
+        return self.__type
+    @property
+    def UniqueCount(self):
+        if not self.IsApproximate:
+            return len(self.__hashes)
+        return int(min(round(ColumnSketch.__Estimate(self.__registers)), self.__numRows - self.__numNulls))
+    @property
+    def UniqueError(self):
+        """
+        * Maximum relative error of UniqueCount (three standard errors if estimated).
+        """
+        return 0 if not self.IsApproximate else 3 * 1.04 / np.sqrt(len(self.__registers))
+    @property
+    def Uniques(self):
+        return None if self.__uniques is None else self.__uniques.reset_index(drop = True)
+    ###################
+    # Interface Methods:
+    ###################
+    def Update(self, column, etl = None):
+        """
+        * Add chunk of column values to sketch.
+        Inputs:
+        * column: Expecting pandas Series or list-like container.
+        Optional:
+        * etl: Name of ETL (or other data source) to cache detected date formats for.
+        """
+        column = column if isinstance(column, Series) else Series(column)
+        profile = ColumnAttribute.Profile(column, etl)
+        _, distinct = factorize(column)
+        distinct = Series(distinct)
+        self.__numRows += len(column)
+        self.__numNulls += profile['NumNulls']
+        hashes = ColumnSketch.__Hash(distinct)
+        self.__AddHashes(hashes)
+        self.__registers = np.maximum(self.__registers, ColumnSketch.__Registers(hashes))
+        self.__AddUniques(profile['Uniques'] if profile['UniqueCount'] < ColumnSketch.__maxUniques else None)
+        self.__type = ColumnSketch.JoinType(self.__type, profile['Type'] if profile['UniqueCount'] > 0 else None)
+        if distinct.dtype.kind == 'M' and len(distinct):
+            profile['MinValue'], profile['MaxValue'] = distinct.min(), distinct.max()
+        self.__AddRange(profile['MinValue'], profile['MaxValue'])
+        if not profile['Precision'] is None:
+            self.__AddDigits(profile['Precision'] - profile['Scale'], profile['Scale'])
+        if len(distinct):
+            self.__maxLength = max(self.__maxLength, int(ColumnSketch.__Strings(distinct).str.len().max()))
+
+    @classmethod
+    def Merge(cls, sketchLeft, sketchRight):
+        """
+        * Return new ColumnSketch summarizing values of both sketches, with
+        least restrictive type.
+        Inputs:
+        * sketchLeft, sketchRight: ColumnSketch objects. Must have same ColumnName.
+        """
+        errs = []
+        if not isinstance(sketchLeft, ColumnSketch):
+            errs.append('sketchLeft must be a ColumnSketch object.')
+        if not isinstance(sketchRight, ColumnSketch):
+            errs.append('sketchRight must be a ColumnSketch object.')
+        if not errs:
+            if sketchLeft.ColumnName != sketchRight.ColumnName:
+                errs.append('sketchLeft and sketchRight have different column names')
+        if errs:
+            raise Exception('\n'.join(errs))
+        sketch = copy.deepcopy(sketchLeft)
+        sketch.__numRows += sketchRight.__numRows
+        sketch.__numNulls += sketchRight.__numNulls
+        sketch.__AddHashes(sketchRight.__hashes)
+        sketch.__registers = np.maximum(sketch.__registers, sketchRight.__registers)
+        sketch.__AddUniques(sketchRight.__uniques)
+        sketch.__type = cls.JoinType(sketch.__type, sketchRight.__type)
+        sketch.__AddRange(sketchRight.__minValue, sketchRight.__maxValue)
+        if not sketchRight.__intDigits is None:
+            sketch.__AddDigits(sketchRight.__intDigits, sketchRight.__scale)
+        sketch.__maxLength = max(sketch.__maxLength, sketchRight.__maxLength)
+        return sketch
+
+    @classmethod
+    def JoinType(cls, typeLeft, typeRight):
+        """
+        * Return least restrictive SQL type that can store values of
+        both types (varchar(max) if incompatible).
+        Inputs:
+        * typeLeft, typeRight: String types determined by ColumnAttribute,
+        or None if no values have been seen.
+        """
+        if typeLeft is None or typeLeft == typeRight:
+            return typeRight
+        elif typeRight is None:
+            return typeLeft
+        ranks = [ColumnSketch.__NumericRank(typeLeft), ColumnSketch.__NumericRank(typeRight)]
+        if None in ranks:
+            return 'varchar(max)'
+        return typeLeft if ranks[0] >= ranks[1] else typeRight
+
+    def ToAttribute(self):
+        """
+        * Return ColumnAttribute with attributes of sketched column.
+        """
+        return ColumnAttribute(self.__colName, self.IsNullable, self.IsUnique, self.UniqueCount, self.Uniques, self.Type)
+
+    ###################
+    # Private Helpers:
+    ###################
+    def __AddHashes(self, hashes):
+        """
+        * Store hashes of distinct values, switching to estimated
+        unique counts if exceeding limit.
+        """
+        if self.__hashes is None or hashes is None:
+            self.__hashes = None
+            return
+        self.__hashes = np.union1d(self.__hashes, hashes)
+        if len(self.__hashes) > ColumnSketch.__exactLimit:
+            self.__hashes = None
+
+    def __AddUniques(self, uniques):
+        """
+        * Store distinct values if fewer than 25.
+        """
+        if self.__uniques is None or uniques is None:
+            self.__uniques = None
+            return
+        uniques = concat([self.__uniques, uniques], ignore_index = True) if len(self.__uniques) else uniques
+        uniques = uniques.drop_duplicates()
+        self.__uniques = uniques if len(uniques) < ColumnSketch.__maxUniques else None
+
+    def __AddRange(self, minValue, maxValue):
+        """
+        * Widen value range to include minValue and maxValue, removing
+        range if values cannot be compared (ex: numbers and dates).
+        """
+        if minValue is None:
+            return
+        elif self.__minValue is None:
+            self.__minValue, self.__maxValue = minValue, maxValue
+            return
+        try:
+            self.__minValue, self.__maxValue = min(self.__minValue, minValue), max(self.__maxValue, maxValue)
+        except TypeError:
+            self.__minValue, self.__maxValue = None, None
+
+    def __AddDigits(self, intDigits, scale):
+        """
+        * Widen precision to fit intDigits integer digits and scale decimal places.
+        """
+        if self.__intDigits is None:
+            self.__intDigits, self.__scale = intDigits, scale
+        else:
+            self.__intDigits, self.__scale = max(self.__intDigits, intDigits), max(self.__scale, scale)
+
+    @staticmethod
+    def __NumericRank(typeStr):
+        """
+        * Return position of type in least to most restrictive
+        numeric types, or None if not numeric.
+        """
+        for rank, numericType in enumerate(ColumnSketch.__numericTypes):
+            if typeStr == numericType or (numericType == 'decimal' and typeStr.startswith('decimal')):
+                return rank
+        return None
+
+    @staticmethod
+    def __Hash(distinct):
+        """
+        * Return 64 bit hashes of distinct non-null values, hashing numbers
+        by value so that integer and float chunks hash identically.
+        """
+        if distinct.dtype.kind in 'iuf':
+            distinct = distinct.astype(np.float64)
+        elif distinct.dtype.kind != 'b':
+            distinct = ColumnSketch.__Strings(distinct)
+        return hash_pandas_object(distinct, index = False).to_numpy(dtype = np.uint64)
+
+    @staticmethod
+    def __Strings(distinct):
+        """
+        * Return distinct values as strings.
+        """
+        return distinct.astype(str) if distinct.dtype.kind != 'O' else distinct.map(str)
+
+    @staticmethod
+    def __Registers(hashes):
+        """
+        * Return HyperLogLog registers for hashes, where each register holds maximum
+        position of first set bit of hashes whose leading bits select register.
+        """
+        precision = ColumnSketch.__precision
+        registers = np.zeros(1 << precision, dtype = np.uint8)
+        if len(hashes) == 0:
+            return registers
+        index = (hashes >> np.uint64(64 - precision)).astype(np.intp)
+        remainder = hashes & np.uint64((1 << (64 - precision)) - 1)
+        # Remaining bits are exactly representable as floats:
+        _, bitLength = np.frexp(remainder.astype(np.float64))
+        np.maximum.at(registers, index, (64 - precision - bitLength + 1).astype(np.uint8))
+        return registers
+
+    @staticmethod
+    def __Estimate(registers):
+        """
+        * Return HyperLogLog estimate of number of distinct hashes, using
+        linear counting for small estimates.
+        """
+        numRegisters = len(registers)
+        alpha = 0.7213 / (1 + 1.079 / numRegisters)
+        estimate = alpha * numRegisters ** 2 / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+        empty = np.count_nonzero(registers == 0)
+        if estimate <= 2.5 * numRegisters and empty > 0:
+            return numRegisters * np.log(numRegisters / empty)
+        return estimate
@@ -7,10 +7,13 @@
 from Columns.ColumnAttributes import ColumnAttributes
 from Columns.ColumnAttribute import ColumnAttribute
 from Columns.ColumnRelationships import ColumnRelationships
+from Columns.ColumnSketch import ColumnSketch
+from concurrent.futures import ProcessPoolExecutor
 import copy
 import csv
 from datetime import datetime, date
 import dateutil.parser as dtparse
+from functools import partial
 from operator import neg
 import os
 from pandas import DataFrame, concat
@@ -19,6 +22,7 @@ from sortedcontainers import SortedDict
 import string
 import time
 from Utilities.FileConverter import FileConverter
+from Utilities.ProfileCache import ProfileCache
 import xlsxwriter
 
 class DataColumnAttributes(object):
@@ -34,16 +38,25 @@ class DataColumnAttributes(object):
     __one_many_format = {'font_color': 'black', 'bg_color' : 'blue'}
     __many_many_format = {'font_color': 'black', 'bg_color' : 'red'}
     __regType = type(re.compile(''))
-    def __init__(self):
+    def __init__(self, profileCache = None):
         """
         * Instantiate new object.
+        Optional:
+        * profileCache: ProfileCache storing column attributes of each file,
+        so that only new or changed files are profiled.
         """
+        if not profileCache is None and not isinstance(profileCache, ProfileCache):
+            raise Exception('profileCache must be a ProfileCache object if provided.')
         # Map date to attributes, and attributes that have changed with time:
+        self.__chunkRows = None
+        self.__etl = None
+        self.__sampleRows = None
         self.__columnChgDates = SortedDict()
         self.__dateToAttrs = SortedDict()
         self.__errors = {}
         self.__filepaths = set()
         self.__hasuniques = False
+        self.__profileCache = profileCache
         
     ###################
     # Properties:
@@ -60,7 +73,7 @@ class DataColumnAttributes(object):
     ###################
     # Interface Methods:
     ###################
-    def GetDataAttributes(self, path, fileExp, dateFormat = None, filePaths = None, sheets = None, delim = None, recursive = False, skiprows = None):
+    def GetDataAttributes(self, path, fileExp, dateFormat = None, filePaths = None, sheets = None, delim = None, recursive = False, skiprows = None, workers = 1, chunkRows = None, sampleRows = None, etl = None):
         """
         * Get all column attributes in files at path or at provided paths.
         Inputs:
@@ -73,6 +86,17 @@ class DataColumnAttributes(object):
         * sheets: Sheets to use if using xls/xlsx file (will create one ETL/table definition per sheet).
         * delim: String delimiter used in csv file.
         * recursive: Search for all folders within folder to find matching files.
+        * skiprows: Number of rows to skip at start of each file/sheet.
+        * workers: Maximum number of processes used to profile files (or map column
+        relationships of single file) in parallel. Profiles serially by default,
+        since each worker process holds its own file in memory.
+        * chunkRows: Number of rows to profile at a time using mergeable ColumnSketches, 
+        holding one chunk of each csv file in memory. Column relationships are estimated 
+        from random sample of rows if provided.
+        * sampleRows: Number of rows sampled to estimate column relationships, only counting
+        all rows of uncertain relationships. Maps relationships exactly if not provided.
+        * etl: Name of ETL that files belong to, used to share detected date formats 
+        between files. Uses folder and fileExp if not provided.
         """
         errs = []
         if not isinstance(path, str):
@@ -88,23 +112,35 @@ class DataColumnAttributes(object):
             errs.append('filePaths must be a dictionary mapping { FileName -> Path } or None.')
         if not sheets is None and not isinstance(sheets, list):
             errs.append('sheets must be a list if provided.')
+        if not isinstance(workers, int):
+            errs.append('workers must be an integer.')
+        elif workers < 1:
+            errs.append('workers must be positive.')
+        if not chunkRows is None and not isinstance(chunkRows, int):
+            errs.append('chunkRows must be an integer if provided.')
+        elif not chunkRows is None and chunkRows < 1:
+            errs.append('chunkRows must be positive if provided.')
+        if not sampleRows is None and not isinstance(sampleRows, int):
+            errs.append('sampleRows must be an integer if provided.')
+        elif not sampleRows is None and sampleRows < 1:
+            errs.append('sampleRows must be positive if provided.')
+        if not etl is None and not isinstance(etl, str):
+            errs.append('etl must be a string if provided.')
         if errs:
             raise Exception("\n".join(errs))
         self.__hasuniques = { sheet : False for sheet in sheets } if not sheets is None else self.__hasuniques
         self.__sheets = sheets
         self.__dateFormat = dateFormat
+        self.__chunkRows = chunkRows
+        self.__sampleRows = sampleRows
+        self.__etl = etl if not etl is None else '%s|%s' % (os.path.abspath(path), fileExp.pattern if fileExp else '')
         # Get all files that match data file expression at provided path if not supplied:
         if filePaths is None:
             filePaths = FileConverter.GetAllFilePaths(path,fileExp,recursive)
             if len(filePaths) == 0:
                 raise Exception('Could not find any matching files matching regex.')
         # Get column attributes of all target files:
-        for file in filePaths:
-            path = filePaths[file]
-            if self.__sheets is None:
-                self.__ExtractFile(path,delim,skiprows)
-            else:
-                self.__ExtractAllSheets(path,skiprows)
+        self.__ExtractFiles([filePaths[file] for file in filePaths],delim,skiprows,workers)
         self.__filepaths = set([filePaths[key] for key in filePaths])
         # Determine if columns have changed:
         prevAttrs = None
@@ -116,12 +152,14 @@ class DataColumnAttributes(object):
                 prevAttrs = currAttrs
         elif len(self.__dateToAttrs) > 1 and not self.__sheets is None:
             # Determine if columns have changed for each sheet:
-            for dt in self.__dateToAttrs:
+            for sheetname in self.__sheets:
                 prevAttrs = None
-                for sheetname in self.__dateToAttrs[dt]:
-                    currAttrs = self.__dateToAttrs[dt][sheetname]
+                for dt in self.__dateToAttrs:
+                    currAttrs = self.__dateToAttrs[dt].get(sheetname)
+                    if currAttrs is None:
+                        continue
                     if not prevAttrs is None and currAttrs != prevAttrs:
-                        self.__columnChgDates[currAttrs.FileDate][sheetname] = currAttrs - prevAttrs
+                        self.__columnChgDates.setdefault(currAttrs.FileDate, SortedDict())[sheetname] = currAttrs - prevAttrs
                     prevAttrs = currAttrs
 
     def GenerateReport(self, path, comparecols = False):
@@ -198,14 +236,84 @@ class DataColumnAttributes(object):
             with open(path, 'w') as f:
                 self.__WriteTableDef(f, attr, table, allnull)
 
+    def MergeSketches(self, sheetname = None):
+        """
+        * Return { ColName -> ColumnSketch } summarizing each column across
+        all files profiled in chunks, with least restrictive types.
+        Optional:
+        * sheetname: Sheet to merge sketches of if using sheets.
+        """
+        if self.__chunkRows is None:
+            raise Exception('chunkRows must be provided to GetDataAttributes to merge sketches.')
+        elif not self.__sheets is None and not sheetname in self.__sheets:
+            raise Exception('sheetname must be one of the target sheets.')
+        merged = {}
+        for dt in self.__dateToAttrs:
+            attrs = self.__dateToAttrs[dt] if self.__sheets is None else self.__dateToAttrs[dt].get(sheetname)
+            if attrs is None:
+                continue
+            for col, sketch in attrs.Sketches.items():
+                merged[col] = ColumnSketch.Merge(merged[col], sketch) if col in merged else sketch
+        return merged
+
     ##################
     # Private Helpers:
     ################## 
-    def __ExtractFile(self, path, delim = None, skiprows = None):
+    def __ExtractFiles(self, paths, delim, skiprows, workers):
+        """
+        * Profile each file (or target sheets of each workbook) that is not in profile
+        cache in worker processes, storing compact column attributes of files in order.
+        """
+        if self.__sheets is None:
+            profile = partial(ColumnAttributes, fileDateFormat = self.__dateFormat, delim = delim, skiprows = skiprows, chunkRows = self.__chunkRows, sampleRows = self.__sampleRows, etl = self.__etl)
+            store = self.__ExtractFile
+        else:
+            profile = partial(ColumnAttributes.FromWorkbook, sheets = self.__sheets, fileDateFormat = self.__dateFormat, skiprows = skiprows, chunkRows = self.__chunkRows, sampleRows = self.__sampleRows, etl = self.__etl)
+            store = self.__ExtractAllSheets
+        options = { 'dateFormat' : self.__dateFormat, 'delim' : delim, 'sheets' : self.__sheets, 'skiprows' : skiprows, 'chunkRows' : self.__chunkRows, 'sampleRows' : self.__sampleRows }
+        results = {}
+        if not self.__profileCache is None:
+            results = { path : self.__profileCache.Get(path, **self.__CacheOptions(path, options)) for path in paths }
+            results = { path : results[path] for path in results if not results[path] is None }
+        missing = [path for path in paths if not path in results]
+        if workers == 1 or len(missing) <= 1:
+            # Map relationships of single file using workers:
+            profile = partial(profile, workers = workers)
+            for path in missing:
+                results[path] = self.__CacheProfile(path, profile(path), options)
+        else:
+            profile = partial(profile, workers = 1)
+            with ProcessPoolExecutor(min(workers, len(missing))) as executor:
+                for path, result in zip(missing, executor.map(profile, missing)):
+                    results[path] = self.__CacheProfile(path, result, options)
+        for path in paths:
+            store(path, results[path])
+
+    def __CacheOptions(self, path, options):
+        """
+        * Return profile cache options for file at path. Stored attributes contain 
+        path, and FileDate from modification time if no dateFormat, so both are 
+        included so that moved or touched files are not given stale attributes.
+        """
+        options = dict(options, filePath = os.path.abspath(path).lower())
+        if self.__dateFormat is None:
+            options['mtime'] = os.path.getmtime(path)
+        return options
+
+    def __CacheProfile(self, path, result, options):
+        """
+        * Store column attributes of file in profile cache if 
+        file was profiled without errors, and return attributes.
+        """
+        errors = [result.Error] if self.__sheets is None else [result[sheet].Error for sheet in result]
+        if not self.__profileCache is None and not any(errors):
+            self.__profileCache.Store(path, result, **self.__CacheOptions(path, options))
+        return result
+
+    def __ExtractFile(self, path, currAttrs):
         """
-        * Extract data from single file.
+        * Store column attributes extracted from single file.
         """
-        currAttrs = ColumnAttributes(path, self.__dateFormat, delim = delim, skiprows = skiprows)
         if currAttrs.Error:
             tail, file = os.path.split(path)
             self.__errors[file] = currAttrs.Error
@@ -214,17 +322,18 @@ class DataColumnAttributes(object):
             # Map { FileDate -> ColumnAttributes }:
             self.__dateToAttrs[currAttrs.FileDate] = currAttrs
 
-    def __ExtractAllSheets(self, path, skiprows):
+    def __ExtractAllSheets(self, path, sheetAttrs):
         """
-        * Extract column attributes from multiple target sheets, to each be implemented
+        * Store column attributes extracted from multiple target sheets, to each be implemented
         as own ETLs.
         """
         filedate = self.__GetFileDate(path)
         self.__dateToAttrs[filedate] = SortedDict()
         for sheetname in self.__sheets:
-            currAttrs = ColumnAttributes(path, self.__dateFormat, sheet = sheetname, skiprows = skiprows)
+            currAttrs = sheetAttrs[sheetname]
             if currAttrs.Error:
-                self.__errors[file][sheetname] = currAttrs.Error
+                tail, file = os.path.split(path)
+                self.__errors.setdefault(file, {})[sheetname] = currAttrs.Error
             else:
                 self.__hasuniques[sheetname] = self.__hasuniques[sheetname] if self.__hasuniques[sheetname] else any([True for col in currAttrs.Attributes if not currAttrs.Attributes[col] is None])
                 # Map { FileDate -> { SheetName -> ColumnAttributes }}:
@@ -305,7 +414,7 @@ class DataColumnAttributes(object):
                 if prop.lower() not in skipProperties:
                     chgSheet.write(rowNum + num + 2 - len(skipProperties), 0, prop, headerFormat)
             # Write all the differences:
-            diffs = self.__columnChgDates[dt] if sheetname is None else self.__columnChgDates[dt][sheetname]
+            diffs = self.__columnChgDates[dt] if sheetname is None else self.__columnChgDates[dt].get(sheetname, [])
             rowInc = len(properties) - len(skipProperties) + 2
             for colNum, diff in enumerate(diffs):
                 if diff is None:
@@ -342,6 +451,7 @@ class DataColumnAttributes(object):
         for dt in self.__dateToAttrs:
             attr = self.__dateToAttrs[dt] if sheetname is None else self.__dateToAttrs[dt][sheetname]
             df = attr.Relationships.ToDataFrame(False)
+            confidences = attr.Relationships.ToConfidenceFrame()
             # Write file date:
             relSheet.write(rowOff, 0, "File Date", headerFormat)
             relSheet.write(rowOff, 1, dt.strftime('%m/%d/%Y'))
@@ -353,7 +463,9 @@ class DataColumnAttributes(object):
                 for num, col in enumerate(cols):
                     if row != 0:
                         if num != 0:
-                            relSheet.write(filerow, num, "", type_format[df[col][row - 1]])
+                            # Show confidence of estimated relationships:
+                            confidence = confidences[col].iloc[row - 1]
+                            relSheet.write(filerow, num, "" if confidence == '=' or confidence >= 1 else '%.2f' % confidence, type_format[df[col].iloc[row - 1]])
                         else:
                             # Write row index:
                             relSheet.write(filerow, num, df[cols[1]].index[row - 1], headerFormat)
@@ -27,6 +27,8 @@ class ColumnAttributesGenerator(ABC):
     # https://www.postgresql.org/docs/9.5/datatype.html
     # {'i':' ', 'b':' ', 'u':' ', 'f':' ', 'c':' ', 'm':' ', 'M':' ', 'O':' ', 'S':' ', 'U':' ', 'V':' ', '?': ''}
     __numerictps = {'i','u','f'}
+    # Maximum number of decimal places determined for float columns:
+    __maxScale = 15
     __underscore = set(string.punctuation)
     __underscore.add(' ')
     __underscore.add('\n')
@@ -38,18 +40,14 @@ class ColumnAttributesGenerator(ABC):
         Inputs:
         * series: Series object. Must have numeric dtype.
         Outputs:
-        * Maximum [digits, mantissa] of series.
+        * Maximum [integer digits, decimal places] of series.
         """
         if not isinstance(series, Series):
             raise ValueError('series must be a DataFrame Series object.')
-        elif not any([tp in series.dtype.str for tp in ColumnAttributesGenerator.__numerictps]):
+        elif not series.dtype.kind in ColumnAttributesGenerator.__numerictps:
             raise ValueError('series dtypes must be one of %s' % ','.join(ColumnAttributesGenerator.__numerictps))
-        series = series.astype('str').dropna()
-        digits = [len(val[0:val.find('.')]) for val in series]
-        mantissa = [len(val[val.find('.'):]) for val in series]
-        maxdigit = np.argmax(digits)
-        maxmantissa = np.argmax(mantissa)
-        return (digits[maxdigit], mantissa[maxmantissa])
+        stats = ColumnAttributesGenerator.GetColumnStatistics(series.to_frame(name = 0))[0]
+        return (stats['digits'], stats['scale'])
 
     @staticmethod
     def StandardizeNames(columns):
@@ -87,19 +85,13 @@ class ColumnAttributesGenerator(ABC):
         necessary for strings in passed
         DataFrame series.
         Inputs:
-        * series: Series object. Must have object dtype.
+        * series: Series object. Must have object or string dtype.
         """
         if not isinstance(series, Series):
             raise ValueError('series must be a DataFrame Series object.')
-        elif series.dtype != 'object':
+        elif series.dtype.kind != 'O':
             raise ValueError('series must have object dtype.')
-        if len(series) == 0:
-            return 0
-        lengths = series.dropna().apply(lambda x : len(x))
-        lengths = list(lengths)
-        maxlenidx = np.argmax(lengths)
-        maxlenidx = maxlenidx[0] if hasattr(maxlenidx, '__iter__') else maxlenidx
-        return lengths[maxlenidx]
+        return ColumnAttributesGenerator.GetColumnStatistics(series.to_frame(name = 0))[0]['maxchars']
 
     @staticmethod
     def GetColumnTypes(df):
@@ -147,4 +139,94 @@ class ColumnAttributesGenerator(ABC):
             out['uniquecount'] = len(out['uniques'])
             out['nullable'] = any(column.isna())
             out['isunique'] = not out['nullable'] and out['uniquecount'] == len(column)
-            return out
\ No newline at end of file
+            return out
+
+    @staticmethod
+    def GetColumnStatistics(df):
+        """
+        * Get statistics needed to size SQL types of all
+        columns, computing statistics of columns sharing
+        numeric dtype together.
+        Inputs:
+        * df: Pandas DataFrame or individual Series.
+        Output:
+        * { ColumnName -> { 'min', 'max', 'digits', 'scale', 'maxchars', 'maxbytes' } }, 
+        where digits and scale are maximum number of integer digits and decimal 
+        places (up to 15) of numeric columns, and maxchars and maxbytes are maximum 
+        number of characters and utf-8 bytes of string columns (None otherwise).
+        """
+        if not isinstance(df, (DataFrame, Series)):
+            raise ValueError('df must be a DataFrame or Series.')
+        df = df.to_frame() if isinstance(df, Series) else df
+        stats = [{ 'min' : None, 'max' : None, 'digits' : None, 'scale' : None, 'maxchars' : None, 'maxbytes' : None } for _ in df.columns]
+        # Group numeric columns by dtype:
+        blocks = {}
+        for num, dtype in enumerate(df.dtypes):
+            if dtype.kind in ColumnAttributesGenerator.__numerictps:
+                blocks.setdefault(dtype if isinstance(dtype, np.dtype) else np.dtype(np.float64), []).append(num)
+            elif dtype.kind == 'O':
+                stats[num].update(ColumnAttributesGenerator.__StringStatistics(df.iloc[:, num]))
+            elif dtype.kind in 'bM' and df.iloc[:, num].notna().any():
+                stats[num]['min'], stats[num]['max'] = df.iloc[:, num].min(), df.iloc[:, num].max()
+        for dtype, nums in blocks.items():
+            values = df.iloc[:, nums].to_numpy(dtype = dtype, na_value = np.nan) if dtype.kind == 'f' else df.iloc[:, nums].to_numpy(dtype = dtype)
+            for num, colStats in zip(nums, ColumnAttributesGenerator.__NumericStatistics(values)):
+                stats[num].update(colStats)
+        return { col : stats[num] for num, col in enumerate(df.columns) }
+
+    ################
+    # Private Helpers:
+    ################
+    @staticmethod
+    def __NumericStatistics(values):
+        """
+        * Return list of { 'min', 'max', 'digits', 'scale' } for
+        each column in 2D array of numeric columns.
+        """
+        if values.dtype.kind != 'f':
+            if len(values) == 0:
+                return [{} for _ in range(values.shape[1])]
+            mins, maxs = values.min(axis = 0), values.max(axis = 0)
+            return [{ 'min' : mins[num], 'max' : maxs[num], 'scale' : 0,
+                     'digits' : len(str(max(abs(int(mins[num])), abs(int(maxs[num]))))) } 
+                    for num in range(values.shape[1])]
+        finite = np.isfinite(values)
+        hasValue = finite.any(axis = 0)
+        mins = np.where(finite, values, np.inf).min(axis = 0, initial = np.inf)
+        maxs = np.where(finite, values, -np.inf).max(axis = 0, initial = -np.inf)
+        # Find fewest decimal places that represent all values in each column:
+        scales = np.zeros(values.shape[1], dtype = np.int64)
+        unresolved = np.flatnonzero(hasValue)
+        for scale in range(ColumnAttributesGenerator.__maxScale):
+            block = values[:, unresolved]
+            exact = ((np.round(block, scale) == block) | ~finite[:, unresolved]).all(axis = 0)
+            unresolved = unresolved[~exact]
+            scales[unresolved] = scale + 1
+            if len(unresolved) == 0:
+                break
+        stats = []
+        for num in range(values.shape[1]):
+            if not hasValue[num]:
+                stats.append({})
+                continue
+            maxAbs = max(abs(mins[num]), abs(maxs[num]))
+            stats.append({ 'min' : mins[num], 'max' : maxs[num], 'scale' : int(scales[num]),
+                          'digits' : len(str(int(maxAbs))) if maxAbs >= 1 else 0 })
+        return stats
+
+    @staticmethod
+    def __StringStatistics(column):
+        """
+        * Return { 'maxchars', 'maxbytes' } of non-null values
+        in column, converting non-string values to strings.
+        """
+        column = column.dropna()
+        if len(column) == 0:
+            return { 'maxchars' : 0, 'maxbytes' : 0 }
+        column = column.astype(str)
+        chars = column.str.len().to_numpy()
+        maxChars = int(chars.max())
+        # Only encode non-ascii strings that could exceed longest string in bytes (up to 4 bytes per character):
+        wide = column[~column.map(str.isascii).to_numpy(dtype = bool) & (chars * 4 > maxChars)]
+        maxBytes = int(wide.str.encode('utf-8', 'surrogatepass').str.len().max()) if len(wide) else 0
+        return { 'maxchars' : maxChars, 'maxbytes' : max(maxChars, maxBytes) }
\ No newline at end of file
@@ -208,6 +208,8 @@ class PostGresColumnConverter(ColumnAttributesGenerator):
         out = {}
         tps = ColumnAttributesGenerator.GetColumnTypes(df)
         if isinstance(df, DataFrame):
+            # Get string lengths of all columns at once:
+            stats = ColumnAttributesGenerator.GetColumnStatistics(df.loc[:, [dtype.kind == 'O' for dtype in df.dtypes]])
             for cell in tps:
                 name = cell[0]
                 nptp = cell[1]
@@ -219,7 +221,7 @@ class PostGresColumnConverter(ColumnAttributesGenerator):
                 elif 'O' in nptp:
                     nptp = nptp.replace('|', '') if '|' in nptp else nptp
                     tp = PostGresColumnConverter.__conversionTable[nptp]
-                    max_len = ColumnAttributesGenerator.GetMaxStringLen(df[name])
+                    max_len = stats[name]['maxchars']
                     tp = '%s(%s)' % (tp, max_len)
                 else:
                     tp = PostGresColumnConverter.__conversionTable[nptp]
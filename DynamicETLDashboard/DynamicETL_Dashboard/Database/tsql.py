@@ -86,15 +86,27 @@ class TSQLInterface:
         self.__database = database
         self.__connectString = connect_string
 
-    def Select(self, query):
+    def Select(self, query, chunksize = None):
         """
         * Return dataframe containing requested data.
+        Inputs:
+        * query: string SELECT query.
+        Optional:
+        * chunksize: Number of rows per chunk. If provided then
+        returns iterator of DataFrames instead.
         """
+        errs = []
         if not isinstance(query, str):
-            raise Exception('query must be a string.')
+            errs.append('query must be a string.')
         elif not 'select' in query.lower():
-            raise Exception('query must be a SELECT statement.')
-        return read_sql(query, self.__connection)
+            errs.append('query must be a SELECT statement.')
+        if not chunksize is None and not isinstance(chunksize, int):
+            errs.append('chunksize must be an integer if provided.')
+        elif not chunksize is None and chunksize <= 0:
+            errs.append('chunksize must be positive if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        return read_sql(query, self.__connection, chunksize = chunksize)
 
     def Execute(self, query, returnsvals = False):
         """
@@ -239,6 +251,171 @@ class TSQLInterface:
         cursor.executemany(insert_query, list(data.itertuples(index=False,name=None)))
         cursor.commit()
 
+    def StageData(self, data, table, stagingtable = '#Staging'):
+        """
+        * Bulk load data into temporary (#) or staging table 
+        that has the same column types as matching columns in table.
+        Inputs:
+        * data: DataFrame with columns that are present in table.
+        * table: Table name string that exists in connected database.
+        Optional:
+        * stagingtable: Name of staging table to create. Will be replaced if
+        it already exists.
+        """
+        errs = []
+        if not isinstance(data, DataFrame):
+            errs.append('data must be a DataFrame.')
+        if not isinstance(table, str):
+            errs.append('table must be a string.')
+        if not isinstance(stagingtable, str):
+            errs.append('stagingtable must be a string.')
+        if not self.__IsConnected():
+            errs.append('Need to call Connect() before calling this function.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        table = TSQLInterface.WrapName(table)
+        stagingtable = TSQLInterface.WrapName(stagingtable)
+        cols = ','.join([TSQLInterface.WrapName(col) for col in data.columns])
+        values = ','.join(['?' for col in data.columns])
+        cursor = self.__connection.cursor()
+        cursor.execute('DROP TABLE IF EXISTS %s' % stagingtable)
+        # Copy column types from target table:
+        cursor.execute('SELECT TOP 0 %s INTO %s FROM %s' % (cols, stagingtable, table))
+        # Convert nulls to None and numpy types to python types:
+        data = data.astype(object).where(notnull(data), None)
+        cursor.fast_executemany = True
+        cursor.executemany('INSERT INTO %s (%s) VALUES (%s)' % (stagingtable, cols, values), list(data.itertuples(index=False,name=None)))
+        cursor.commit()
+
+    def CompareOnServer(self, data, table, filter = None, stagingtable = '#Staging'):
+        """
+        * Compare data with rows in table using set-based EXCEPT 
+        queries on server, so that only differing rows are returned.
+        Inputs:
+        * data: DataFrame with columns that are present in table.
+        * table: Table name string that exists in connected database.
+        Optional:
+        * filter: WHERE clause condition string to select rows in table
+        (ex: "[FileDate] = '2020-07-12'").
+        * stagingtable: Name of staging table to load data into.
+        Output:
+        * Returns (tableonly, dataonly) DataFrames containing distinct rows only present 
+        in table and only present in data respectively.
+        """
+        if not filter is None and not isinstance(filter, str):
+            raise Exception('filter must be a string if provided.')
+        self.StageData(data, table, stagingtable)
+        table = TSQLInterface.WrapName(table)
+        stagingtable = TSQLInterface.WrapName(stagingtable)
+        cols = ','.join([TSQLInterface.WrapName(col) for col in data.columns])
+        tableQuery = 'SELECT %s FROM %s%s' % (cols, table, ' WHERE %s' % filter if filter else '')
+        stagingQuery = 'SELECT %s FROM %s' % (cols, stagingtable)
+        tableonly = self.Select('%s EXCEPT %s' % (tableQuery, stagingQuery))
+        dataonly = self.Select('%s EXCEPT %s' % (stagingQuery, tableQuery))
+        cursor = self.__connection.cursor()
+        cursor.execute('DROP TABLE IF EXISTS %s' % stagingtable)
+        cursor.commit()
+        return tableonly, dataonly
+
+    def SelectAggregates(self, table, aggregates, filter = None):
+        """
+        * Compute column aggregates over table in a single query
+        on server. Returns DataFrame indexed by column containing
+        NumRows, NumNulls, NumDistinct, Min, Max and Sum.
+        Inputs:
+        * table: Table name string that exists in connected database.
+        * aggregates: { Column -> [Statistics] } containing any of NumNulls,
+        NumDistinct, Min, Max, Sum (ex: from AggregateChecker.Aggregates()).
+        Optional:
+        * filter: WHERE clause condition string to select rows in table
+        (ex: "[FileDate] = '2020-07-12'").
+        """
+        templates = { 'NumNulls' : 'COUNT(*) - COUNT(%s)', 'NumDistinct' : 'COUNT(DISTINCT %s)', 
+                     'Min' : 'MIN(%s)', 'Max' : 'MAX(%s)', 'Sum' : 'SUM(CAST(%s AS FLOAT))' }
+        errs = []
+        if not isinstance(table, str):
+            errs.append('table must be a string.')
+        if not isinstance(aggregates, dict):
+            errs.append('aggregates must be a dictionary.')
+        elif any([not set(stats).issubset(templates) for stats in aggregates.values()]):
+            errs.append('aggregates statistics must be in %s.' % ','.join(templates))
+        if not filter is None and not isinstance(filter, str):
+            errs.append('filter must be a string if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        exprs = ['COUNT(*) AS [NumRows]']
+        aliases = {}
+        for col, stats in aggregates.items():
+            for stat in stats:
+                aliases[(col, stat)] = 'a%d' % len(aliases)
+                exprs.append('%s AS [%s]' % (templates[stat] % TSQLInterface.WrapName(col), aliases[(col, stat)]))
+        query = 'SELECT %s FROM %s%s' % (','.join(exprs), TSQLInterface.WrapName(table), ' WHERE %s' % filter if filter else '')
+        result = self.Select(query).iloc[0]
+        profile = DataFrame(index = list(aggregates), columns = ['NumRows', 'NumNulls', 'NumDistinct', 'Min', 'Max', 'Sum'], dtype = object)
+        profile['NumRows'] = result['NumRows']
+        for (col, stat), alias in aliases.items():
+            profile.loc[col, stat] = result[alias]
+        return profile
+
+    def TableChecksum(self, table, filter = None, columns = None):
+        """
+        * Return string summarizing row count and aggregate hash
+        of all rows in table, computed on server. Each row is hashed with
+        SHA2_256 over exact binary values of columns (with null markers and 
+        lengths), and row hashes are summed in 48-bit slices, so that
+        changed, swapped or duplicated rows do not cancel out (unlike 
+        CHECKSUM_AGG(BINARY_CHECKSUM())). Requires SQL Server 2016 or later.
+        Inputs:
+        * table: Table name string that exists in connected database.
+        Optional:
+        * filter: WHERE clause condition string to select rows in table
+        (ex: "[FileDate] = '2020-07-12'").
+        * columns: Iterable of columns to hash. Uses all columns if not provided.
+        """
+        errs = []
+        if not isinstance(table, str):
+            errs.append('table must be a string.')
+        if not filter is None and not isinstance(filter, str):
+            errs.append('filter must be a string if provided.')
+        if not columns is None and (not hasattr(columns, '__iter__') or any([not isinstance(col, str) for col in columns])):
+            errs.append('columns must be an iterable of strings if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        if columns is None:
+            columns = self.Select('SELECT TOP 0 * FROM %s' % TSQLInterface.WrapName(table)).columns
+        # Null columns are marked with 0x00, others with 0x01 and their length:
+        values = ['ISNULL(0x01 + CONVERT(binary(4), DATALENGTH({0})) + CONVERT(varbinary(max), {0}), 0x00)'.format(TSQLInterface.WrapName(col)) for col in columns]
+        rowHash = "HASHBYTES('SHA2_256', %s)" % ' + '.join(values if values else ['0x'])
+        sums = ['SUM(CAST(CAST(SUBSTRING([RowHash], %d, 6) AS bigint) AS decimal(38, 0))) AS [Hash%d]' % (start, num) for num, start in enumerate(range(1, 25, 6))]
+        query = 'SELECT COUNT_BIG(*) AS [NumRows], %s FROM (SELECT %s AS [RowHash] FROM %s%s) AS [Rows]' % (','.join(sums), rowHash, TSQLInterface.WrapName(table), ' WHERE %s' % filter if filter else '')
+        result = self.Select(query).iloc[0]
+        return '_'.join([str(result['NumRows'])] + ['%s' % result['Hash%d' % num] for num in range(len(sums))])
+
+    def SelectKeys(self, keys, table, filter = None, stagingtable = '#Keys'):
+        """
+        * Return all rows in table whose key column values match a row
+        in keys, by staging keys and joining on server.
+        Inputs:
+        * keys: DataFrame containing key columns that are present in table.
+        * table: Table name string that exists in connected database.
+        Optional:
+        * filter: WHERE clause condition string to select rows in table
+        (ex: "[FileDate] = '2020-07-12'").
+        * stagingtable: Name of staging table to load keys into.
+        """
+        if not filter is None and not isinstance(filter, str):
+            raise Exception('filter must be a string if provided.')
+        self.StageData(keys, table, stagingtable)
+        table = TSQLInterface.WrapName(table)
+        stagingtable = TSQLInterface.WrapName(stagingtable)
+        join = ' AND '.join(['t.%s = k.%s' % (TSQLInterface.WrapName(col), TSQLInterface.WrapName(col)) for col in keys.columns])
+        query = 'SELECT t.* FROM %s AS t INNER JOIN %s AS k ON %s%s' % (table, stagingtable, join, ' WHERE %s' % filter if filter else '')
+        data = self.Select(query)
+        cursor = self.__connection.cursor()
+        cursor.execute('DROP TABLE IF EXISTS %s' % stagingtable)
+        cursor.commit()
+        return data
+
     @classmethod
     def PrimaryKeys(cls, data, maxCombs = None, ignoreCols = None, findFirst = False):
         """
@@ -0,0 +1,186 @@
+#####################################
+# AggregateChecker.py
+#####################################
+# Description:
+# * Reconcile datasets using column aggregates
+# (row counts, null counts, distinct counts, min/max
+# and numeric sums) before comparing rows.
+
+import numpy as np
+from pandas import DataFrame, isnull, Timestamp
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_numeric_dtype
+import xlsxwriter
+
+class AggregateChecker(object):
+    """
+    * Compute and compare column aggregates.
+    """
+    __headerFormat = {'bold': True, 'font_color': 'white', 'bg_color' : 'black'}
+    __statistics = ['NumRows', 'NumNulls', 'NumDistinct', 'Min', 'Max', 'Sum']
+    def __init__(self):
+        """
+        * Create empty object that can compare aggregates.
+        """
+        pass
+    ####################
+    # Interface Methods:
+    ####################
+    @classmethod
+    def Aggregates(cls, data, ignoreCols = None):
+        """
+        * Return { Column -> [Statistics] } listing statistics
+        that apply to each column in data, based upon column dtype.
+        Inputs:
+        * data: DataFrame.
+        Optional:
+        * ignoreCols: Iterable of columns (strings) to skip (case insensitive).
+        """
+        AggregateChecker.__Validate(data, ignoreCols)
+        ignore = set() if ignoreCols is None else set([col.lower() for col in ignoreCols])
+        aggregates = {}
+        for col in data.columns:
+            if col.lower() in ignore:
+                continue
+            aggregates[col] = ['NumNulls', 'NumDistinct']
+            if AggregateChecker.__IsNumeric(data[col]):
+                aggregates[col].extend(['Min', 'Max', 'Sum'])
+            elif is_datetime64_any_dtype(data[col]):
+                aggregates[col].extend(['Min', 'Max'])
+        return aggregates
+
+    @classmethod
+    def Profile(cls, data, ignoreCols = None):
+        """
+        * Return DataFrame indexed by column containing
+        NumRows, NumNulls, NumDistinct, Min, Max and Sum
+        for each column in data. Statistics that do not apply to
+        column dtype are null.
+        Inputs:
+        * data: DataFrame.
+        Optional:
+        * ignoreCols: Iterable of columns (strings) to skip (case insensitive).
+        """
+        aggregates = AggregateChecker.Aggregates(data, ignoreCols)
+        profile = DataFrame(index = list(aggregates), columns = AggregateChecker.__statistics, dtype = object)
+        if not aggregates:
+            return profile
+        data = data[list(aggregates)]
+        profile['NumRows'] = len(data)
+        profile['NumNulls'] = data.isna().sum()
+        profile['NumDistinct'] = data.nunique()
+        numeric = [col for col in aggregates if 'Sum' in aggregates[col]]
+        ordered = [col for col in aggregates if 'Min' in aggregates[col]]
+        if ordered:
+            profile.loc[ordered, 'Min'] = data[ordered].min()
+            profile.loc[ordered, 'Max'] = data[ordered].max()
+        if numeric:
+            # Sum compacted float columns at full precision:
+            data = data.astype({ col : 'float64' for col in numeric if is_float_dtype(data[col]) })
+            profile.loc[numeric, 'Sum'] = data[numeric].sum().astype(float)
+        return profile
+
+    @classmethod
+    def Compare(cls, profile_test, profile_valid, tolerance = 1e-9):
+        """
+        * Return DataFrame containing (Column, Statistic, Test, Valid)
+        for each statistic in profile_valid that disagrees with profile_test.
+        Columns are matched case insensitively. Numeric statistics are
+        compared using relative tolerance.
+        Inputs:
+        * profile_test: DataFrame generated by Profile() or TSQLInterface.SelectAggregates().
+        * profile_valid: DataFrame generated by Profile().
+        Optional:
+        * tolerance: Relative tolerance for numeric statistics.
+        """
+        errs = []
+        if not isinstance(profile_test, DataFrame):
+            errs.append('profile_test must be a DataFrame.')
+        if not isinstance(profile_valid, DataFrame):
+            errs.append('profile_valid must be a DataFrame.')
+        if not isinstance(tolerance, (int, float)):
+            errs.append('tolerance must be numeric.')
+        elif tolerance < 0:
+            errs.append('tolerance must be non-negative.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        testCols = { col.lower() : col for col in profile_test.index }
+        diffs = []
+        for col in profile_valid.index:
+            if not col.lower() in testCols:
+                diffs.append((col, 'Column', 'Missing', 'Present'))
+                continue
+            test = profile_test.loc[testCols[col.lower()]]
+            valid = profile_valid.loc[col]
+            for stat in AggregateChecker.__statistics:
+                if stat in test and not AggregateChecker.__Matches(test[stat], valid[stat], tolerance):
+                    diffs.append((col, stat, test[stat], valid[stat]))
+        return DataFrame(diffs, columns = ['Column', 'Statistic', 'Test', 'Valid'])
+
+    @classmethod
+    def GenerateReport(cls, reportPath, diffs):
+        """
+        * Generate report listing aggregates that disagree.
+        Inputs:
+        * reportPath: Path to output report. Must point to xlsx file.
+        * diffs: DataFrame generated by Compare().
+        """
+        errs = []
+        if not isinstance(reportPath, str):
+            errs.append('reportPath must be a string.')
+        elif not reportPath.endswith('.xlsx'):
+            errs.append('reportPath must point to xlsx file.')
+        if not isinstance(diffs, DataFrame):
+            errs.append('diffs must be a DataFrame.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        wb = xlsxwriter.Workbook(reportPath)
+        headerFormat = wb.add_format(AggregateChecker.__headerFormat)
+        sheet = wb.add_worksheet('Aggregates')
+        sheet.write(0, 0, '# of Differing Aggregates', headerFormat)
+        sheet.write(0, 1, len(diffs))
+        sheet.write_row(2, 0, list(diffs.columns), headerFormat)
+        for rowNum, row in enumerate(diffs.itertuples(index = False, name = None)):
+            sheet.write_row(rowNum + 3, 0, [val if isinstance(val, (int, float, str)) and not isnull(val) else str(val) for val in row])
+        wb.close()
+
+    ####################
+    # Private Helpers:
+    ####################
+    @staticmethod
+    def __IsNumeric(column):
+        """
+        * Determine if column can be summed on both sides.
+        """
+        return is_numeric_dtype(column) and not is_bool_dtype(column)
+
+    @staticmethod
+    def __Matches(test, valid, tolerance):
+        """
+        * Determine if single aggregate values agree.
+        """
+        if isnull(valid) or isnull(test):
+            return isnull(valid) and isnull(test)
+        if isinstance(valid, (Timestamp, np.datetime64)) or isinstance(test, (Timestamp, np.datetime64)):
+            try:
+                return Timestamp(test) == Timestamp(valid)
+            except (TypeError, ValueError):
+                return False
+        try:
+            return bool(np.isclose(float(test), float(valid), rtol = tolerance, atol = 0))
+        except (TypeError, ValueError):
+            return str(test) == str(valid)
+
+    @staticmethod
+    def __Validate(data, ignoreCols):
+        """
+        * Validate parameters.
+        """
+        errs = []
+        if not isinstance(data, DataFrame):
+            errs.append('data must be a DataFrame.')
+        if not ignoreCols is None and not hasattr(ignoreCols, '__iter__'):
+            errs.append('ignoreCols must be an iterable of strings if provided.')
+        elif not ignoreCols is None and any([not isinstance(val, str) for val in ignoreCols]):
+            errs.append('ignoreCols must be an iterable of strings if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
@@ -0,0 +1,154 @@
+#####################################
+# ComparisonCache.py
+#####################################
+# Description:
+# * Persist comparison reports by table and FileDate
+# partition, along with hashes of the source file and
+# table slice, so that unchanged partitions are not
+# compared again. Differences of each key partition
+# within a FileDate are also cached, so that only key 
+# partitions with changed rows are compared again.
+
+import hashlib
+import json
+import os
+import pickle
+from shutil import copyfile
+
+class ComparisonCache(object):
+    """
+    * Persisted cache of comparison reports for each
+    (table, FileDate) partition, and of differences for each
+    key partition within (table, FileDate).
+    """
+    __cacheFile = 'ComparisonCache.json'
+    __blockSize = 2 ** 20
+    def __init__(self, folder):
+        """
+        * Load cache stored in folder.
+        Inputs:
+        * folder: Existing folder to store cache and cached reports in.
+        """
+        if not isinstance(folder, str):
+            raise Exception('folder must be a string.')
+        elif not os.path.isdir(folder):
+            raise Exception('folder must point to an existing folder.')
+        self.__folder = folder
+        self.__path = os.path.join(folder, ComparisonCache.__cacheFile)
+        self.__entries = {}
+        if os.path.exists(self.__path):
+            with open(self.__path, 'r') as f:
+                self.__entries = json.load(f)
+    ####################
+    # Interface Methods:
+    ####################
+    def Lookup(self, table, fileDate, fileHash, tableHash):
+        """
+        * Return path to cached report for partition if file and table
+        slice hashes are unchanged since report was generated, else None.
+        Inputs:
+        * table: Table name string.
+        * fileDate: FileDate string of partition.
+        * fileHash: Hash string of source file (and comparison settings).
+        * tableHash: Hash string of table slice with FileDate.
+        """
+        entry = self.__entries.get(ComparisonCache.__Key(table, fileDate))
+        if entry is None or entry['filehash'] != fileHash or entry['tablehash'] != tableHash:
+            return None
+        reportPath = os.path.join(self.__folder, entry['report'])
+        return reportPath if os.path.exists(reportPath) else None
+
+    def Store(self, table, fileDate, fileHash, tableHash, reportPath):
+        """
+        * Copy report into cache folder and store hashes for partition.
+        Inputs:
+        * table: Table name string.
+        * fileDate: FileDate string of partition.
+        * fileHash: Hash string of source file (and comparison settings).
+        * tableHash: Hash string of table slice with FileDate.
+        * reportPath: Path to generated comparison report.
+        """
+        if not os.path.exists(reportPath):
+            raise Exception('reportPath must point to an existing report.')
+        key = ComparisonCache.__Key(table, fileDate)
+        report = '%s%s' % (hashlib.md5(key.encode()).hexdigest(), os.path.splitext(reportPath)[1])
+        # Copy and write to temporary files first so that cache is never partially written:
+        copyfile(reportPath, os.path.join(self.__folder, report + '.tmp'))
+        os.replace(os.path.join(self.__folder, report + '.tmp'), os.path.join(self.__folder, report))
+        self.__entries.setdefault(key, {}).update({ 'filehash' : fileHash, 'tablehash' : tableHash, 'report' : report })
+        self.__Save()
+
+    def LookupPartition(self, table, fileDate, part, testHash, validHash):
+        """
+        * Return cached ComparisonResult for key partition if test and valid 
+        rows in partition are unchanged since it was compared, else None.
+        Inputs:
+        * table: Table name string.
+        * fileDate: FileDate string of partition.
+        * part: Key partition number.
+        * testHash: Hash string of test rows in key partition.
+        * validHash: Hash string of valid rows in key partition.
+        """
+        entry = self.__entries.get(ComparisonCache.__Key(table, fileDate), {}).get('partitions', {}).get(str(part))
+        if entry is None or entry['testhash'] != testHash or entry['validhash'] != validHash:
+            return None
+        path = os.path.join(self.__folder, entry['result'])
+        if not os.path.exists(path):
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def StorePartitions(self, table, fileDate, partitions):
+        """
+        * Store differences and hashes of key partitions.
+        Inputs:
+        * table: Table name string.
+        * fileDate: FileDate string of partition.
+        * partitions: { Key Partition -> (testHash, validHash, ComparisonResult) }.
+        """
+        key = ComparisonCache.__Key(table, fileDate)
+        entry = self.__entries.setdefault(key, {}).setdefault('partitions', {})
+        for part, (testHash, validHash, result) in partitions.items():
+            name = '%s_%d.pkl' % (hashlib.md5(key.encode()).hexdigest(), part)
+            with open(os.path.join(self.__folder, name + '.tmp'), 'wb') as f:
+                pickle.dump(result, f)
+            os.replace(os.path.join(self.__folder, name + '.tmp'), os.path.join(self.__folder, name))
+            entry[str(part)] = { 'testhash' : testHash, 'validhash' : validHash, 'result' : name }
+        self.__Save()
+
+    @staticmethod
+    def FileHash(path, settings = None):
+        """
+        * Return hash string of file contents, and of comparison settings
+        that affect report if provided.
+        Inputs:
+        * path: Path to source file.
+        Optional:
+        * settings: Json serializable object containing comparison settings.
+        """
+        hasher = hashlib.md5()
+        with open(path, 'rb') as f:
+            for block in iter(lambda : f.read(ComparisonCache.__blockSize), b''):
+                hasher.update(block)
+        if not settings is None:
+            hasher.update(json.dumps(settings, sort_keys = True, default = str).encode())
+        return hasher.hexdigest()
+
+    ####################
+    # Private Helpers:
+    ####################
+    def __Save(self):
+        """
+        * Write entries to cache file, replacing file
+        only once fully written.
+        """
+        with open(self.__path + '.tmp', 'w') as f:
+            json.dump(self.__entries, f, indent = 4)
+        os.replace(self.__path + '.tmp', self.__path)
+
+    @staticmethod
+    def __Key(table, fileDate):
+        """
+        * Return key for partition.
+        """
+        return '%s|%s' % (table.lower(), fileDate)
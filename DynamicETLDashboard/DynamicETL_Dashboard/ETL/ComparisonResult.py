@@ -0,0 +1,269 @@
+#####################################
+# ComparisonResult.py
+#####################################
+# Description:
+# * Compact representation of differences between
+# datasets, storing row positions and per column difference
+# masks instead of formatted strings.
+
+import numpy as np
+from pandas import concat, DataFrame
+
+class ComparisonResult(object):
+    """
+    * Differences between two datasets. Differing matched rows are
+    stored as positions into aligned test and valid DataFrames along
+    with a boolean mask per compared column, and unmatched rows as
+    positions into a DataFrame. Cell strings are only formatted
+    when rows are rendered.
+    """
+    __renderRows = 10000
+    def __init__(self, columns, names = None, keys = None, test = None, valid = None, testRows = None, validRows = None, maskCols = None, masks = None, rows = None, rowPositions = None):
+        """
+        * Create result.
+        Inputs:
+        * columns: List of (lowercase) output columns in order.
+        Optional:
+        * names: { Column -> Output Name }. Uses columns if not provided.
+        * keys: List of key columns, present in test/valid columns or index.
+        * test: DataFrame containing test rows referenced by testRows.
+        * valid: DataFrame containing valid rows referenced by validRows.
+        * testRows, validRows: Integer arrays of aligned positions of differing rows.
+        * maskCols: List of compared columns.
+        * masks: Boolean array of shape (# of differing rows, # of maskCols)
+        indicating which cells differ.
+        * rows: DataFrame containing rows that are reported in full.
+        * rowPositions: Integer array of positions in rows.
+        """
+        self.__columns = list(columns)
+        self.__names = { col : col for col in columns } if names is None else names
+        self.__keys = [] if keys is None else list(keys)
+        self.__test = test
+        self.__valid = valid
+        self.__testRows = np.zeros(0, dtype = np.int64) if testRows is None else np.asarray(testRows, dtype = np.int64)
+        self.__validRows = np.zeros(0, dtype = np.int64) if validRows is None else np.asarray(validRows, dtype = np.int64)
+        self.__maskCols = [] if maskCols is None else list(maskCols)
+        self.__masks = np.zeros((len(self.__testRows), len(self.__maskCols)), dtype = bool) if masks is None else masks
+        self.__rows = rows
+        self.__rowPositions = np.zeros(0, dtype = np.int64) if rowPositions is None else np.asarray(rowPositions, dtype = np.int64)
+        self.__order = None
+
+    def __len__(self):
+        """
+        * Return number of differing rows.
+        """
+        return len(self.__testRows) + len(self.__rowPositions)
+
+    def __getstate__(self):
+        """
+        * Only pickle referenced rows (ex: when returned from worker process).
+        """
+        return self.Compact().__dict__
+
+    def __setstate__(self, state):
+        """
+        * Restore pickled result.
+        """
+        self.__dict__.update(state)
+
+    ####################
+    # Interface Methods:
+    ####################
+    def Columns(self):
+        """
+        * Return list of output column names.
+        """
+        return [self.__names[col] for col in self.__columns]
+
+    def ColumnCounts(self):
+        """
+        * Return { Output Name -> # of differences } containing number
+        of non-blank cells in each rendered column, computed from masks.
+        """
+        counts = {}
+        maskCounts = dict(zip(self.__maskCols, self.__masks.sum(axis = 0)))
+        full = None if self.__rows is None else self.__FullRows(np.arange(len(self.__rowPositions)))
+        for col in self.__columns:
+            if col in self.__keys:
+                count = len(self.__testRows)
+            else:
+                count = maskCounts.get(col, 0)
+            if not full is None and col in full.columns:
+                values = full[col].astype(object)
+                count += (values.notna() & (values != '')).sum()
+            counts[self.__names[col]] = int(count)
+        return counts
+
+    def MatchedCounts(self):
+        """
+        * Return (# of matched rows with any difference, { Output Name -> # of differing cells })
+        for compared columns of matched rows only.
+        """
+        counts = dict(zip(self.__maskCols, self.__masks.sum(axis = 0)))
+        return len(self.__testRows), { self.__names[col] : int(counts[col]) for col in self.__columns if col in counts }
+
+    def Render(self, chunkRows = None):
+        """
+        * Yield DataFrames of differing rows with output column names,
+        differing cells formatted as "test vs valid" and blanks as None.
+        Optional:
+        * chunkRows: Maximum number of rows per yielded DataFrame.
+        """
+        chunkRows = ComparisonResult.__renderRows if chunkRows is None else chunkRows
+        numDiff = len(self.__testRows)
+        order = np.arange(len(self)) if self.__order is None else self.__order
+        for start in range(0, len(order), chunkRows):
+            chunk = order[start:start + chunkRows]
+            isFull = chunk >= numDiff
+            rendered = concat([self.__RenderDiffs(chunk[~isFull]), self.__RenderRows(chunk[isFull] - numDiff)], ignore_index = True)
+            # Restore requested row order:
+            rendered = rendered.iloc[np.argsort(np.argsort(isFull, kind = 'stable'))].reset_index(drop = True)
+            rendered.columns = self.Columns()
+            yield rendered.astype(object).where(rendered.notna(), None)
+
+    def ToDataFrame(self):
+        """
+        * Return DataFrame containing all rendered differing rows.
+        """
+        chunks = list(self.Render())
+        return concat(chunks, ignore_index = True) if chunks else DataFrame(columns = self.Columns())
+
+    def Compact(self):
+        """
+        * Return result that only holds differing rows, rather
+        than references to entire datasets.
+        """
+        result = ComparisonResult(self.__columns, self.__names, self.__keys, self.__Take(self.__test, self.__testRows), self.__Take(self.__valid, self.__validRows),
+                                  np.arange(len(self.__testRows)), np.arange(len(self.__validRows)), self.__maskCols, self.__masks,
+                                  self.__Take(self.__rows, self.__rowPositions), np.arange(len(self.__rowPositions)))
+        result.__order = self.__order
+        return result
+
+    @classmethod
+    def Concat(cls, results, sortKeys = None):
+        """
+        * Combine results into single compact result, in order of
+        sortKeys columns if provided.
+        Inputs:
+        * results: Non-empty list of ComparisonResults with same columns.
+        Optional:
+        * sortKeys: List of (lowercase) key columns to stably order rows by.
+        """
+        results = [result.Compact() for result in results]
+        first = results[0]
+        test = ComparisonResult.__ConcatFrames([result.__test for result in results])
+        valid = ComparisonResult.__ConcatFrames([result.__valid for result in results])
+        rows = ComparisonResult.__ConcatFrames([result.__rows for result in results])
+        masks = np.concatenate([result.__masks for result in results])
+        numDiff = len(masks)
+        numRows = sum([len(result.__rowPositions) for result in results])
+        merged = ComparisonResult(first.__columns, first.__names, first.__keys, test, valid, np.arange(numDiff), np.arange(numDiff), first.__maskCols, masks, rows, np.arange(numRows))
+        # Interleave orders of each result:
+        orders, diffStart, rowStart = [], 0, numDiff
+        for result in results:
+            order = np.arange(len(result)) if result.__order is None else result.__order
+            numResultDiff = len(result.__testRows)
+            orders.append(np.where(order < numResultDiff, order + diffStart, order - numResultDiff + rowStart))
+            diffStart += numResultDiff
+            rowStart += len(result.__rowPositions)
+        merged.__order = np.concatenate(orders) if orders else None
+        if sortKeys:
+            merged.__SortBy(sortKeys)
+        return merged
+
+    ####################
+    # Private Helpers:
+    ####################
+    def __SortBy(self, keys):
+        """
+        * Stably order rows by key columns, keeping current order if
+        keys are not sortable.
+        """
+        keyData = concat([self.__KeyFrame(self.__test, self.__testRows, keys), self.__KeyFrame(self.__rows, self.__rowPositions, keys)], ignore_index = True)
+        keyData = keyData.iloc[self.__order].reset_index(drop = True)
+        try:
+            self.__order = self.__order[keyData.sort_values(keys, kind = 'stable').index.to_numpy()]
+        except TypeError:
+            pass
+
+    def __RenderDiffs(self, positions):
+        """
+        * Return DataFrame containing key values and formatted
+        differing cells for differing matched rows at positions.
+        """
+        rendered = DataFrame(index = range(len(positions)))
+        testRows = self.__testRows[positions]
+        validRows = self.__validRows[positions]
+        masks = self.__masks[positions]
+        maskCols = { col : num for num, col in enumerate(self.__maskCols) }
+        for col in self.__columns:
+            if col in self.__keys:
+                rendered[col] = ComparisonResult.__Values(self.__test, col, testRows).astype(object).to_numpy()
+            elif col in maskCols:
+                mask = masks[:, maskCols[col]]
+                column = np.full(len(positions), None, dtype = object)
+                test = ComparisonResult.__ToStrings(ComparisonResult.__Values(self.__test, col, testRows[mask]))
+                valid = ComparisonResult.__ToStrings(ComparisonResult.__Values(self.__valid, col, validRows[mask]))
+                column[mask] = (test + ' vs ' + valid).to_numpy()
+                rendered[col] = column
+            else:
+                rendered[col] = np.full(len(positions), None, dtype = object)
+        return rendered
+
+    def __RenderRows(self, positions):
+        """
+        * Return DataFrame containing entire rows for unmatched rows at positions.
+        """
+        if self.__rows is None:
+            return DataFrame(index = range(len(positions)), columns = self.__columns, dtype = object)
+        return self.__FullRows(positions).reindex(columns = self.__columns).astype(object)
+
+    def __FullRows(self, positions):
+        """
+        * Return unmatched rows at positions, with key index levels as columns.
+        """
+        rows = self.__rows.iloc[self.__rowPositions[positions]]
+        hasKeyIndex = any([name in self.__keys for name in rows.index.names])
+        return rows.reset_index(drop = not hasKeyIndex).reset_index(drop = True)
+
+    @staticmethod
+    def __Values(data, col, positions):
+        """
+        * Return Series of column values at positions, where column
+        can also be an index level.
+        """
+        if col in data.columns:
+            return data[col].iloc[positions].reset_index(drop = True)
+        return data.index.get_level_values(col)[positions].to_series().reset_index(drop = True)
+
+    @staticmethod
+    def __KeyFrame(data, positions, keys):
+        """
+        * Return DataFrame containing key values at positions.
+        """
+        if data is None:
+            return DataFrame(columns = keys)
+        return DataFrame({ key : ComparisonResult.__Values(data, key, positions) for key in keys })
+
+    @staticmethod
+    def __ConcatFrames(frames):
+        """
+        * Concatenate non-null DataFrames, or return None if there are none.
+        """
+        frames = [frame for frame in frames if not frame is None]
+        return concat(frames) if frames else None
+
+    @staticmethod
+    def __Take(data, positions):
+        """
+        * Return rows at positions, or None if no data.
+        """
+        return None if data is None else data.iloc[positions]
+
+    @staticmethod
+    def __ToStrings(column):
+        """
+        * Convert column values to strings, with nulls as blanks.
+        """
+        column = column.astype(object)
+        return column.where(column.notna(), '').astype(str).reset_index(drop = True)
@@ -4,8 +4,22 @@
 # Description:
 # * Generate report comparing two datasets.
 
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_all_start_methods, get_context
+from ETL.ComparisonCache import ComparisonCache
+from ETL.ComparisonResult import ComparisonResult
+from ETL.ExternalSorter import ExternalSorter
+import hashlib
+from itertools import chain, repeat
+import json
+import numpy as np
 import os
-from pandas import DataFrame, MultiIndex
+from pandas import CategoricalDtype, concat, DataFrame, MultiIndex, read_pickle, Series, to_numeric
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_numeric_dtype, is_object_dtype, is_signed_integer_dtype, is_string_dtype, is_unsigned_integer_dtype
+from pandas.util import hash_pandas_object
+from shutil import rmtree
+from statistics import NormalDist
+from tempfile import mkdtemp
 import xlsxwriter
 
 class DataComparer(object):
@@ -13,6 +27,16 @@ class DataComparer(object):
     * Compare two DataFrames.
     """
     __headerFormat = {'bold': True, 'font_color': 'white', 'bg_color' : 'black'}
+    # For out-of-core comparisons:
+    __maxSpillLevel = 4
+    __memoryFactor = 4
+    __spillPartitions = 16
+    # Number of key ranges to stratify samples by:
+    __sampleStrata = 16
+    # Number of key partitions to cache differences for:
+    __cachePartitions = 32
+    # Datasets inherited by forked worker processes:
+    __shared = None
     def __init__(self):
         """
         * Create empty object that can generate reports.
@@ -22,7 +46,7 @@ class DataComparer(object):
     # Interface Methods:
     ####################
     @classmethod
-    def GenerateComparisonReport(cls, reportPath, data_test, data_valid, ignoreCols = None, pKey = None):
+    def GenerateComparisonReport(cls, reportPath, data_test, data_valid, ignoreCols = None, pKey = None, memoryBudget = None, spillFolder = None, workers = None):
         """
         * Generate report detailing differences between table rows
         and file rows.
@@ -33,21 +57,175 @@ class DataComparer(object):
         Optional:
         * ignoreCols: Iterable of columns (strings) to ignore when comparing. 
         * pKey: String or iterable to determine which rows to compare.
+        * memoryBudget: Maximum number of bytes to use when comparing. If provided then
+        both datasets are hash partitioned into spill files and compared one partition at 
+        a time. data_test and data_valid can then also be iterables of DataFrame chunks
+        (ex: read_csv/read_sql with chunksize).
+        * spillFolder: Folder to write spill files to if memoryBudget is provided. Uses
+        system temp folder if not provided.
+        * workers: Number of processes to compare partitions with (1 if not provided). If 
+        more than one then datasets are split into partitions by primary key (or entire row 
+        if no primary key) and compared in a process pool. Rows are still assigned to 
+        partitions in the main process, and datasets are only shared with workers without 
+        pickling where processes can be forked (not Windows), so only use workers for large 
+        datasets (see benchmarks/BenchmarkParallelCompare.py).
+        Differing rows are ordered by primary key values (or if no primary key, by values 
+        of shared columns in alphabetical column order) in all modes, rather than in order
+        of data_valid. Null and empty string values are considered equal.
         """
         # Validate parameters:
-        DataComparer.__Validate(reportPath, data_test, data_valid, ignoreCols, pKey)
+        DataComparer.__Validate(reportPath, data_test, data_valid, ignoreCols, pKey, memoryBudget, spillFolder, workers)
+        workers = 1 if workers is None else workers
         # Generate report:
-        compData, missingColsMsg = DataComparer.__Compare(data_test, data_valid, ignoreCols, pKey)
+        if memoryBudget is None and workers == 1:
+            result, missingColsMsg = DataComparer.__Compare(data_test, data_valid, ignoreCols, pKey)
+            hashCols = DataComparer.__HashColumns(data_test.columns, data_valid.columns, ignoreCols, pKey)
+            result = DataComparer.__MergeDiffs([result], hashCols)
+        elif memoryBudget is None:
+            result, missingColsMsg = DataComparer.__ParallelCompare(data_test, data_valid, ignoreCols, pKey, workers)
+        else:
+            result, missingColsMsg = DataComparer.__PartitionedCompare(data_test, data_valid, ignoreCols, pKey, memoryBudget, spillFolder, workers)
         reportWB = xlsxwriter.Workbook(reportPath)
-        DataComparer.__GenerateSummaryPage(compData, reportWB, missingColsMsg)
-        DataComparer.__GenerateDiffPage(compData, reportWB)
+        DataComparer.__GenerateSummaryPage(result, reportWB, missingColsMsg)
+        DataComparer.__GenerateDiffPage(result, reportWB)
         reportWB.close()
 
+    @classmethod
+    def GenerateIncrementalReport(cls, reportPath, data_test, data_valid, cache, table, fileDate, ignoreCols = None, pKey = None):
+        """
+        * Generate report detailing differences between table rows
+        and file rows, splitting both datasets into partitions by hash of
+        primary key(s) (or entire row if no primary key) and only comparing
+        partitions whose rows changed since they were cached. Returns number 
+        of partitions that were compared.
+        Inputs:
+        * reportPath: Path to output report. Must point to xlsx file.
+        * data_test: DataFrame containing test data.
+        * data_valid: DataFrame containing valid data to compare against.
+        * cache: ComparisonCache to look up and store partition differences in.
+        * table: Table name string that data_test was selected from.
+        * fileDate: FileDate string of rows in data_test.
+        Optional:
+        * ignoreCols: Iterable of columns (strings) to ignore when comparing. 
+        * pKey: String or iterable to determine which rows to compare.
+        """
+        # Validate parameters:
+        DataComparer.__Validate(reportPath, data_test, data_valid, ignoreCols, pKey, None, None, None)
+        errs = []
+        if not isinstance(cache, ComparisonCache):
+            errs.append('cache must be a ComparisonCache.')
+        if not isinstance(table, str):
+            errs.append('table must be a string.')
+        if not isinstance(fileDate, str):
+            errs.append('fileDate must be a string.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        hashCols = DataComparer.__HashColumns(data_test.columns, data_valid.columns, ignoreCols, pKey)
+        numParts = DataComparer.__cachePartitions
+        testParts = DataComparer.__SplitPartitions(data_test, hashCols, numParts, data_valid)
+        validParts = DataComparer.__SplitPartitions(data_valid, hashCols, numParts, data_valid)
+        empty, missingColsMsg = DataComparer.__Compare(data_test.iloc[:0], data_valid.iloc[:0], ignoreCols, pKey)
+        # Settings that affect differences are part of each partition hash:
+        settings = { 'ignorecols' : None if ignoreCols is None else sorted([col.lower() for col in ignoreCols]), 'hashcols' : hashCols, 'partitions' : numParts }
+        diffs, changed = [empty], {}
+        for part in range(numParts):
+            testHash = DataComparer.__PartitionHash(testParts[part], settings)
+            validHash = DataComparer.__PartitionHash(validParts[part], settings)
+            diff = cache.LookupPartition(table, fileDate, part, testHash, validHash)
+            if diff is None:
+                diff = DataComparer.__Compare(testParts[part], validParts[part], ignoreCols, pKey)[0].Compact()
+                changed[part] = (testHash, validHash, diff)
+            diffs.append(diff)
+        if changed:
+            cache.StorePartitions(table, fileDate, changed)
+        result = DataComparer.__MergeDiffs(diffs, hashCols)
+        reportWB = xlsxwriter.Workbook(reportPath)
+        DataComparer.__GenerateSummaryPage(result, reportWB, missingColsMsg)
+        DataComparer.__GenerateDiffPage(result, reportWB)
+        reportWB.close()
+        return len(changed)
+
+    @classmethod
+    def GenerateStreamingReport(cls, reportPath, data_test, data_valid, pKey, ignoreCols = None, presorted = (False, False), spillFolder = None):
+        """
+        * Generate report detailing differences between table rows
+        and file rows by merge joining both datasets in primary key order,
+        holding only a window of rows from each dataset in memory.
+        Inputs:
+        * reportPath: Path to output report. Must point to xlsx file.
+        * data_test: DataFrame or iterable of DataFrame chunks containing test data.
+        * data_valid: DataFrame or iterable of DataFrame chunks containing valid data.
+        * pKey: String or iterable of strings to order and compare rows by. Key
+        columns cannot contain nulls and must have comparable types in both datasets.
+        Optional:
+        * ignoreCols: Iterable of columns (strings) to ignore when comparing.
+        * presorted: Tuple of (test, valid) booleans indicating dataset is already
+        in ascending key order (ex: query with ORDER BY). Presorted datasets are
+        verified while streaming, and unsorted datasets are sorted externally on disk.
+        * spillFolder: Folder to write sorted runs to. Uses system temp folder if not provided.
+        """
+        # Validate parameters:
+        DataComparer.__ValidateStreaming(reportPath, data_test, data_valid, pKey, ignoreCols, presorted, spillFolder)
+        keys = [pKey.lower()] if isinstance(pKey, str) else [key.lower() for key in pKey]
+        streams = []
+        for data, isSorted in zip((data_test, data_valid), presorted):
+            if isinstance(data, DataFrame):
+                data = [data] if isSorted else [data.sort_values(ExternalSorter.KeyColumns(data, keys), kind = 'stable')]
+            elif not isSorted:
+                data = ExternalSorter.Sort(data, keys, spillFolder)
+            streams.append(data)
+        # Generate report:
+        result, missingColsMsg = DataComparer.__StreamCompare(streams[0], streams[1], ignoreCols, keys, presorted)
+        reportWB = xlsxwriter.Workbook(reportPath)
+        DataComparer.__GenerateSummaryPage(result, reportWB, missingColsMsg)
+        DataComparer.__GenerateDiffPage(result, reportWB)
+        reportWB.close()
+
+    @classmethod
+    def GenerateSampleReport(cls, reportPath, data_valid, fetchTest, pKey, ignoreCols = None, sampleSize = 10000, confidence = 0.95, seed = None):
+        """
+        * Generate report estimating mismatch rates per column using a
+        sample of valid rows stratified by key range, and only the test rows 
+        with sampled keys. Returns DataFrame containing estimates.
+        Inputs:
+        * reportPath: Path to output report. Must point to xlsx file.
+        * data_valid: DataFrame containing valid data to sample.
+        * fetchTest: Function that accepts DataFrame of sampled key columns and
+        returns DataFrame containing test rows with those keys.
+        * pKey: String or iterable of strings to stratify and compare rows by.
+        Optional:
+        * ignoreCols: Iterable of columns (strings) to ignore when comparing.
+        * sampleSize: Number of valid rows (with distinct keys) to sample.
+        * confidence: Confidence level of mismatch rate intervals, in (0, 1).
+        * seed: Integer seed for sampling (for repeatable reports).
+        """
+        # Validate parameters:
+        DataComparer.__ValidateSample(reportPath, data_valid, fetchTest, pKey, ignoreCols, sampleSize, confidence, seed)
+        keys = [pKey.lower()] if isinstance(pKey, str) else [key.lower() for key in pKey]
+        sample = DataComparer.__StratifiedSample(data_valid, keys, sampleSize, seed)
+        colMap = { col.lower() : col for col in sample.columns }
+        data_test = fetchTest(sample[[colMap[key] for key in keys]].reset_index(drop = True))
+        result, missingColsMsg = DataComparer.__Compare(data_test, sample, ignoreCols, keys)
+        estimates = DataComparer.__EstimateRates(result, data_test, sample, keys, confidence)
+        reportWB = xlsxwriter.Workbook(reportPath)
+        DataComparer.__GenerateSamplePage(estimates, reportWB, missingColsMsg, len(data_valid), confidence)
+        DataComparer.__GenerateDiffPage(result, reportWB)
+        reportWB.close()
+        return estimates
+
+    @classmethod
+    def _Worker(cls, method, *args):
+        """
+        * Run private method in worker process (name mangled
+        methods cannot be pickled directly).
+        """
+        return getattr(cls, '_DataComparer' + method)(*args)
+
     ####################
     # Private Helpers:
     ####################
     @classmethod
-    def __GenerateSummaryPage(cls, compData, wb, missingColsMsg):
+    def __GenerateSummaryPage(cls, result, wb, missingColsMsg):
         """
         * Generate summary page in workbook.
         """
@@ -56,108 +234,605 @@ class DataComparer(object):
         summarySheet.write(0, 0, 'Missing Columns', headerFormat)
         summarySheet.write(0, 1, 'None' if not missingColsMsg else missingColsMsg)
         summarySheet.write(1, 0, '# of Differing Rows', headerFormat)
-        summarySheet.write(1, 1, len(compData), headerFormat)
+        summarySheet.write(1, 1, len(result), headerFormat)
         # Write # of differences for each column:
         summarySheet.write(2, 0, '# of Differences by Column', headerFormat)
-        for num, col in enumerate(compData.columns):
+        for num, (col, count) in enumerate(result.ColumnCounts().items()):
             summarySheet.write(3, num, col, headerFormat)
-            summarySheet.write(4, num, len([val for val in compData[col] if val]))
+            summarySheet.write(4, num, count)
 
     @classmethod
-    def __GenerateDiffPage(cls, compData, wb):
+    def __GenerateDiffPage(cls, result, wb):
         """
         * Generate sheet detailing specific differences in 
         column values.
         """
         # Do not generate sheet if no differences occurred.
-        if len(compData) == 0:
+        if len(result) == 0:
             return
         headerFormat = wb.add_format(DataComparer.__headerFormat)
         diffSheet = wb.add_worksheet('Differences')
-        # Write all rows with differing column values:
-        for rowNum in range(0, len(compData) + 1):
-            for colNum, col in enumerate(compData.columns):
-                if rowNum != 0:
-                    diffSheet.write(rowNum, colNum, compData[col][rowNum - 1])
-                else:
-                    # Write headers:
-                    diffSheet.write(rowNum, colNum, col, headerFormat)
+        # Write headers:
+        diffSheet.write_row(0, 0, result.Columns(), headerFormat)
+        # Write all rows with differing column values, formatting one chunk at a time:
+        rowNum = 1
+        for chunk in result.Render():
+            for row in chunk.itertuples(index = False, name = None):
+                diffSheet.write_row(rowNum, 0, row)
+                rowNum += 1
+
+    @classmethod
+    def __GenerateSamplePage(cls, estimates, wb, missingColsMsg, numRows, confidence):
+        """
+        * Generate sample summary page in workbook.
+        """
+        headerFormat = wb.add_format(DataComparer.__headerFormat)
+        summarySheet = wb.add_worksheet('Sample Summary')
+        summarySheet.write(0, 0, 'Missing Columns', headerFormat)
+        summarySheet.write(0, 1, 'None' if not missingColsMsg else missingColsMsg)
+        summarySheet.write(1, 0, '# of Valid Rows', headerFormat)
+        summarySheet.write(1, 1, numRows)
+        summarySheet.write(2, 0, 'Confidence', headerFormat)
+        summarySheet.write(2, 1, confidence)
+        summarySheet.write(3, 0, 'Recommendation', headerFormat)
+        if estimates['Mismatches'].sum() > 0:
+            summarySheet.write(3, 1, 'Mismatches detected in sample. Run full comparison.')
+        else:
+            summarySheet.write(3, 1, 'No mismatches detected in sample.')
+        summarySheet.write_row(5, 0, list(estimates.columns), headerFormat)
+        for rowNum, row in enumerate(estimates.itertuples(index = False, name = None)):
+            summarySheet.write_row(rowNum + 6, 0, row)
+
     @classmethod
     def __Compare(cls, data_test, data_valid, ignoreCols, pKey):
         """
-        * Return dataframe containing rows where datasets differ.
+        * Return ComparisonResult containing rows where datasets differ,
+        with columns in original order.
         """
         missingColsMsg = None
         colMap = {col.lower() : col for col in data_test.columns}
-        data_test = data_test.rename(columns={col : col.lower() for col in data_test.columns}).fillna('')
-        data_valid = data_valid.rename(columns={col : col.lower() for col in data_valid.columns}).fillna('')
+        data_test = data_test.rename(columns={col : col.lower() for col in data_test.columns})
+        data_valid = DataComparer.__FillBlanks(data_valid.rename(columns={col : col.lower() for col in data_valid.columns}))
         if not ignoreCols is None:
             ignoreCols = set([col.lower() for col in ignoreCols])
             data_test = data_test[[col for col in data_test.columns if not col.lower() in ignoreCols]]
             data_valid = data_valid[[col for col in data_valid.columns if not col.lower() in ignoreCols]]
-        columnOrder = data_test.columns
+        columnOrder = list(data_test.columns)
         # Match testing dtypes to valid dtypes:
-        for col in data_test.columns:
-            if data_valid[col].dtype != data_test[col].dtype:
-                data_test[col] = data_test[col].astype(data_valid[col].dtype)
+        data_test = DataComparer.__FillBlanks(DataComparer.__MatchDTypes(data_test, data_valid))
         # Remove columns in data_valid not in data_test:
         missingCols = set(data_valid.columns) - set(data_test.columns)
         if missingCols:
             missingColsMsg = ','.join(missingCols)
             data_valid = data_valid[[col for col in data_valid if not col in missingCols]]
-        # Remove duplicate rows from each dataset:
-        data_test = data_test.drop_duplicates()
-        data_valid = data_valid.drop_duplicates()
         # Perform comparison:
         if not pKey is None:
+            # Remove duplicate rows from each dataset:
+            data_test = data_test.drop_duplicates()
+            data_valid = data_valid.drop_duplicates()
             # Compare using primary key(s):
             pKey = [pKey.lower()] if isinstance(pKey, str) else [key.lower() for key in pKey]
-            data_test = data_test.set_index(list(pKey))
-            data_valid = data_valid.set_index(list(pKey))
-            diff = { col : [] for col in data_test.columns }
-            diff.update({col : [] for col in data_test.index.names})
-            matches_test = data_test.loc[data_valid.index]
-            matches_valid = data_valid.loc[data_test.index]
-            non_matches = data_test.loc[data_test.index == set(data_test.index) - set(data_valid.index)]
-            # Compare rows where primary key is the same:
-            for row in range(0, len(matches_test)):
-                test = matches_test.iloc[row]
-                valid = matches_valid.loc[test.name]
-                rowDiff = { col : None for col in diff }
-                appendDiff = False
-                for col in matches_test.columns:
-                    if test[col] != valid[col]:
-                        rowDiff[col] = '%s vs %s' % (test[col], valid[col])
-                        appendDiff = True
-                # Append differing values if differences occurred:
-                if appendDiff:
-                    # Add the index value to difference to denote unique identifier where issue occurred:
-                    if isinstance(matches_test.index, MultiIndex):
-                        for num, col in enumerate(matches_test.index.names):
-                            rowDiff[col] = matches_test.index[row][num]
-                    else:
-                        col = matches_test.index.names[0]
-                        rowDiff[col] = matches_test.index[row]
-                    for col in rowDiff:
-                        diff[col].append(rowDiff[col])
-            # Write entire row for each data_test pkey value not present in data_valid:
-            for row in range(0, len(non_matches)):
-                target = non_matches.iloc[row]
-                for col in diff:
-                    diff[col].append(data_test.iloc[row][col])    
-            df = DataFrame(diff)
+            result = DataComparer.__KeyedCompare(data_test, data_valid, pKey, columnOrder, colMap)
+        else:
+            # Return rows in valid dataset that are not present in test dataset:
+            result = DataComparer.__FingerprintCompare(data_test, data_valid, columnOrder, colMap)
+        return result, missingColsMsg
+
+    @classmethod
+    def __KeyedCompare(cls, data_test, data_valid, pKey, columns, names):
+        """
+        * Align both datasets on primary key(s) once and compare
+        entire columns at a time. Returns ComparisonResult referencing
+        differing aligned rows with per column difference masks, and 
+        full rows for test keys not present in valid dataset.
+        """
+        data_test = data_test.set_index(pKey)
+        data_valid = data_valid.set_index(pKey)
+        # Keep first row for each key so alignment is one-to-one:
+        if data_valid.index.has_duplicates:
+            data_valid = data_valid[~data_valid.index.duplicated()]
+        # Map each test row to position of matching valid row (-1 if no match):
+        positions = data_valid.index.get_indexer(data_test.index)
+        hasMatch = positions >= 0
+        testRows = np.flatnonzero(hasMatch)
+        validRows = positions[hasMatch]
+        compareCols = [col for col in data_test.columns if col in data_valid.columns]
+        masks = np.zeros((len(testRows), len(compareCols)), dtype = bool)
+        for num, col in enumerate(compareCols):
+            test = data_test[col].iloc[testRows].reset_index(drop = True)
+            valid = data_valid[col].iloc[validRows].reset_index(drop = True)
+            masks[:, num] = DataComparer.__ColumnDiffers(test, valid)
+        rowHasDiff = masks.any(axis = 1)
+        # Entire row is reported for each data_test pkey value not present in data_valid:
+        return ComparisonResult(columns, names, pKey, data_test, data_valid, testRows[rowHasDiff], validRows[rowHasDiff], 
+                                compareCols, masks[rowHasDiff], data_test, np.flatnonzero(~hasMatch))
+
+    @classmethod
+    def __FingerprintCompare(cls, data_test, data_valid, columns, names):
+        """
+        * Compute one 64-bit hash per row for each dataset and 
+        return ComparisonResult referencing unique rows in data_valid 
+        whose hash is not present in data_test.
+        """
+        shared = [col for col in data_valid.columns if col in data_test.columns]
+        testHashes = DataComparer.__RowHashes(data_test[shared])
+        validHashes = DataComparer.__RowHashes(data_valid[shared])
+        # Skip duplicate rows in valid dataset:
+        isNew = ~Series(validHashes).duplicated().to_numpy()
+        isNew &= ~np.isin(validHashes, testHashes)
+        return ComparisonResult(columns, names, rows = data_valid, rowPositions = np.flatnonzero(isNew))
+
+    @staticmethod
+    def __RowHashes(data):
+        """
+        * Return numpy array containing one 64-bit hash per row.
+        """
+        if len(data.columns) == 0:
+            return np.zeros(len(data), dtype = np.uint64)
+        # Hash compacted numeric columns at full width so that hashes match uncompacted values:
+        widths = { col : DataComparer.__FullWidth(data[col].dtype) for col in data.columns }
+        data = data.astype({ col : widths[col] for col in widths if widths[col] != data[col].dtype })
+        return hash_pandas_object(data, index = False).to_numpy()
+
+    @staticmethod
+    def __FullWidth(dtype):
+        """
+        * Return dtype used to compare values of (possibly compacted) dtype:
+        64-bit numeric dtypes for downcast numbers and category dtype for categoricals.
+        """
+        if isinstance(dtype, CategoricalDtype):
+            return dtype.categories.dtype
+        elif is_signed_integer_dtype(dtype) and dtype.itemsize < 8:
+            return np.dtype('int64')
+        elif is_unsigned_integer_dtype(dtype) and dtype.itemsize < 8:
+            return np.dtype('uint64')
+        elif is_float_dtype(dtype) and dtype.itemsize < 8:
+            return np.dtype('float64')
+        return dtype
+
+    @staticmethod
+    def __FillBlanks(data):
+        """
+        * Replace nulls in object and string columns with empty strings, so that
+        null and empty string values are equal. Numeric and datetime columns keep
+        their dtypes, and nulls on both sides are equal in __ColumnDiffers().
+        """
+        cols = [col for col in data.columns if is_object_dtype(data[col].dtype) or is_string_dtype(data[col].dtype)]
+        if not cols or not any([data[col].hasnans for col in cols]):
+            return data
+        data = data.copy()
+        for col in cols:
+            data[col] = data[col].fillna('')
+        return data
+
+    @staticmethod
+    def __ColumnDiffers(test, valid):
+        """
+        * Return boolean array indicating where aligned column values
+        differ. Null values on both sides are considered equal.
+        """
+        bothNull = test.isna().to_numpy() & valid.isna().to_numpy()
+        try:
+            differs = (test != valid).to_numpy()
+        except TypeError:
+            # Fall back to comparing objects if types are not comparable:
+            differs = (test.astype(object) != valid.astype(object)).to_numpy()
+        return differs & ~bothNull
+
+    @staticmethod
+    def __MatchDTypes(data_test, data_valid):
+        """
+        * Convert testing columns to the dtypes of matching valid columns
+        where possible, using full width dtypes if valid columns are compacted
+        so that test values are not truncated.
+        """
+        for col in data_test.columns:
+            if col in data_valid.columns and data_valid[col].dtype != data_test[col].dtype:
+                dtype = DataComparer.__FullWidth(data_valid[col].dtype)
+                if dtype == data_test[col].dtype:
+                    continue
+                try:
+                    data_test[col] = data_test[col].astype(dtype)
+                except (TypeError, ValueError):
+                    pass
+        return data_test
+
+    @classmethod
+    def __ParallelCompare(cls, data_test, data_valid, ignoreCols, pKey, workers):
+        """
+        * Split both datasets into one partition per worker using hash of 
+        primary key(s) (or entire row if no primary key), compare partitions
+        in process pool and merge the results. If processes can be forked, 
+        workers inherit both datasets and are only sent row positions of their 
+        partition, otherwise partitions are pickled to workers.
+        """
+        hashCols = DataComparer.__HashColumns(data_test.columns, data_valid.columns, ignoreCols, pKey)
+        empty, missingColsMsg = DataComparer.__Compare(data_test.iloc[:0], data_valid.iloc[:0], ignoreCols, pKey)
+        if 'fork' in get_all_start_methods():
+            testNums = DataComparer.__PartitionNumbers(data_test, hashCols, workers, 0, data_valid)
+            validNums = DataComparer.__PartitionNumbers(data_valid, hashCols, workers, 0, data_valid)
+            testRows = [np.flatnonzero(testNums == part) for part in range(workers)]
+            validRows = [np.flatnonzero(validNums == part) for part in range(workers)]
+            DataComparer.__shared = (data_test, data_valid)
+            try:
+                with ProcessPoolExecutor(max_workers = workers, mp_context = get_context('fork')) as pool:
+                    results = list(pool.map(DataComparer._Worker, repeat('__CompareRows'), testRows, validRows, repeat(ignoreCols), repeat(pKey)))
+            finally:
+                DataComparer.__shared = None
         else:
-            # Compare rows as they appear in descending order:
-            test_tuples = set(data_test.itertuples())
-            valid_tuples = set(data_valid.itertuples())
-            diff = valid_tuples - test_tuples
-            df = DataFrame(diff)
-        # Reorder columns to match original order:
-        df = df[columnOrder].rename(columns = colMap)
-        return df, missingColsMsg
+            testParts = DataComparer.__SplitPartitions(data_test, hashCols, workers, data_valid)
+            validParts = DataComparer.__SplitPartitions(data_valid, hashCols, workers, data_valid)
+            with ProcessPoolExecutor(max_workers = workers) as pool:
+                results = list(pool.map(DataComparer._Worker, repeat('__Compare'), testParts, validParts, repeat(ignoreCols), repeat(pKey)))
+        diffs = [empty]
+        diffs.extend([diff for diff, msg in results])
+        return DataComparer.__MergeDiffs(diffs, hashCols), missingColsMsg
+
+    @classmethod
+    def __CompareRows(cls, testRows, validRows, ignoreCols, pKey):
+        """
+        * Compare rows at positions in datasets inherited from
+        parent process.
+        """
+        data_test, data_valid = DataComparer.__shared
+        return DataComparer.__Compare(data_test.iloc[testRows], data_valid.iloc[validRows], ignoreCols, pKey)
+
+    @classmethod
+    def __SplitPartitions(cls, data, hashCols, numParts, validHead):
+        """
+        * Return list of numParts DataFrames, assigning rows to partitions
+        based upon hash of hashCols.
+        """
+        partNums = DataComparer.__PartitionNumbers(data, hashCols, numParts, 0, validHead)
+        parts = { int(part) : piece for part, piece in data.groupby(partNums, sort = False) }
+        return [parts[part] if part in parts else data.iloc[:0] for part in range(numParts)]
+
+    @staticmethod
+    def __PartitionNumbers(data, hashCols, numParts, level, validHead):
+        """
+        * Return array assigning each row to a partition based upon hash of
+        (lowercase) hashCols. Each level uses different digits of the hash.
+        Columns are converted to dtypes of validHead (empty DataFrame with 
+        valid columns) as when comparing, so that matching keys are assigned 
+        to same partition in both datasets and in every chunk.
+        """
+        colMap = { col.lower() : col for col in data.columns }
+        keys = data[[colMap[col] for col in hashCols]].copy()
+        keys.columns = hashCols
+        validHead = validHead.rename(columns = { col : col.lower() for col in validHead.columns })
+        keys = DataComparer.__MatchDTypes(keys, validHead)
+        hashes = DataFrame({ col : DataComparer.__KeyHashes(keys[col]) for col in hashCols })
+        hashes = hash_pandas_object(hashes, index = False).to_numpy()
+        return (hashes // np.uint64(numParts ** level)) % np.uint64(numParts)
+
+    @staticmethod
+    def __KeyHashes(column):
+        """
+        * Return 64-bit hash of each value, hashing by value so that values that
+        match after converting dtypes hash identically: numbers (and numeric strings) 
+        as floats, dates as integers and all other values as strings.
+        """
+        if isinstance(column.dtype, CategoricalDtype):
+            column = column.astype(column.dtype.categories.dtype)
+        if is_datetime64_any_dtype(column.dtype):
+            return hash_pandas_object(Series(column.to_numpy(dtype = 'datetime64[ns]').view(np.int64)), index = False).to_numpy()
+        elif is_numeric_dtype(column.dtype) or is_bool_dtype(column.dtype):
+            return hash_pandas_object(Series(column.to_numpy(dtype = np.float64, na_value = np.nan)), index = False).to_numpy()
+        numbers = to_numeric(column, errors = 'coerce').astype(np.float64)
+        isNumber = numbers.notna().to_numpy()
+        # Nulls are compared as empty strings:
+        hashes = hash_pandas_object(column.fillna('').astype(str), index = False).to_numpy()
+        if isNumber.any():
+            hashes[isNumber] = hash_pandas_object(numbers[isNumber], index = False).to_numpy()
+        return hashes
+
+    @classmethod
+    def __PartitionHash(cls, data, settings):
+        """
+        * Return SHA-256 hash string of comparison settings, column names and 
+        dtypes, and sorted row hashes of partition, so that hash does not depend 
+        upon row order but changes if any row is changed, added or duplicated.
+        """
+        hasher = hashlib.sha256(json.dumps(settings, sort_keys = True).encode())
+        hasher.update(json.dumps([[col, str(data[col].dtype)] for col in data.columns]).encode())
+        hasher.update(np.sort(DataComparer.__RowHashes(data)).tobytes())
+        return hasher.hexdigest()
+
+    @staticmethod
+    def __MergeDiffs(diffs, sortKeys):
+        """
+        * Combine partial results in order of (lowercase) sortKeys.
+        """
+        return ComparisonResult.Concat(diffs, sortKeys)
+
+    @classmethod
+    def __StreamCompare(cls, testChunks, validChunks, ignoreCols, pKey, presorted):
+        """
+        * Merge join key ordered chunks from both datasets, comparing
+        rows up to the smallest last key held in memory at a time.
+        """
+        testChunks, testHead = DataComparer.__AsChunks(testChunks, None)
+        validChunks, validHead = DataComparer.__AsChunks(validChunks, None)
+        testCols, validCols = list(testHead.columns), list(validHead.columns)
+        # Columns of the result and missing columns only depend upon column names:
+        empty, missingColsMsg = DataComparer.__Compare(DataFrame(columns = testCols), DataFrame(columns = validCols), ignoreCols, pKey)
+        diffs = [empty]
+        streams = [testChunks, validChunks]
+        buffers = [DataFrame(columns = testCols), DataFrame(columns = validCols)]
+        lastKeys = [None, None]
+        done = [False, False]
+        while True:
+            for num in range(2):
+                while not done[num] and len(buffers[num]) == 0:
+                    buffers[num], lastKeys[num], done[num] = DataComparer.__NextChunk(streams[num], buffers[num], pKey, lastKeys[num], presorted[num])
+            # Remaining valid rows cannot generate differences:
+            if done[0] and len(buffers[0]) == 0:
+                break
+            frontiers = [lastKeys[num] for num in range(2) if not done[num]]
+            if frontiers:
+                # Rows with keys below frontier cannot appear in later chunks:
+                frontier = min(frontiers)
+                masks = [ExternalSorter.LessThan(buffer, pKey, frontier) for buffer in buffers]
+                if not any([mask.any() for mask in masks]):
+                    # Window must be extended to include all rows with frontier key:
+                    num = [num for num in range(2) if not done[num] and lastKeys[num] == frontier][0]
+                    buffers[num], lastKeys[num], done[num] = DataComparer.__NextChunk(streams[num], buffers[num], pKey, lastKeys[num], presorted[num])
+                    continue
+            else:
+                masks = [np.ones(len(buffer), dtype = bool) for buffer in buffers]
+            windows = [buffer[mask] for buffer, mask in zip(buffers, masks)]
+            buffers = [buffer[~mask] for buffer, mask in zip(buffers, masks)]
+            if len(windows[0]):
+                diffs.append(DataComparer.__Compare(windows[0], windows[1], ignoreCols, pKey)[0])
+        return ComparisonResult.Concat(diffs), missingColsMsg
+
+    @staticmethod
+    def __NextChunk(stream, buffer, pKey, lastKey, verify):
+        """
+        * Append next chunk in stream to buffer. Returns (buffer, lastKey, done).
+        """
+        chunk = next(stream, None)
+        if chunk is None:
+            return buffer, lastKey, True
+        if len(chunk) == 0:
+            return buffer, lastKey, False
+        if verify and not ExternalSorter.IsSorted(chunk, pKey, lastKey):
+            raise Exception('Presorted dataset is not in ascending order of %s.' % ','.join(pKey))
+        buffer = chunk if len(buffer) == 0 else concat([buffer, chunk], ignore_index = True)
+        return buffer, ExternalSorter.LastKey(chunk, pKey), False
+
+    @classmethod
+    def __StratifiedSample(cls, data, keys, sampleSize, seed):
+        """
+        * Return sample of exactly sampleSize unique key rows, drawn 
+        proportionally from equally sized ranges of sorted key values so 
+        that sample spans key range. Samples rows at random if keys
+        cannot be sorted.
+        """
+        colMap = { col.lower() : col for col in data.columns }
+        keyCols = [colMap[key] for key in keys]
+        data = data[~data.duplicated(keyCols)]
+        if len(data) <= sampleSize:
+            return data
+        random = np.random.default_rng(seed)
+        try:
+            order = data[keyCols].reset_index(drop = True).sort_values(keyCols, kind = 'stable').index.to_numpy()
+            strata = np.array_split(order, DataComparer.__sampleStrata)
+        except TypeError:
+            strata = [np.arange(len(data))]
+        # Allocate sample proportionally to strata, giving remaining rows to largest remainders:
+        quotas = np.array([len(stratum) for stratum in strata]) * sampleSize / len(data)
+        counts = np.floor(quotas).astype(int)
+        counts[np.argsort(counts - quotas, kind = 'stable')[:sampleSize - counts.sum()]] += 1
+        positions = np.concatenate([random.choice(stratum, count, replace = False) for stratum, count in zip(strata, counts)])
+        return data.iloc[np.sort(positions)]
+
+    @classmethod
+    def __EstimateRates(cls, result, data_test, sample, keys, confidence):
+        """
+        * Return DataFrame containing mismatch counts, rates and Wilson
+        score confidence intervals for missing rows and each column.
+        """
+        data_test = data_test.rename(columns = { col : col.lower() for col in data_test.columns })
+        sample = sample.rename(columns = { col : col.lower() for col in sample.columns })
+        # Sampled keys not returned from test dataset are missing rows:
+        testKeys = DataComparer.__MatchDTypes(data_test[keys], sample[keys])
+        hasMatch = MultiIndex.from_frame(sample[keys]).isin(MultiIndex.from_frame(testKeys))
+        numMatched = int(hasMatch.sum())
+        rows = [('Missing Rows', len(sample), len(sample) - numMatched)]
+        numDiffering, colCounts = result.MatchedCounts()
+        rows.append(('Any Column', numMatched, numDiffering))
+        for col, count in colCounts.items():
+            rows.append((col, numMatched, count))
+        z = NormalDist().inv_cdf((1 + confidence) / 2)
+        estimates = []
+        for name, trials, mismatches in rows:
+            # Duplicate test rows for a key can produce multiple differences:
+            mismatches = min(mismatches, trials)
+            rate = mismatches / trials if trials else 0
+            lower, upper = DataComparer.__WilsonInterval(mismatches, trials, z)
+            estimates.append((name, trials, mismatches, rate, lower, upper))
+        return DataFrame(estimates, columns = ['Column', 'Sampled Rows', 'Mismatches', 'Estimated Rate', 'Lower Bound', 'Upper Bound'])
+
+    @staticmethod
+    def __WilsonInterval(successes, trials, z):
+        """
+        * Return (lower, upper) Wilson score interval for binomial proportion.
+        """
+        if trials == 0:
+            return 0.0, 1.0
+        elif successes == 0:
+            return 0.0, z ** 2 / (trials + z ** 2)
+        rate = successes / trials
+        denom = 1 + z ** 2 / trials
+        center = (rate + z ** 2 / (2 * trials)) / denom
+        spread = z * np.sqrt(rate * (1 - rate) / trials + z ** 2 / (4 * trials ** 2)) / denom
+        return max(0.0, center - spread), min(1.0, center + spread)
 
     @classmethod
-    def __Validate(cls, reportPath, data_test, data_valid, ignoreCols, pKey):
+    def __PartitionedCompare(cls, data_test, data_valid, ignoreCols, pKey, memoryBudget, spillFolder, workers):
+        """
+        * Hash partition both datasets by primary key(s) (or by entire row if no
+        primary key) into spill files, compare one partition at a time and merge
+        the results.
+        """
+        testChunks, testHead = DataComparer.__AsChunks(data_test, memoryBudget)
+        validChunks, validHead = DataComparer.__AsChunks(data_valid, memoryBudget)
+        testCols, validCols = list(testHead.columns), list(validHead.columns)
+        hashCols = DataComparer.__HashColumns(testCols, validCols, ignoreCols, pKey)
+        folder = mkdtemp(prefix = 'DataComparer_', dir = spillFolder)
+        try:
+            testParts = DataComparer.__Spill(testChunks, hashCols, folder, 'test', 0, validHead)
+            validParts = DataComparer.__Spill(validChunks, hashCols, folder, 'valid', 0, validHead)
+            # Columns of the result and missing columns only depend upon column names:
+            empty, missingColsMsg = DataComparer.__Compare(DataFrame(columns = testCols), DataFrame(columns = validCols), ignoreCols, pKey)
+            diffs = [empty]
+            parts = range(DataComparer.__spillPartitions)
+            args = ([testParts[part] for part in parts], [validParts[part] for part in parts], repeat(testCols), repeat(validHead), repeat(hashCols), 
+                    repeat(ignoreCols), repeat(pKey), repeat(memoryBudget / workers), repeat(folder), [str(part) for part in parts], repeat(1))
+            if workers == 1:
+                results = map(DataComparer.__ComparePartition, *args)
+            else:
+                # Each worker compares one spilled partition at a time:
+                with ProcessPoolExecutor(max_workers = workers) as pool:
+                    results = list(pool.map(DataComparer._Worker, repeat('__ComparePartition'), *args))
+            for result in results:
+                diffs.extend(result)
+            return DataComparer.__MergeDiffs(diffs, hashCols), missingColsMsg
+        finally:
+            rmtree(folder, ignore_errors = True)
+
+    @classmethod
+    def __ComparePartition(cls, testFiles, validFiles, testCols, validHead, hashCols, ignoreCols, pKey, memoryBudget, folder, tag, level):
+        """
+        * Compare single spilled partition, splitting partition further
+        if it will not fit within the memory budget.
+        """
+        # Skip partitions that cannot contain reportable differences (test rows
+        # if comparing by primary key, otherwise valid rows):
+        files = testFiles if not pKey is None else validFiles
+        if not files:
+            return []
+        size = sum([nbytes for path, nbytes in testFiles + validFiles])
+        if size * DataComparer.__memoryFactor > memoryBudget and level <= DataComparer.__maxSpillLevel:
+            testParts = DataComparer.__Spill(DataComparer.__LoadEach(testFiles), hashCols, folder, 'test_' + tag, level, validHead)
+            validParts = DataComparer.__Spill(DataComparer.__LoadEach(validFiles), hashCols, folder, 'valid_' + tag, level, validHead)
+            diffs = []
+            for part in range(DataComparer.__spillPartitions):
+                args = (testParts[part], validParts[part], testCols, validHead, hashCols, ignoreCols, pKey, memoryBudget, folder, '%s_%d' % (tag, part), level + 1)
+                diffs.extend(DataComparer.__ComparePartition(*args))
+            return diffs
+        data_test = DataComparer.__Load(testFiles, testCols)
+        data_valid = DataComparer.__Load(validFiles, list(validHead.columns))
+        return [DataComparer.__Compare(data_test, data_valid, ignoreCols, pKey)[0]]
+
+    @classmethod
+    def __AsChunks(cls, data, memoryBudget):
+        """
+        * Return iterable of DataFrame chunks that each fit within
+        memory budget, and empty DataFrame with columns and dtypes of 
+        the (first chunk of) dataset.
+        """
+        if isinstance(data, DataFrame):
+            rowBytes = data.head(1000).memory_usage(deep = True).sum() / max(min(len(data), 1000), 1)
+            rows = max(1, int(memoryBudget / (max(rowBytes, 1) * DataComparer.__memoryFactor)))
+            return (data.iloc[start:start + rows] for start in range(0, len(data), rows)), data.iloc[:0]
+        chunks = iter(data)
+        first = next(chunks, None)
+        if first is None:
+            raise Exception('Dataset does not contain any chunks.')
+        return chain([first], chunks), first.iloc[:0]
+
+    @classmethod
+    def __HashColumns(cls, testCols, validCols, ignoreCols, pKey):
+        """
+        * Return (lowercase) columns used to assign rows to partitions.
+        """
+        if not pKey is None:
+            return [pKey.lower()] if isinstance(pKey, str) else [key.lower() for key in pKey]
+        ignore = set() if ignoreCols is None else set([col.lower() for col in ignoreCols])
+        validCols = set([col.lower() for col in validCols])
+        return sorted([col.lower() for col in testCols if col.lower() in validCols and not col.lower() in ignore])
+
+    @classmethod
+    def __Spill(cls, chunks, hashCols, folder, tag, level, validHead):
+        """
+        * Write rows in each chunk to spill files based upon hash of hashCols
+        converted to dtypes of validHead. Returns { Partition -> [(Path, NumBytes)] }.
+        """
+        numParts = DataComparer.__spillPartitions
+        parts = { part : [] for part in range(numParts) }
+        for chunkNum, chunk in enumerate(chunks):
+            if len(chunk) == 0:
+                continue
+            partNums = DataComparer.__PartitionNumbers(chunk, hashCols, numParts, level, validHead)
+            for part, piece in chunk.groupby(partNums, sort = False):
+                path = os.path.join(folder, '%s_%d_%d_%d.pkl' % (tag, level, part, chunkNum))
+                piece.to_pickle(path)
+                parts[int(part)].append((path, int(piece.memory_usage(deep = True).sum())))
+        return parts
+
+    @staticmethod
+    def __LoadEach(files):
+        """
+        * Yield each spill file, removing file after it has been read.
+        """
+        for path, nbytes in files:
+            piece = read_pickle(path)
+            os.remove(path)
+            yield piece
+
+    @staticmethod
+    def __Load(files, columns):
+        """
+        * Load all spill files for single partition into one DataFrame.
+        """
+        if not files:
+            return DataFrame(columns = columns)
+        return concat([read_pickle(path) for path, nbytes in files], ignore_index = True)
+
+    @classmethod
+    def __ValidateStreaming(cls, reportPath, data_test, data_valid, pKey, ignoreCols, presorted, spillFolder):
+        """
+        * Validate parameters for GenerateStreamingReport().
+        """
+        errs = []
+        if pKey is None:
+            errs.append('pKey must be provided.')
+        if not (isinstance(presorted, tuple) and len(presorted) == 2 and all([isinstance(val, bool) for val in presorted])):
+            errs.append('presorted must be a tuple of two booleans.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        # Remaining parameters are validated as out-of-core comparison:
+        DataComparer.__Validate(reportPath, data_test, data_valid, ignoreCols, pKey, 1, spillFolder, None)
+
+    @classmethod
+    def __ValidateSample(cls, reportPath, data_valid, fetchTest, pKey, ignoreCols, sampleSize, confidence, seed):
+        """
+        * Validate parameters for GenerateSampleReport().
+        """
+        errs = []
+        if pKey is None:
+            errs.append('pKey must be provided.')
+        if not callable(fetchTest):
+            errs.append('fetchTest must be callable.')
+        if not isinstance(sampleSize, int):
+            errs.append('sampleSize must be an integer.')
+        elif sampleSize <= 0:
+            errs.append('sampleSize must be positive.')
+        if not isinstance(confidence, float):
+            errs.append('confidence must be a float.')
+        elif not 0 < confidence < 1:
+            errs.append('confidence must be between 0 and 1.')
+        if not seed is None and not isinstance(seed, int):
+            errs.append('seed must be an integer if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        # Test data is fetched later, so validate valid data against itself:
+        DataComparer.__Validate(reportPath, data_valid, data_valid, ignoreCols, pKey, None, None, None)
+
+    @classmethod
+    def __Validate(cls, reportPath, data_test, data_valid, ignoreCols, pKey, memoryBudget, spillFolder, workers):
         """
         * Validate parameters for main function.
         """
@@ -166,10 +841,26 @@ class DataComparer(object):
             errs.append('reportPath must be a string.')
         elif not reportPath.endswith('.xlsx'):
             errs.append('reportPath must point to xlsx file.')
-        if not isinstance(data_test, DataFrame):
-            errs.append('data_test must be a DataFrame.')
-        if not isinstance(data_valid, DataFrame):
-            errs.append('data_valid must be a DataFrame.')
+        if not memoryBudget is None:
+            if not isinstance(memoryBudget, (int, float)):
+                errs.append('memoryBudget must be numeric if provided.')
+            elif memoryBudget <= 0:
+                errs.append('memoryBudget must be positive if provided.')
+            if not isinstance(data_test, DataFrame) and not hasattr(data_test, '__iter__'):
+                errs.append('data_test must be a DataFrame or an iterable of DataFrames.')
+            if not isinstance(data_valid, DataFrame) and not hasattr(data_valid, '__iter__'):
+                errs.append('data_valid must be a DataFrame or an iterable of DataFrames.')
+        else:
+            if not isinstance(data_test, DataFrame):
+                errs.append('data_test must be a DataFrame.')
+            if not isinstance(data_valid, DataFrame):
+                errs.append('data_valid must be a DataFrame.')
+        if not spillFolder is None and not (isinstance(spillFolder, str) and os.path.isdir(spillFolder)):
+            errs.append('spillFolder must point to an existing folder if provided.')
+        if not workers is None and not isinstance(workers, int):
+            errs.append('workers must be an integer if provided.')
+        elif not workers is None and workers < 1:
+            errs.append('workers must be positive if provided.')
         if not ignoreCols is None and not hasattr(ignoreCols, '__iter__'):
             errs.append('ignoreCols must be an iterable of strings if provided.')
         elif not ignoreCols is None and any([not isinstance(val, str) for val in ignoreCols]):
@@ -4,17 +4,34 @@
 # Description:
 # * Convert data in format into pandas DataFrame.
 
-import dateutil.parser as dtparser
+from importlib.util import find_spec
+from itertools import islice
 import numpy as np
-from pandas import DataFrame, isnull, read_csv, read_excel
-import re
+from openpyxl import load_workbook
+from pandas import concat, DataFrame, ExcelFile, factorize, isnull, read_csv, read_excel, Series, to_datetime, to_numeric
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_float_dtype, is_integer_dtype, is_numeric_dtype, is_object_dtype, is_string_dtype
+from pandas.errors import EmptyDataError, OutOfBoundsDatetime
 import os
-from DynamicETL_Dashboard.Utilities.Helpers import IsNumeric, StringIsDT
+from Utilities.CacheBuilder import CacheBuilder
+import warnings
 
 class DataReader:
     """
     * Encapsulate how data is read.
     """
+    # For type inference:
+    __promotions = ['int64', 'float64', 'datetime64[ns]']
+    __sampleRows = 1000
+    # Convert strings to categoricals if at most this fraction of values are distinct:
+    __categoryRatio = 0.5
+    # Optional cache of parsed files. Increment version when parsing or type 
+    # inference changes so that cached files are read again:
+    __cache = None
+    __readerVersion = 2
+    # Use multithreaded pyarrow csv parser for files at least this size, if installed:
+    __engines = ['c', 'python', 'pyarrow']
+    __hasPyarrow = not find_spec('pyarrow') is None
+    __pyarrowBytes = 64 * 1024 ** 2
     def __init__(self):
         """
         * Instantiate empty object.
@@ -24,7 +41,7 @@ class DataReader:
     # Interface Methods:
     ####################
     @staticmethod
-    def Read(path, sheetName = None, delim = None):
+    def Read(path, sheetName = None, delim = None, engine = None, compact = False):
         """
         * Return pandas dataframe from data at path.
         Inputs:
@@ -32,9 +49,159 @@ class DataReader:
         Optional:
         * sheetName: Sheet name in xls type file to read.
         * delim: Delimiter if reading delimited file.
+        * engine: Parser used for delimited file ('c', 'python' or 'pyarrow'). 
+        Chosen based upon file size if not provided.
+        * compact: Put True to reduce memory used by data (see Compact()).
         """
         DataReader.__Validate(path, sheetName, delim)
-        return DataReader.__ReadData(path, sheetName, delim)
+        DataReader.__ValidateEngine(engine)
+        if not isinstance(compact, bool):
+            raise Exception('compact must be a boolean.')
+        if DataReader.__cache is None:
+            data = DataReader.__ReadData(path, sheetName, delim, engine)
+        else:
+            data = DataReader.__cache.Load(path, lambda : DataReader.__ReadData(path, sheetName, delim, engine), delim, sheetName, engine = engine, pyarrow = DataReader.__hasPyarrow, version = DataReader.__readerVersion)
+        if compact:
+            DataReader.Compact(data)
+        return data
+
+    @staticmethod
+    def Compact(data, categoryRatio = None):
+        """
+        * Reduce memory used by data in place, converting low cardinality 
+        string columns to categoricals and downcasting integer and float columns 
+        to narrowest width that holds every value exactly. Returns DataFrame 
+        containing (Column, Type Before, Type After, Bytes Before, Bytes After, Bytes Saved)
+        for each column.
+        Inputs:
+        * data: DataFrame.
+        Optional:
+        * categoryRatio: Maximum fraction of distinct values for string column 
+        to be converted to categorical. Uses 0.5 if not provided.
+        """
+        errs = []
+        if not isinstance(data, DataFrame):
+            errs.append('data must be a DataFrame.')
+        if categoryRatio is None:
+            categoryRatio = DataReader.__categoryRatio
+        elif not isinstance(categoryRatio, (int, float)):
+            errs.append('categoryRatio must be numeric if provided.')
+        elif not 0 <= categoryRatio <= 1:
+            errs.append('categoryRatio must be between 0 and 1 if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        report = []
+        for col in data.columns:
+            before = data[col].memory_usage(index = False, deep = True)
+            typeBefore = str(data[col].dtype)
+            converted = DataReader.__CompactColumn(data[col], categoryRatio)
+            if not converted is None:
+                data[col] = converted
+            after = data[col].memory_usage(index = False, deep = True)
+            report.append((col, typeBefore, str(data[col].dtype), before, after, before - after))
+        return DataFrame(report, columns = ['Column', 'Type Before', 'Type After', 'Bytes Before', 'Bytes After', 'Bytes Saved'])
+
+    @staticmethod
+    def ReadCsv(path, delim = None, skiprows = None, encoding = None, engine = None, **kwargs):
+        """
+        * Return unconverted pandas dataframe from delimited file at path, 
+        using multithreaded pyarrow parser for large files if installed
+        and options are supported, and default c parser otherwise.
+        Inputs:
+        * path: path to delimited file.
+        Optional:
+        * delim: Delimiter. Uses ',' if not provided.
+        * skiprows: Number of rows (or list of row numbers) to skip at start of file.
+        * encoding: File encoding.
+        * engine: Parser to use ('c', 'python' or 'pyarrow'). Chosen based 
+        upon file size if not provided.
+        * kwargs: Other arguments passed to pandas.read_csv().
+        """
+        DataReader.__ValidateEngine(engine)
+        delim = ',' if delim is None else delim
+        if engine is None:
+            engine = DataReader.__CsvEngine(path, delim, skiprows, kwargs)
+        elif engine == 'pyarrow' and not DataReader.__hasPyarrow:
+            raise Exception('pyarrow must be installed to use pyarrow engine.')
+        return read_csv(path, delimiter = delim, skiprows = skiprows, encoding = encoding, engine = engine, **kwargs)
+
+    @staticmethod
+    def ReadSheets(path, sheetNames = None, skiprows = None):
+        """
+        * Return { SheetName -> unconverted pandas dataframe } for sheets in
+        workbook at path, opening workbook once (in read only mode for xlsx files) 
+        and parsing all sheets in single pass.
+        Inputs:
+        * path: path to xls/xlsx file.
+        Optional:
+        * sheetNames: List of sheet names (or sheet numbers) to read. Reads all sheets 
+        if not provided.
+        * skiprows: Number of rows (or list of row numbers) to skip at start of each sheet.
+        """
+        errs = []
+        if not isinstance(path, str):
+            errs.append('path must be a string.')
+        elif not path.endswith('.xls') and not path.endswith('.xlsx'):
+            errs.append('path must point to xls/xlsx file.')
+        elif not os.path.isfile(path):
+            errs.append('path must point to file.')
+        if not sheetNames is None and not isinstance(sheetNames, list):
+            errs.append('sheetNames must be a list if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        with ExcelFile(path) as workbook:
+            sheetNames = workbook.sheet_names if sheetNames is None else sheetNames
+            return { sheet : workbook.parse(sheet, skiprows = skiprows) for sheet in sheetNames }
+
+    @staticmethod
+    def EnableCache(folder, maxBytes = 2 * 1024 ** 3):
+        """
+        * Store converted data in folder after files are read, so that
+        later Read() calls on unmodified files with same options load 
+        cached data instead of parsing file.
+        Inputs:
+        * folder: Existing folder to store cached data in.
+        Optional:
+        * maxBytes: Maximum total size of cached data in bytes. Least 
+        recently read files are removed when exceeded.
+        """
+        DataReader.__cache = CacheBuilder(folder, maxBytes)
+
+    @staticmethod
+    def DisableCache():
+        """
+        * Stop using cached data.
+        """
+        DataReader.__cache = None
+
+    @staticmethod
+    def ReadChunks(path, chunkRows = 100000, sheetName = None, delim = None, schema = None):
+        """
+        * Yield pandas dataframes containing up to chunkRows rows of data at path
+        without loading entire file. Column types are inferred from first chunk and
+        applied to later chunks, promoting type (int64 -> float64 -> datetime64 -> string)
+        if a later chunk contains values that do not fit.
+        Inputs:
+        * path: path to file.
+        Optional:
+        * chunkRows: Maximum number of rows in each chunk.
+        * sheetName: Sheet name in xls type file to read.
+        * delim: Delimiter if reading delimited file.
+        * schema: { Column -> dtype string } to apply to all chunks instead of inferring
+        from first chunk (ex: dtypes of last chunk from a previous read), so that all 
+        chunks have same types unless values do not fit.
+        """
+        DataReader.__Validate(path, sheetName, delim)
+        errs = []
+        if not isinstance(chunkRows, int):
+            errs.append('chunkRows must be an integer.')
+        elif chunkRows <= 0:
+            errs.append('chunkRows must be positive.')
+        if not schema is None and not isinstance(schema, dict):
+            errs.append('schema must be a dictionary if provided.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        return DataReader.__ReadChunks(path, chunkRows, sheetName, delim, schema)
 
     ####################
     # Private Helpers:
@@ -56,65 +223,268 @@ class DataReader:
             raise Exception('\n'.join(errs))
 
     @staticmethod
-    def __ReadData(path, sheetName, delim):
+    def __ValidateEngine(engine):
+        if not engine is None and not engine in DataReader.__engines:
+            raise Exception('engine must be one of %s if provided.' % ', '.join(DataReader.__engines))
+
+    @staticmethod
+    def __CsvEngine(path, delim, skiprows, kwargs):
+        """
+        * Return pyarrow if installed, file is large and read options 
+        are supported by pyarrow parser, else c.
+        """
+        if not DataReader.__hasPyarrow or os.path.getsize(path) < DataReader.__pyarrowBytes:
+            return 'c'
+        elif len(delim) != 1 or not (skiprows is None or isinstance(skiprows, int)):
+            # pyarrow parser only supports single character delimiters and skipping leading rows:
+            return 'c'
+        elif any([not arg in ['dtype', 'usecols'] for arg in kwargs]):
+            return 'c'
+        return 'pyarrow'
+
+    @staticmethod
+    def __ReadData(path, sheetName, delim, engine):
         """
         * Read data at path.
         """
         if path.endswith('.csv'):
-            data = read_csv(path, delimiter = (',' if delim is None else delim))
+            data = DataReader.ReadCsv(path, delim, engine = engine)
         elif path.endswith('.xls') or path.endswith('.xlsx'):
-            data = read_excel(path, sheet_name = (0 if sheetName is None else sheetName ))
+            sheetName = 0 if sheetName is None else sheetName
+            data = DataReader.ReadSheets(path, [sheetName])[sheetName]
         else:
             ext = os.path.split(path)
             raise Exception('%s extension is invalid.' % ext)
         # Convert data into suitable types:
         return DataReader.__ConvertAll(data)
 
+    @staticmethod
+    def __ReadChunks(path, chunkRows, sheetName, delim, schema):
+        """
+        * Yield chunks of data at path converted to schema.
+        """
+        schema = {} if schema is None else dict(schema)
+        for chunk in DataReader.__RawChunks(path, chunkRows, sheetName, delim):
+            for col in chunk.columns:
+                converted, dtype = DataReader.__InferType(chunk[col], schema.get(col))
+                if not converted is None:
+                    chunk[col] = converted
+                # Keep widest type for later chunks, unless no values were present:
+                if chunk[col].notna().any():
+                    schema[col] = 'object' if dtype is None else dtype
+            yield chunk
+
+    @staticmethod
+    def __RawChunks(path, chunkRows, sheetName, delim):
+        """
+        * Yield chunks of unconverted data at path.
+        """
+        if path.endswith('.csv'):
+            # Read values as text so that types are only determined by schema:
+            try:
+                reader = read_csv(path, delimiter = (',' if delim is None else delim), dtype = str, chunksize = chunkRows)
+            except EmptyDataError:
+                # File without header or rows has no chunks:
+                return
+            for chunk in reader:
+                yield chunk
+        elif path.endswith('.xlsx'):
+            wb = load_workbook(path, read_only = True, data_only = True)
+            try:
+                sheet = wb[sheetName] if not sheetName is None else wb.worksheets[0]
+                rows = sheet.iter_rows(values_only = True)
+                header = next(rows, None)
+                if header is None:
+                    return
+                while True:
+                    chunk = list(islice(rows, chunkRows))
+                    if not chunk:
+                        break
+                    yield DataFrame(chunk, columns = list(header), dtype = object)
+            finally:
+                wb.close()
+        elif path.endswith('.xls'):
+            # Legacy workbooks cannot be streamed:
+            data = read_excel(path, sheet_name = (0 if sheetName is None else sheetName))
+            for start in range(0, len(data), chunkRows):
+                yield data.iloc[start:start + chunkRows].copy()
+        else:
+            ext = os.path.split(path)
+            raise Exception('%s extension is invalid.' % ext)
+
+    @staticmethod
+    def __CompactColumn(series, categoryRatio):
+        """
+        * Return column converted to more compact type, or None
+        if column cannot be compacted.
+        """
+        if is_bool_dtype(series) or len(series) == 0:
+            return None
+        elif is_integer_dtype(series):
+            converted = to_numeric(series, downcast = 'integer')
+        elif is_float_dtype(series) and series.dtype.itemsize > 4:
+            converted = series.astype('float32')
+            # Only downcast if every value is unchanged:
+            if not ((converted.astype(series.dtype) == series) | series.isna()).all():
+                return None
+        elif is_object_dtype(series) or is_string_dtype(series):
+            if series.nunique() > categoryRatio * len(series):
+                return None
+            converted = series.astype('category')
+        else:
+            return None
+        return converted if converted.dtype != series.dtype else None
+
     @staticmethod
     def __ConvertAll(data):
         """
         * Convert all columns into most appropriate type.
         """
         for col in data.columns:
-            if DataReader.__IsInt(data[col]):
-                data[col] = data[col].astype('int64')
-            elif DataReader.__IsFloat(data[col]):
-                data[col] = data[col].astype('float64')
-            elif DataReader.__IsDT(data[col]):
-                data[col] = data[col].astype('datetime64')
+            converted, dtype = DataReader.__InferType(data[col])
+            if not converted is None:
+                data[col] = converted
         return data
 
     @staticmethod
-    def __IsInt(series):
+    def __InferType(series, dtype = None):
+        """
+        * Infer narrowest type that values in a bounded sample of column fit
+        (or start at dtype if provided), then verify entire column in one vectorized 
+        pass, promoting type (int64 -> float64 -> datetime64 -> string) when values 
+        do not fit. Returns (converted column, dtype), with None as converted column
+        if column should not be converted and None as dtype if column is a string.
+        """
+        notNull = series.notna().to_numpy()
+        if is_bool_dtype(series):
+            return None, str(series.dtype)
+        elif not notNull.any():
+            return (None, None) if not dtype in DataReader.__promotions else (series.astype(dtype if dtype != 'int64' else 'float64'), dtype)
+        elif is_numeric_dtype(series) and not dtype in ['datetime64[ns]', 'object']:
+            # Parsed numeric columns keep their numeric type, unless integers (ex: uint64) 
+            # do not fit int64, which float64 cannot hold exactly either:
+            if is_integer_dtype(series) and not DataReader.__FitsInt64(series):
+                return series.astype(str), None
+            elif is_integer_dtype(series) and dtype != 'float64':
+                return series.astype('int64'), 'int64'
+            return series.astype('float64'), 'float64'
+        elif is_datetime64_any_dtype(series):
+            return series, str(series.dtype)
+        elif dtype in DataReader.__promotions:
+            series = series.astype(object)
+        elif not dtype is None:
+            # Strings cannot be promoted further:
+            return None, None
+        values = series[notNull]
+        if dtype is None:
+            dtype = DataReader.__SampleType(DataReader.__Sample(values))
+            if dtype is None:
+                # Sampled strings cannot be promoted further:
+                return DataReader.__Strings(series, notNull)
+        # Only coerce each distinct value once:
+        codes, uniques = factorize(values)
+        strings = Series(uniques, dtype = object).astype(str)
+        for dtype in DataReader.__promotions[DataReader.__promotions.index(dtype):]:
+            converted = DataReader.__Coerce(strings, dtype)
+            if not converted is None:
+                break
+        else:
+            return DataReader.__Strings(series, notNull)
+        if dtype == 'int64' and notNull.all():
+            return Series(converted.astype('int64').to_numpy()[codes], index = series.index), dtype
+        elif dtype != 'datetime64[ns]':
+            converted, dtype = converted.astype('float64'), 'float64'
+        elif getattr(converted.dt, 'tz', None) is None:
+            converted = converted.astype('datetime64[ns]')
+        return DataReader.__Expand(converted, codes, notNull, series.index), dtype
+
+    @staticmethod
+    def __Strings(series, notNull):
+        """
+        * Return (None, None) if column holds strings, else column converted to
+        strings (ex: integers outside int64 range parsed as objects).
+        """
+        if is_string_dtype(series[notNull]):
+            return None, None
+        converted = Series(index = series.index, dtype = str)
+        converted[notNull] = series[notNull].astype(str)
+        return converted, None
+
+    @staticmethod
+    def __Sample(values):
+        """
+        * Return leading and randomly selected non-null values
+        as strings.
+        """
+        if len(values) <= DataReader.__sampleRows:
+            return values.astype(str)
+        half = DataReader.__sampleRows // 2
+        sample = concat([values.iloc[:half], values.iloc[half:].sample(half, random_state = 0)])
+        return sample.astype(str)
+
+    @staticmethod
+    def __SampleType(strings):
         """
-        * Determine if TimeSeries object could be integer type.
+        * Return narrowest type that all sampled strings fit, or None.
         """
-        if all(isnull(series)):
-            return False
-        for val in series:
-            if not str(val).isnumeric() and not isnull(val):
-                return False
-        return True
+        for dtype in DataReader.__promotions:
+            if not DataReader.__Coerce(strings, dtype) is None:
+                return dtype
+        return None
+
+    @staticmethod
+    def __Coerce(strings, dtype):
+        """
+        * Convert strings to int64 or float64 (as numbers) or datetime64,
+        returning None if any value does not fit type. Integers outside int64 range
+        do not fit int64, or float64 (which cannot hold them exactly) unless column 
+        has decimals. Dates outside datetime64[ns] range (ex: 9999-12-31 sentinels) 
+        or with mixed time zones do not fit datetime64.
+        """
+        with warnings.catch_warnings():
+            # Values with inconsistent formats are parsed individually below:
+            warnings.simplefilter('ignore', UserWarning)
+            if dtype == 'datetime64[ns]':
+                try:
+                    converted = to_datetime(strings, errors = 'coerce')
+                    failed = converted.isna().to_numpy()
+                    if failed.any():
+                        converted[failed] = to_datetime(strings[failed], errors = 'coerce', format = 'mixed')
+                    converted = converted.dt.as_unit('ns')
+                except (OutOfBoundsDatetime, ValueError, AttributeError):
+                    return None
+            else:
+                converted = to_numeric(strings, errors = 'coerce')
+        if converted.isna().any():
+            return None
+        decimals = strings.str.contains('[.eE]')
+        if dtype != 'datetime64[ns]' and not decimals.any() and not DataReader.__FitsInt64(strings):
+            return None
+        elif dtype == 'int64' and (decimals.any() or (converted % 1 != 0).any()):
+            return None
+        return converted
+
     @staticmethod
-    def __IsFloat(series):
+    def __FitsInt64(values):
         """
-        * Determine if TimeSeries object is floating point.
+        * Return True if all integer values (or integer strings) fit int64.
         """
-        if all(isnull(series)):
-            return False
-        isfloat = re.compile('^[0-9]+.?[0-9]*$')
-        for val in series:
-            if not isfloat.match(str(val)) and not isnull(val):
-                return False
-        return True
+        if len(values) == 0 or values.dtype == 'int64':
+            return True
+        elif is_integer_dtype(values):
+            return bool(values.max() <= np.iinfo(np.int64).max)
+        integers = values[values.str.fullmatch(r'\s*[+-]?\d+\s*')]
+        return len(integers) == 0 or to_numeric(integers, errors = 'coerce').dtype == 'int64'
+
     @staticmethod
-    def __IsDT(series):
+    def __Expand(converted, codes, notNull, index):
         """
-        * Determine if is datetime.
+        * Map converted distinct values back onto all rows, with nulls
+        where original column was null.
         """
-        if all(isnull(series)):
-            return False
-        for val in series:
-            if not StringIsDT(str(val)) and not isnull(val):
-                return False
-        return True
\ No newline at end of file
+        values = converted.to_numpy()[codes]
+        if notNull.all():
+            return Series(values, index = index, dtype = converted.dtype)
+        expanded = Series(index = index, dtype = converted.dtype)
+        expanded[notNull] = values
+        return expanded
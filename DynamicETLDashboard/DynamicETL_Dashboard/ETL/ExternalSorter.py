@@ -0,0 +1,173 @@
+#####################################
+# ExternalSorter.py
+#####################################
+# Description:
+# * Sort datasets that do not fit into memory
+# by key columns using sorted runs spilled to disk
+# and a k-way merge.
+
+import numpy as np
+import os
+from pandas import concat, DataFrame, MultiIndex, read_pickle
+from shutil import rmtree
+from tempfile import mkdtemp
+
+class ExternalSorter(object):
+    """
+    * Sort iterables of DataFrame chunks by key columns
+    in bounded memory.
+    """
+    def __init__(self):
+        """
+        * Create empty object that can sort datasets.
+        """
+        pass
+    ####################
+    # Interface Methods:
+    ####################
+    @classmethod
+    def Sort(cls, chunks, keys, folder = None, blockRows = 50000):
+        """
+        * Yield DataFrame chunks containing all rows in passed chunks
+        in ascending order of key columns.
+        Inputs:
+        * chunks: Iterable of DataFrames (ex: read_csv with chunksize).
+        * keys: String or iterable of strings of key columns (case insensitive).
+        Key columns cannot contain nulls.
+        Optional:
+        * folder: Folder to write sorted runs to. Uses system temp folder if not provided.
+        * blockRows: Number of rows per block read from each sorted run while merging.
+        Peak memory is roughly (# of runs) * blockRows rows.
+        """
+        ExternalSorter.__Validate(chunks, keys, folder, blockRows)
+        keys = [keys] if isinstance(keys, str) else list(keys)
+        return ExternalSorter.__SortedChunks(chunks, keys, folder, blockRows)
+
+    @staticmethod
+    def KeyColumns(data, keys):
+        """
+        * Return actual column names in data matching
+        case insensitive key column names.
+        """
+        colMap = { col.lower() : col for col in data.columns }
+        return [colMap[key.lower()] for key in keys]
+
+    @staticmethod
+    def LastKey(data, keys):
+        """
+        * Return tuple containing key values of last row in data.
+        """
+        return tuple(data[ExternalSorter.KeyColumns(data, keys)].iloc[-1])
+
+    @staticmethod
+    def LessThan(data, keys, frontier, orEqual = False):
+        """
+        * Return boolean array indicating which rows have keys
+        lexicographically less than (or equal to) frontier tuple.
+        """
+        less = np.zeros(len(data), dtype = bool)
+        equal = np.ones(len(data), dtype = bool)
+        for col, val in zip(ExternalSorter.KeyColumns(data, keys), frontier):
+            values = data[col].to_numpy()
+            less |= equal & (values < val)
+            equal &= (values == val)
+        return less | equal if orEqual else less
+
+    @staticmethod
+    def IsSorted(data, keys, previous = None):
+        """
+        * Determine if rows in data are in ascending key order,
+        and come after previous key tuple if provided.
+        """
+        if len(data) == 0:
+            return True
+        keyData = data[ExternalSorter.KeyColumns(data, keys)]
+        if not MultiIndex.from_frame(keyData).is_monotonic_increasing:
+            return False
+        return previous is None or not tuple(keyData.iloc[0]) < previous
+
+    ####################
+    # Private Helpers:
+    ####################
+    @staticmethod
+    def __SortedChunks(chunks, keys, folder, blockRows):
+        """
+        * Write sorted runs to disk and yield merged chunks, removing
+        runs once finished.
+        """
+        runFolder = mkdtemp(prefix = 'ExternalSorter_', dir = folder)
+        try:
+            runs, head = ExternalSorter.__WriteRuns(chunks, keys, runFolder, blockRows)
+            if not runs and not head is None:
+                # Chunks without rows still provide columns and dtypes:
+                yield head
+            for chunk in ExternalSorter.__MergeRuns(runs, keys):
+                yield chunk
+        finally:
+            rmtree(runFolder, ignore_errors = True)
+
+    @staticmethod
+    def __WriteRuns(chunks, keys, folder, blockRows):
+        """
+        * Sort each chunk and write to disk as run of blocks.
+        Returns list of [BlockPaths] for each run, and empty DataFrame
+        with columns and dtypes of first chunk (None if no chunks).
+        """
+        runs = []
+        head = None
+        for runNum, chunk in enumerate(chunks):
+            if head is None:
+                head = chunk.iloc[:0]
+            if len(chunk) == 0:
+                continue
+            chunk = chunk.sort_values(ExternalSorter.KeyColumns(chunk, keys), kind = 'stable', ignore_index = True)
+            blocks = []
+            for start in range(0, len(chunk), blockRows):
+                path = os.path.join(folder, 'run_%d_%d.pkl' % (runNum, start // blockRows))
+                chunk.iloc[start:start + blockRows].to_pickle(path)
+                blocks.append(path)
+            runs.append(blocks)
+        return runs, head
+
+    @staticmethod
+    def __MergeRuns(runs, keys):
+        """
+        * Merge sorted runs, yielding sorted chunks. Only one block
+        per run is held in memory at a time.
+        """
+        buffers = [read_pickle(run.pop(0)) for run in runs]
+        while any([len(buffer) for buffer in buffers]):
+            # Every row up to smallest last key in buffers can be output:
+            frontier = min([ExternalSorter.LastKey(buffer, keys) for buffer in buffers if len(buffer)])
+            taken = []
+            for num, buffer in enumerate(buffers):
+                if len(buffer) == 0:
+                    continue
+                mask = ExternalSorter.LessThan(buffer, keys, frontier, True)
+                taken.append(buffer[mask])
+                buffers[num] = buffer[~mask]
+                if len(buffers[num]) == 0 and runs[num]:
+                    buffers[num] = read_pickle(runs[num].pop(0))
+            merged = concat(taken, ignore_index = True)
+            yield merged.sort_values(ExternalSorter.KeyColumns(merged, keys), kind = 'stable', ignore_index = True)
+
+    @staticmethod
+    def __Validate(chunks, keys, folder, blockRows):
+        """
+        * Validate parameters for Sort().
+        """
+        errs = []
+        if isinstance(chunks, DataFrame) or not hasattr(chunks, '__iter__'):
+            errs.append('chunks must be an iterable of DataFrames.')
+        if not isinstance(keys, str) and not hasattr(keys, '__iter__'):
+            errs.append('keys must be a string or iterable of strings.')
+        elif not isinstance(keys, str) and any([not isinstance(key, str) for key in keys]):
+            errs.append('keys must only contain strings if an iterable.')
+        if not folder is None and not (isinstance(folder, str) and os.path.isdir(folder)):
+            errs.append('folder must point to an existing folder if provided.')
+        if not isinstance(blockRows, int):
+            errs.append('blockRows must be an integer.')
+        elif blockRows <= 0:
+            errs.append('blockRows must be positive.')
+        if errs:
+            raise Exception('\n'.join(errs))
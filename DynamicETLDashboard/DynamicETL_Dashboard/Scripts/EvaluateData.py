@@ -17,6 +17,7 @@ import re
 from Utilities.FileConverter import FileConverter
 from Utilities.Helpers import ConvertDateFormat, GetRegexPattern, IsRegex
 from Utilities.LoadArgs import EvaluateDataJsonArgs
+from Utilities.ProfileCache import ProfileCache
 
 def EvaluateData():
     """
@@ -38,9 +39,13 @@ def GenerateReportAndTable(args):
     print ("Reading all data files at")
     print (args['data']['path'])
     reportpath = "%s%s_Attributes.xlsx" % (args['outputfolder'],args['processname'])
-    attributes = DataColumnAttributes()
-    # (path, fileExp, dateFormat = None, filePaths = None, sheets = None, delim = None, recursive = False, rowstart)
-    attributes.GetDataAttributes(args['data']['path'],args['filenamereg'],args['filedatereg'],None,args['data']['sheets'],args['data']['delim'],args['recursive'],args['data']['rowstart'])
+    profileCache = None
+    if not args['profilecache'] is None:
+        # Only profile files that are new or have changed since last run:
+        profileCache = ProfileCache(args['profilecache']) if args['profilecachesize'] is None else ProfileCache(args['profilecache'], args['profilecachesize'] * 1024 ** 2)
+    attributes = DataColumnAttributes(profileCache)
+    # (path, fileExp, dateFormat = None, filePaths = None, sheets = None, delim = None, recursive = False, rowstart, workers, chunkRows, sampleRows)
+    attributes.GetDataAttributes(args['data']['path'],args['filenamereg'],args['filedatereg'],None,args['data']['sheets'],args['data']['delim'],args['recursive'],args['data']['rowstart'],args['workers'],args['chunkrows'],args['samplerows'])
     attributes.GenerateReport(reportpath)
     print ("Finished generating report at")
     print (reportpath)
@@ -16,6 +16,7 @@ import re
 from Utilities.FileConverter import FileConverter
 from Utilities.Helpers import ConvertDateFormat, GetRegexPattern, IsRegex
 from Utilities.LoadArgs import GenerateNewETLJsonArgs
+from Utilities.ProfileCache import ProfileCache
 
 def GenerateColumnAttributesReport():
     """
@@ -36,9 +37,13 @@ def GenerateReportAndTable(args):
     """
     print ("Reading all data files at")
     print (args.datapath)
-    attributes = DataColumnAttributes()
+    profileCache = None
+    if not args.profilecache is None:
+        # Only profile files that are new or have changed since last run:
+        profileCache = ProfileCache(args.profilecache) if args.profilecachesize is None else ProfileCache(args.profilecache, args.profilecachesize * 1024 ** 2)
+    attributes = DataColumnAttributes(profileCache)
     reportpath = "%s%s.xlsx" % (args.outputfolder, args.etlname)
-    attributes.GetDataAttributes(args.datapath,args.filedateinfo,args.filenamereg,args.convertedpaths,args.sheets,args.delim)
+    attributes.GetDataAttributes(args.datapath,args.filedateinfo,args.filenamereg,args.convertedpaths,args.sheets,args.delim,etl = args.etlname)
     attributes.GenerateReport(reportpath)
     print ("Finished generating report at")
     print (reportpath)
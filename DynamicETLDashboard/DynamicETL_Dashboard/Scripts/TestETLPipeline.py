@@ -15,15 +15,24 @@
 # sucked up.
 # 3) Generate report accounting for differences between data in table versus
 # source file.
+# * If 'cachefolder' is provided, the ETL is not run again if the source file and table rows
+# with FileDate are unchanged since the cached report was generated, and otherwise only
+# key partitions whose rows changed are compared again.
+# * If 'streaming' is "TRUE", file and table rows are read in chunks and merge joined
+# in primary key order, so neither dataset is fully held in memory.
 
 from Database.tsql import TSQLInterface
 from datetime import datetime
+from ETL.AggregateChecker import AggregateChecker
+from ETL.ComparisonCache import ComparisonCache
 from ETL.DataComparer import DataComparer
 from ETL.DataReader import DataReader
 from ETL.ETLJobLoader import ETLJobLoader
+from itertools import chain
 from Logging.DynamicETLServiceIssueParser import DynamicETLServiceIssueParser
 import json
 import os
+from pandas import DataFrame
 from shutil import copyfile
 import sys
 from time import sleep
@@ -42,12 +51,22 @@ def TestETLPipeline():
     args, argTup = GetParameters()
     # Connect to T-SQL instance:
     interface = ConnectToServer(args, argTup)
+    if args['testetlargs']['cachefolder'] and UseCachedReport(args, argTup, interface):
+        # File and table rows are unchanged since last comparison, so ETL does not need to be run again:
+        return
+    # Remove previous rows with FileDate, or if testing locally, run ETL:
+    PrepareServer(args, argTup, interface)
     # Drop sample file to correct location, or if testing locally, run DYETL.WebApi, post arguments
     # and run DYETL.Service:
     waittime = OutputSampleFile(args, argTup, interface)
     pkeys, ignorecols, data_test, data_valid = GetDatasets(args, argTup, interface, waittime)
+    if data_valid is None:
+        # Aggregates matched, no rows to compare:
+        return
     # Output report detailing difference between file data and data in table:
-    GenerateReport(args, pkeys, ignorecols, data_test, data_valid)
+    GenerateReport(args, argTup, pkeys, ignorecols, data_test, data_valid)
+    if args['testetlargs']['cachefolder']:
+        CacheReport(args, argTup, interface)
 
 def GetParameters():
     """
@@ -72,6 +91,19 @@ def GetParameters():
 def ConnectToServer(args, argTup):
     """
     * Connect to target T-SQL server and database. 
+    """
+    try:
+        interface = TSQLInterface(argTup[1], argTup[2])
+    except Exception as ex:
+        print ("Could not connect to %s::%s" % (argTup[1], argTup[2]))
+        print ("Reason: %s" % str(ex))
+        input ('Press enter to exit.')
+        os._exit(0)
+    return interface
+
+def PrepareServer(args, argTup, interface):
+    """
+    * Prepare target table for test run.
     If testing LOCAL:
     * Drop existing rows with test FileDate.
     * Open DYETL.WebApi, post file using postargs.json.
@@ -81,13 +113,6 @@ def ConnectToServer(args, argTup):
     If not testing STG:
     * Drop existing rows with test FileDate.
     """
-    try:
-        interface = TSQLInterface(argTup[1], argTup[2])
-    except Exception as ex:
-        print ("Could not connect to %s::%s" % (argTup[1], argTup[2]))
-        print ("Reason: %s" % str(ex))
-        input ('Press enter to exit.')
-        os._exit(0)
     if args['testetlargs']['testmode'] == 'LOCAL':
         # Open DynamicETL.WebApi and post test ETL job:
         print ("Loading ETL %s test job to WebAPI at" % args['testetlargs']['postargs']['subject'])
@@ -113,8 +138,6 @@ def ConnectToServer(args, argTup):
             input ('Press enter to exit.')
             os._exit(0)
 
-    return interface
-
 def OutputSampleFile(args, argTup, interface):
     """
     * Output sample file to FileWatcher folder, wait for sample file to be sucked
@@ -153,9 +176,14 @@ def GetDatasets(args, argTup, interface, waittime):
         print ('Waiting %d seconds to allow data to be pulled and transformed...' % waittime)
         # Keep pulling from server until data has been uploaded:
         Countdown(waittime)
-        data_test = interface.Select(query)
-        if len(data_test) == 0:
-            raise Exception('No data uploaded to server after dropping to etlfolder.')
+        if args['testetlargs']['servercompare'] or args['testetlargs']['samplesize'] or args['testetlargs']['precheck']:
+            # Table rows will be compared on server, fetched for sampled keys only, or fetched if aggregates differ:
+            data_test = None
+            count = interface.Select(query.replace('SELECT *', 'SELECT COUNT(*) AS [NumRows]'))
+            if count['NumRows'][0] == 0:
+                raise Exception('No data uploaded to server after dropping to etlfolder.')
+        else:
+            data_test = SelectTestData(args, interface, query)
     except Exception as ex:
         print ('Could not query %s::%s::%s' % (argTup[1], argTup[2], argTup[3]))
         print ('Reason: %s' % str(ex))
@@ -163,29 +191,203 @@ def GetDatasets(args, argTup, interface, waittime):
         os._exit(0)
     # Pull data from test file:
     compareFile = args['testetlargs']['comparefile'] if 'comparefile' in args['testetlargs'] else args['testetlargs']['samplefile']
-    data_valid = DataReader.Read(compareFile, delim = args['testetlargs']['delim'])
+    if args['testetlargs']['readcachefolder']:
+        # Reuse parsed file if unchanged since last run:
+        readcachesize = args['testetlargs']['readcachesize']
+        if readcachesize is None:
+            DataReader.EnableCache(args['testetlargs']['readcachefolder'])
+        else:
+            DataReader.EnableCache(args['testetlargs']['readcachefolder'], readcachesize * 1024 ** 2)
+    if (args['testetlargs']['memorybudget'] is None and not args['testetlargs']['streaming']) or args['testetlargs']['servercompare'] or args['testetlargs']['samplesize'] or args['testetlargs']['precheck']:
+        data_valid = DataReader.Read(compareFile, delim = args['testetlargs']['delim'])
+        if args['testetlargs']['compact']:
+            report = DataReader.Compact(data_valid)
+            print ('Compacted file data, saving %d bytes.' % report['Bytes Saved'].sum())
+    else:
+        # Stream file rows in chunks to be spilled to disk or merge joined when comparing:
+        chunks = DataReader.ReadChunks(compareFile, delim = args['testetlargs']['delim'])
+        first = next(chunks, None)
+        if first is None:
+            # File has no rows, so every table row with FileDate is reported as missing from file:
+            print ('%s does not contain any rows.' % compareFile)
+            first = interface.Select("SELECT TOP 0 * FROM [%s]" % argTup[3])
+            data_valid = first
+        else:
+            data_valid = chain([first], chunks)
     # Compare test file data versus output etl data:
     print('Generating comparison report...')
-    ignorecols = ['%s' % argTup[4], 'RunDate']
-    if 'ignorecols' in args['testetlargs']:
-        ignorecols.extend(args['testetlargs']['ignorecols'])
-    ignorecols = set([col.strip() for col in ignorecols if col.strip()])
+    ignorecols = IgnoreColumns(args, argTup)
+    if args['testetlargs']['precheck'] and AggregatesMatch(args, argTup, interface, data_valid, ignorecols):
+        # Row level comparison is not required:
+        return None, ignorecols, None, None
     if 'pkey' in args['testetlargs']:
         pkeys = args['testetlargs']['pkey'] 
     else:
         print ("Finding appropriate primary key(s) to compare datasets using input file...")
-        pkeys = TSQLInterface.PrimaryKeys(data_valid, 4, ignorecols, True)
+        # Use first chunk if streaming file rows:
+        pkeys = TSQLInterface.PrimaryKeys(data_valid if isinstance(data_valid, DataFrame) else first, 4, ignorecols, True)
         print ("Using: {%s} as primary key(s)..." % ', '.join(pkeys))
+    if args['testetlargs']['servercompare']:
+        data_test, data_valid = CompareOnServer(argTup, interface, data_valid, ignorecols)
+    elif args['testetlargs']['samplesize']:
+        data_test = lambda keys : FetchSampleKeys(argTup, interface, keys)
+    elif data_test is None:
+        try:
+            data_test = SelectTestData(args, interface, query)
+        except Exception as ex:
+            print ('Could not query %s::%s::%s' % (argTup[1], argTup[2], argTup[3]))
+            print ('Reason: %s' % str(ex))
+            input ('Press enter to exit.')
+            os._exit(0)
 
     return pkeys, ignorecols, data_test, data_valid
 
-def GenerateReport(args, pkeys, ignorecols, data_test, data_valid):
+def IgnoreColumns(args, argTup):
+    """
+    * Return set of columns to ignore when comparing.
+    """
+    ignorecols = ['%s' % argTup[4], 'RunDate']
+    if 'ignorecols' in args['testetlargs']:
+        ignorecols.extend(args['testetlargs']['ignorecols'])
+    return set([col.strip() for col in ignorecols if col.strip()])
+
+def PartitionHashes(args, argTup, interface):
+    """
+    * Return hashes of compare file (with comparison settings) 
+    and of table rows with FileDate.
+    """
+    compareFile = args['testetlargs']['comparefile'] if 'comparefile' in args['testetlargs'] else args['testetlargs']['samplefile']
+    settings = { key : args['testetlargs'].get(key) for key in ['delim', 'ignorecols', 'pkey', 'samplesize', 'servercompare'] }
+    fileHash = ComparisonCache.FileHash(compareFile, settings)
+    # Exclude ignored columns (ex: RunDate) that change on every load:
+    ignore = set([col.lower() for col in IgnoreColumns(args, argTup)])
+    tablecols = interface.Select("SELECT TOP 0 * FROM [%s]" % argTup[3]).columns
+    tableHash = interface.TableChecksum(argTup[3], "[%s] = '%s'" % (argTup[4], argTup[0]), [col for col in tablecols if not col.lower() in ignore])
+    return fileHash, tableHash
+
+def UseCachedReport(args, argTup, interface):
+    """
+    * Copy cached report to reportpath and return True if compare file
+    and table rows with FileDate are unchanged since report was cached.
+    """
+    try:
+        cache = ComparisonCache(args['testetlargs']['cachefolder'])
+        cachedPath = cache.Lookup(argTup[3], argTup[0], *PartitionHashes(args, argTup, interface))
+        if cachedPath is None:
+            return False
+        copyfile(cachedPath, args['testetlargs']['reportpath'])
+    except Exception as ex:
+        print ('Could not use cached report. Reason: %s' % str(ex))
+        return False
+    print ('File and [%s] %s rows are unchanged since last comparison.' % (argTup[4], argTup[0]))
+    print ('Copied cached report to')
+    print (args['testetlargs']['reportpath'])
+    return True
+
+def CacheReport(args, argTup, interface):
+    """
+    * Store generated report and partition hashes in cache.
+    """
+    try:
+        cache = ComparisonCache(args['testetlargs']['cachefolder'])
+        cache.Store(argTup[3], argTup[0], *PartitionHashes(args, argTup, interface), args['testetlargs']['reportpath'])
+    except Exception as ex:
+        print ('Could not cache report. Reason: %s' % str(ex))
+
+def SelectTestData(args, interface, query):
+    """
+    * Query test data from server, in chunks if
+    memory budget was provided or streaming.
+    """
+    if args['testetlargs']['memorybudget'] is None and not args['testetlargs']['streaming']:
+        data_test = interface.Select(query)
+        if len(data_test) == 0:
+            raise Exception('No data uploaded to server after dropping to etlfolder.')
+        return data_test
+    # Stream table rows in chunks to be spilled to disk or merge joined when comparing:
+    return interface.Select(query, chunksize = 100000)
+
+def AggregatesMatch(args, argTup, interface, data_valid, ignorecols):
+    """
+    * Compare column aggregates of file data with aggregates computed on server
+    over rows with FileDate. Output aggregate report and return True if all match.
+    """
+    print ('Comparing column aggregates with %s::%s::%s...' % (argTup[1], argTup[2], argTup[3]))
+    try:
+        tablecols = interface.Select("SELECT TOP 0 * FROM [%s]" % argTup[3]).columns
+        tablecols = { col.lower() : col for col in tablecols }
+        profile_valid = AggregateChecker.Profile(data_valid, ignorecols)
+        aggregates = AggregateChecker.Aggregates(data_valid, ignorecols)
+        # Missing table columns are reported by Compare():
+        aggregates = { tablecols[col.lower()] : stats for col, stats in aggregates.items() if col.lower() in tablecols }
+        profile_test = interface.SelectAggregates(argTup[3], aggregates, "[%s] = '%s'" % (argTup[4], argTup[0]))
+        diffs = AggregateChecker.Compare(profile_test, profile_valid)
+    except Exception as ex:
+        print ('Could not compare aggregates. Reason: %s' % str(ex))
+        print ('Continuing with row comparison...')
+        return False
+    if len(diffs):
+        print ('%d aggregates differ. Continuing with row comparison...' % len(diffs))
+        return False
+    AggregateChecker.GenerateReport(args['testetlargs']['reportpath'], diffs)
+    print ('All aggregates match. Skipping row comparison.')
+    print ('Finished generating report at')
+    print (args['testetlargs']['reportpath'])
+    return True
+
+def CompareOnServer(argTup, interface, data_valid, ignorecols):
+    """
+    * Bulk load file data into temporary table on server and
+    return only rows that differ between table and file.
+    """
+    print ('Comparing file data with %s::%s::%s on server...' % (argTup[1], argTup[2], argTup[3]))
+    try:
+        tablecols = interface.Select("SELECT TOP 0 * FROM [%s]" % argTup[3]).columns
+        tablecols = { col.lower() : col for col in tablecols }
+        ignore = set([col.lower() for col in ignorecols])
+        # Map file columns to table columns:
+        cols = { col : tablecols[col.lower()] for col in data_valid.columns if col.lower() in tablecols and not col.lower() in ignore }
+        data = data_valid[list(cols)].rename(columns = cols)
+        data_test, data_valid = interface.CompareOnServer(data, argTup[3], "[%s] = '%s'" % (argTup[4], argTup[0]))
+    except Exception as ex:
+        print ('Could not compare data on %s::%s::%s' % (argTup[1], argTup[2], argTup[3]))
+        print ('Reason: %s' % str(ex))
+        input ('Press enter to exit.')
+        os._exit(0)
+    print ('%d table rows and %d file rows differ.' % (len(data_test), len(data_valid)))
+    return data_test, data_valid
+
+def FetchSampleKeys(argTup, interface, keys):
+    """
+    * Return table rows with FileDate that match sampled
+    key values from file.
+    """
+    tablecols = interface.Select("SELECT TOP 0 * FROM [%s]" % argTup[3]).columns
+    tablecols = { col.lower() : col for col in tablecols }
+    keys = keys.rename(columns = { col : tablecols[col.lower()] for col in keys.columns if col.lower() in tablecols })
+    return interface.SelectKeys(keys, argTup[3], "[%s] = '%s'" % (argTup[4], argTup[0]))
+
+def GenerateReport(args, argTup, pkeys, ignorecols, data_test, data_valid):
     """
     * Generate report comparing input data and data in server.
     """
     tester = DataComparer()
+    memorybudget = args['testetlargs']['memorybudget']
+    memorybudget = memorybudget * 1024 ** 2 if not memorybudget is None else None
     try:
-        tester.GenerateComparisonReport(args['testetlargs']['reportpath'], data_test, data_valid, ignorecols, pkeys)
+        if args['testetlargs']['samplesize'] and not args['testetlargs']['servercompare']:
+            estimates = tester.GenerateSampleReport(args['testetlargs']['reportpath'], data_valid, data_test, pkeys, ignorecols, args['testetlargs']['samplesize'])
+            if estimates['Mismatches'].sum() > 0:
+                print ('Mismatches detected in sample. Consider running full comparison (remove samplesize).')
+        elif args['testetlargs']['streaming']:
+            tester.GenerateStreamingReport(args['testetlargs']['reportpath'], data_test, data_valid, pkeys, ignorecols, spillFolder = args['testetlargs']['spillfolder'])
+        elif args['testetlargs']['cachefolder'] and not args['testetlargs']['servercompare'] and isinstance(data_test, DataFrame) and isinstance(data_valid, DataFrame):
+            # Only compare key partitions with rows that changed since last run:
+            cache = ComparisonCache(args['testetlargs']['cachefolder'])
+            compared = tester.GenerateIncrementalReport(args['testetlargs']['reportpath'], data_test, data_valid, cache, argTup[3], argTup[0], ignorecols, pkeys)
+            print ('Compared %d changed key partitions.' % compared)
+        else:
+            tester.GenerateComparisonReport(args['testetlargs']['reportpath'], data_test, data_valid, ignorecols, pkeys, memorybudget, args['testetlargs']['spillfolder'], args['testetlargs']['workers'])
     except Exception as ex:
         print ('Could not generate report.')
         print ('Reason: %s' % str(ex))
@@ -1 +1,115 @@
+#####################################
+# CacheBuilder.py
+#####################################
+# Description:
+# * Size bounded cache of parsed source files,
+# keyed by file path, size, modification time and
+# read options, with least recently used files evicted first.
 
+import hashlib
+import json
+import os
+from pandas import read_pickle
+
+class CacheBuilder(object):
+    """
+    * Cache of parsed DataFrames stored in folder.
+    """
+    __extension = '.pkl'
+    def __init__(self, folder, maxBytes = 2 * 1024 ** 3):
+        """
+        * Create cache stored in folder.
+        Inputs:
+        * folder: Existing folder to store cached files in.
+        Optional:
+        * maxBytes: Maximum total size of cached files in bytes. Least
+        recently used files are removed when exceeded.
+        """
+        errs = []
+        if not isinstance(folder, str):
+            errs.append('folder must be a string.')
+        elif not os.path.isdir(folder):
+            errs.append('folder must point to an existing folder.')
+        if not isinstance(maxBytes, int):
+            errs.append('maxBytes must be an integer.')
+        elif maxBytes <= 0:
+            errs.append('maxBytes must be positive.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        self.__folder = folder
+        self.__maxBytes = maxBytes
+    ####################
+    # Interface Methods:
+    ####################
+    def Load(self, path, build, delim = None, sheet = None, skiprows = None, **options):
+        """
+        * Return cached DataFrame for file at path with read options,
+        or build, store and return DataFrame if file has not been
+        cached or was modified.
+        Inputs:
+        * path: Path to source file.
+        * build: Function taking no arguments that returns parsed DataFrame.
+        Optional:
+        * delim, sheet, skiprows: Read options used by build.
+        * options: Other options that affect DataFrame returned by build 
+        (ex: parser engine, reader version).
+        """
+        cachePath = os.path.join(self.__folder, CacheBuilder.Key(path, delim, sheet, skiprows, **options) + CacheBuilder.__extension)
+        if os.path.exists(cachePath):
+            try:
+                data = read_pickle(cachePath)
+                # Mark as recently used:
+                os.utime(cachePath)
+                return data
+            except Exception:
+                # Cached file is incomplete or unreadable, rebuild:
+                os.remove(cachePath)
+        data = build()
+        data.to_pickle(cachePath)
+        self.__Evict(cachePath)
+        return data
+
+    def Clear(self):
+        """
+        * Remove all cached files.
+        """
+        for cachePath in self.__CachedFiles():
+            os.remove(cachePath)
+
+    @staticmethod
+    def Key(path, delim = None, sheet = None, skiprows = None, **options):
+        """
+        * Return key string for file at path with read options, which
+        changes if file is modified.
+        Inputs:
+        * path: Path to source file.
+        Optional:
+        * delim, sheet, skiprows: Read options.
+        * options: Other options that affect parsed DataFrame.
+        """
+        stat = os.stat(path)
+        key = [os.path.abspath(path).lower(), stat.st_size, stat.st_mtime_ns, delim, sheet, skiprows, options]
+        return hashlib.md5(json.dumps(key, default = str, sort_keys = True).encode()).hexdigest()
+
+    ####################
+    # Private Helpers:
+    ####################
+    def __CachedFiles(self):
+        """
+        * Return paths to all cached files in folder.
+        """
+        return [os.path.join(self.__folder, name) for name in os.listdir(self.__folder) if name.endswith(CacheBuilder.__extension)]
+
+    def __Evict(self, keep):
+        """
+        * Remove least recently used cached files until
+        total size is within maxBytes, never removing keep.
+        """
+        cached = [(os.path.getmtime(cachePath), os.path.getsize(cachePath), cachePath) for cachePath in self.__CachedFiles()]
+        total = sum([size for _, size, _ in cached])
+        for _, size, cachePath in sorted(cached):
+            if total <= self.__maxBytes:
+                break
+            elif cachePath != keep:
+                os.remove(cachePath)
+                total -= size
@@ -12,7 +12,6 @@ from collections import defaultdict, Counter
 from dateutil.parser import parse
 from itertools import product
 import re
-from Utilities.Helpers import StringIsDT
 
 class DateFormatFinder:
     """
@@ -58,10 +57,11 @@ class DateFormatFinder:
         # Validate parameters:
         if not isinstance(date_string, str):
             raise Exception('date_string must be a string.')
-        elif not StringIsDT(date_string):
+        try:
+            date = parse(date_string)
+        except (ValueError, OverflowError):
             raise Exception('date_string cannot be converted to a datetime object.')
-        # Determine %Y-%m-%d-type appropriate date format string from string:
-        date = parse(date_string)
+        # Determine %Y-%m-%d-type appropriate date format string from tokens in string:
         tokens = self.pattern.findall(date_string)
 
         candidate_specifiers = defaultdict(list)
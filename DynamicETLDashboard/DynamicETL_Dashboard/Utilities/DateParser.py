@@ -0,0 +1,171 @@
+#####################################
+# DateParser.py
+#####################################
+# Description:
+# * Memoized datetime parsing of strings and columns,
+# detecting each column's date format once from a sample
+# and parsing distinct values with fixed format.
+
+from collections import Counter, OrderedDict
+from dateutil.parser import parse
+from itertools import chain
+import numpy as np
+from pandas import factorize, Series, to_datetime
+from Utilities.DateFormatFinder import DateFormatFinder
+
+class DateParser(object):
+    """
+    * Singleton-like class that parses datetime strings, keeping
+    least recently used parsed strings and detected column formats.
+    """
+    __finder = DateFormatFinder()
+    __maxFormats = 1000
+    __maxStrings = 100000
+    __sampleSize = 20
+    # LRU caches mapping { String -> datetime or None } and { (ETL, Column) -> format }:
+    __formats = OrderedDict()
+    __parsed = OrderedDict()
+    def __init__(self):
+        """
+        * Initialize singleton object.
+        """
+        pass
+    ####################
+    # Interface Methods:
+    ####################
+    @classmethod
+    def Parse(cls, dateString):
+        """
+        * Return datetime object if string can be parsed as a date,
+        otherwise None.
+        Inputs:
+        * dateString: String that could possibly represent a date.
+        """
+        if not isinstance(dateString, str):
+            return None
+        elif dateString in DateParser.__parsed:
+            DateParser.__parsed.move_to_end(dateString)
+            return DateParser.__parsed[dateString]
+        try:
+            value = parse(dateString)
+        except (ValueError, OverflowError):
+            value = None
+        DateParser.__Store(DateParser.__parsed, dateString, value, DateParser.__maxStrings)
+        return value
+
+    @classmethod
+    def ParseColumn(cls, values, column = None, etl = None):
+        """
+        * Return Series of datetime objects (None where value is not a date)
+        for values, parsing each distinct value once using format detected
+        from a sample of values (or cached format for column and etl, if it
+        parses the sample identically to dateutil).
+        Inputs:
+        * values: Series or list-like container of values.
+        Optional:
+        * column: Column name to cache detected format for.
+        * etl: ETL name (or other identity of data source) to cache detected format for.
+        """
+        values = values if isinstance(values, Series) else Series(values, dtype = object)
+        codes, uniques = factorize(values)
+        uniques = Series(uniques, dtype = object)
+        isString = uniques.map(lambda val : isinstance(val, str)).to_numpy(dtype = bool)
+        parsed = np.full(len(uniques), None, dtype = object)
+        if isString.any():
+            strings = uniques[isString]
+            key = (etl, column)
+            format = DateParser.__formats.get(key) if not column is None else None
+            if not format is None and not DateParser.__FitsSample(strings, format):
+                # Detect format again if values do not match cached format:
+                format = None
+            format = DateParser.Format(strings) if format is None else format
+            converted = DateParser.__ParseFormat(strings, format) if not format is None else None
+            converted = Series(index = strings.index, dtype = object) if converted is None else converted
+            if not format is None and not column is None:
+                DateParser.__Store(DateParser.__formats, key, format, DateParser.__maxFormats)
+            # Parse values that do not match format individually:
+            failed = converted.isna().to_numpy()
+            converted = converted.astype(object)
+            converted[failed] = [DateParser.Parse(val) for val in strings[failed]]
+            parsed[isString] = converted.to_numpy()
+        result = np.full(len(values), None, dtype = object)
+        hasValue = codes >= 0
+        result[hasValue] = parsed[codes[hasValue]]
+        return Series(result, index = values.index, dtype = object)
+
+    @classmethod
+    def Format(cls, strings):
+        """
+        * Return %Y-%m-%d-type format string that parses most of a sample 
+        of date strings identically to dateutil, or None if no format fits.
+        Inputs:
+        * strings: Series or list-like container of strings.
+        """
+        sample, expected = DateParser.__Sample(strings)
+        if len(sample) == 0:
+            return None
+        # Use candidate format that parses most sampled values identically, 
+        # if it parses at least half of them:
+        candidates = Counter(chain.from_iterable([set(DateParser.__finder.find_candidate_patterns(val)) for val in sample]))
+        bestFormat, bestMatches = None, len(sample) / 2
+        for pattern, _ in candidates.most_common():
+            converted = DateParser.__ParseFormat(sample, pattern)
+            matches = 0 if converted is None else sum([conv == exp for conv, exp in zip(converted, expected)])
+            if matches > bestMatches:
+                bestFormat, bestMatches = pattern, matches
+        return bestFormat
+
+    @classmethod
+    def ClearCache(cls):
+        """
+        * Remove all parsed strings and detected formats.
+        """
+        DateParser.__formats.clear()
+        DateParser.__parsed.clear()
+
+    ####################
+    # Private Helpers:
+    ####################
+    @staticmethod
+    def __Sample(strings):
+        """
+        * Return sample of distinct strings that are dates, and 
+        datetimes parsed by dateutil for each.
+        """
+        sample = Series(strings, dtype = object).drop_duplicates()
+        sample = sample.iloc[:DateParser.__sampleSize]
+        expected = [DateParser.Parse(val) for val in sample]
+        sample = Series([val for val, exp in zip(sample, expected) if not exp is None], dtype = object)
+        return sample, [exp for exp in expected if not exp is None]
+
+    @staticmethod
+    def __FitsSample(strings, format):
+        """
+        * Indicate if format parses all sampled dates in strings
+        identically to dateutil.
+        """
+        sample, expected = DateParser.__Sample(strings)
+        converted = DateParser.__ParseFormat(sample, format) if len(sample) else None
+        return not converted is None and all([conv == exp for conv, exp in zip(converted, expected)])
+
+    @staticmethod
+    def __ParseFormat(strings, format):
+        """
+        * Return Series of datetimes parsed using format (NaT where
+        strings do not match), or None if format cannot be used.
+        """
+        try:
+            return Series(to_datetime(strings.to_numpy(), format = format, errors = 'coerce'), index = strings.index)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def __Store(cache, key, value, maxSize):
+        """
+        * Store value in LRU cache, removing least recently
+        used entries if cache is full.
+        """
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > maxSize:
+            cache.popitem(last = False)
@@ -6,7 +6,6 @@
 
 from copy import deepcopy
 from datetime import datetime
-import dateutil.parser as dateparse
 #from docx import Document
 import json
 #from jsonargparse import ArgumentError
@@ -14,6 +13,7 @@ import os
 import re
 from time import sleep
 from tqdm import trange
+from Utilities.DateParser import DateParser
 
 def FullCopy(obj):
     """
@@ -153,11 +153,11 @@ def StringIsDT(dateString, returnval = False):
     Output:
     * Return true if passed date can be converted to a datetime object.
     """
-    try:
-        out = dateparse.parse(dateString)
-        return (out if returnval else True)
-    except:
+    # Strings are only parsed once:
+    out = DateParser.Parse(dateString)
+    if out is None:
         return False
+    return (out if returnval else True)
 
 def LoadAppsettingsJson(jsonpath):
     """
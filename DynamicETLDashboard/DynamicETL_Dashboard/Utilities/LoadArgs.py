@@ -126,7 +126,7 @@ def EvaluateDataJsonArgs():
     * Get arguments used in EvaluateData.py script.
     """
     req = set(['data','filenamereg','outputfolder','processname','recursive','tablename'])
-    opt = set(['allnull','filedatereg'])
+    opt = set(['allnull','chunkrows','filedatereg','profilecache','profilecachesize','samplerows','workers'])
     path = 'ScriptArgs\\EvaluateData.json'
     if not os.path.exists(path):
         raise Exception('%s is missing.' % path)
@@ -196,6 +196,15 @@ def EvaluateDataJsonArgs():
     else:
         args['allnull'] = False
 
+    # "chunkrows":
+    if 'chunkrows' in args:
+        if not isinstance(args['chunkrows'], int):
+            errs.append('(chunkrows) Must be an integer.')
+        elif not args['chunkrows'] > 0:
+            errs.append('(chunkrows) Must be positive.')
+    else:
+        args['chunkrows'] = None
+
     # "filedatereg":
     if 'filedatereg' in args:
         if not 'Regex' in args['filedatereg']:
@@ -208,6 +217,42 @@ def EvaluateDataJsonArgs():
         # Pull all files in folder:
         args['filedatereg'] = None
 
+    # "profilecache":
+    if 'profilecache' in args:
+        if not isinstance(args['profilecache'], str):
+            errs.append('(profilecache) Must be a string.')
+        elif not os.path.isdir(os.path.dirname(os.path.abspath(args['profilecache']))):
+            errs.append('(profilecache) Must be in an existing folder.')
+    else:
+        args['profilecache'] = None
+
+    # "profilecachesize":
+    if 'profilecachesize' in args:
+        if not isinstance(args['profilecachesize'], int):
+            errs.append('(profilecachesize) Must be an integer.')
+        elif not args['profilecachesize'] > 0:
+            errs.append('(profilecachesize) Must be positive.')
+    else:
+        args['profilecachesize'] = None
+
+    # "samplerows":
+    if 'samplerows' in args:
+        if not isinstance(args['samplerows'], int):
+            errs.append('(samplerows) Must be an integer.')
+        elif not args['samplerows'] > 0:
+            errs.append('(samplerows) Must be positive.')
+    else:
+        args['samplerows'] = None
+
+    # "workers":
+    if 'workers' in args:
+        if not isinstance(args['workers'], int):
+            errs.append('(workers) Must be an integer.')
+        elif not args['workers'] > 0:
+            errs.append('(workers) Must be positive.')
+    else:
+        args['workers'] = 1
+
     if missing:
         errs.append('The following required subarguments are missing: {%s}' % ', '.join(missing))
     if errs:
@@ -241,6 +286,8 @@ class Arguments(object):
         self.convertedpaths = None
         self.allnull = args['allnull'].lower() == 'true' if 'allnull' in args else False
         self.delim = args['data']['delim'] if 'delim' in args['data'] else None
+        self.profilecache = args['profilecache'] if 'profilecache' in args else None
+        self.profilecachesize = args['profilecachesize'] if 'profilecachesize' in args else None
         if 'filenamereg' in args:
             self.filenamereg = re.compile(args['filenamereg'])
         if 'convert' in args:
@@ -314,6 +361,20 @@ class Arguments(object):
             if 'convertpath' in args['convert'] and not os.path.exists(args['convert']['convertpath']):
                 errs.append('convertpath does not exist.')
 
+        # "profilecache":
+        if 'profilecache' in args:
+            if not isinstance(args['profilecache'], str):
+                errs.append('profilecache must be a string.')
+            elif not os.path.isdir(os.path.dirname(os.path.abspath(args['profilecache']))):
+                errs.append('profilecache must be in an existing folder.')
+
+        # "profilecachesize":
+        if 'profilecachesize' in args:
+            if not isinstance(args['profilecachesize'], int):
+                errs.append('profilecachesize must be an integer.')
+            elif not args['profilecachesize'] > 0:
+                errs.append('profilecachesize must be positive.')
+
         if missing:
             errs.append('The following required subarguments are missing: {%s}' % ', '.join(missing))
         if errs:
@@ -629,6 +690,102 @@ def TestETLPipelineJsonArgs():
         elif not isinstance(args['testetlargs']['pkey'], list):
             errs.append('pkey must be a string or a list.')
 
+    # memorybudget (optional): 
+    if 'memorybudget' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['memorybudget'], (int, float)):
+            errs.append('(memorybudget) Must be numeric (megabytes).')
+        elif args['testetlargs']['memorybudget'] <= 0:
+            errs.append('(memorybudget) Must be positive.')
+    else:
+        args['testetlargs']['memorybudget'] = None
+
+    # spillfolder (optional):
+    if 'spillfolder' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['spillfolder'], str):
+            errs.append('(spillfolder) Must be a string.')
+        elif not os.path.isdir(args['testetlargs']['spillfolder']):
+            errs.append('(spillfolder) Must point to an existing folder.')
+    else:
+        args['testetlargs']['spillfolder'] = None
+
+    # servercompare (optional):
+    if 'servercompare' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['servercompare'], str):
+            errs.append('(servercompare) Must be a string.')
+        elif not args['testetlargs']['servercompare'].lower() in ['true', 'false']:
+            errs.append('(servercompare) Must be a "TRUE"/"FALSE" (case insensitive) string.')
+        else:
+            args['testetlargs']['servercompare'] = args['testetlargs']['servercompare'].lower() == 'true'
+    else:
+        args['testetlargs']['servercompare'] = False
+
+    # workers (optional):
+    if 'workers' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['workers'], int):
+            errs.append('(workers) Must be an integer.')
+        elif args['testetlargs']['workers'] < 1:
+            errs.append('(workers) Must be positive.')
+    else:
+        args['testetlargs']['workers'] = None
+
+    # cachefolder (optional):
+    if 'cachefolder' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['cachefolder'], str):
+            errs.append('(cachefolder) Must be a string.')
+        elif not os.path.isdir(args['testetlargs']['cachefolder']):
+            errs.append('(cachefolder) Must point to an existing folder.')
+    else:
+        args['testetlargs']['cachefolder'] = None
+
+    # precheck (optional):
+    if 'precheck' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['precheck'], str):
+            errs.append('(precheck) Must be a string.')
+        elif not args['testetlargs']['precheck'].lower() in ['true', 'false']:
+            errs.append('(precheck) Must be a "TRUE"/"FALSE" (case insensitive) string.')
+        else:
+            args['testetlargs']['precheck'] = args['testetlargs']['precheck'].lower() == 'true'
+    else:
+        args['testetlargs']['precheck'] = False
+
+    # samplesize (optional):
+    if 'samplesize' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['samplesize'], int):
+            errs.append('(samplesize) Must be an integer.')
+        elif args['testetlargs']['samplesize'] <= 0:
+            errs.append('(samplesize) Must be positive.')
+    else:
+        args['testetlargs']['samplesize'] = None
+
+    # readcachefolder (optional):
+    if 'readcachefolder' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['readcachefolder'], str):
+            errs.append('(readcachefolder) Must be a string.')
+        elif not os.path.isdir(args['testetlargs']['readcachefolder']):
+            errs.append('(readcachefolder) Must point to an existing folder.')
+    else:
+        args['testetlargs']['readcachefolder'] = None
+
+    # readcachesize (optional, in megabytes):
+    if 'readcachesize' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['readcachesize'], int):
+            errs.append('(readcachesize) Must be an integer.')
+        elif args['testetlargs']['readcachesize'] <= 0:
+            errs.append('(readcachesize) Must be positive.')
+    else:
+        args['testetlargs']['readcachesize'] = None
+
+    # compact (optional):
+    if 'compact' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['compact'], str):
+            errs.append('(compact) Must be a string.')
+        elif not args['testetlargs']['compact'].lower() in ['true', 'false']:
+            errs.append('(compact) Must be a "TRUE"/"FALSE" (case insensitive) string.')
+        else:
+            args['testetlargs']['compact'] = args['testetlargs']['compact'].lower() == 'true'
+    else:
+        args['testetlargs']['compact'] = False
+
     # removeprevfiledate (optional):
     if 'removeprevfiledate' in args['testetlargs']:
         if not isinstance(args['testetlargs']['removeprevfiledate'], str):
@@ -639,6 +796,19 @@ def TestETLPipelineJsonArgs():
             args['testetlargs']['removeprevfiledate'] = True if args['testetlargs']['removeprevfiledate'].lower() == 'true' else False
     else:
         args['testetlargs']['removeprevfiledate'] = True
+
+    # streaming (optional):
+    if 'streaming' in args['testetlargs']:
+        if not isinstance(args['testetlargs']['streaming'], str):
+            errs.append('(streaming) Must be a string.')
+        elif not args['testetlargs']['streaming'].lower() in ['true', 'false']:
+            errs.append('(streaming) Must be a "TRUE"/"FALSE" (case insensitive) string.')
+        else:
+            args['testetlargs']['streaming'] = args['testetlargs']['streaming'].lower() == 'true'
+    else:
+        args['testetlargs']['streaming'] = False
+    if args['testetlargs']['streaming'] is True and any([args['testetlargs'][key] for key in ['servercompare', 'samplesize', 'precheck']]):
+        errs.append('(streaming) Cannot be used with servercompare, samplesize or precheck.')
     
     if errs:
         raise Exception('\n'.join(errs))
@@ -0,0 +1,155 @@
+#####################################
+# ProfileCache.py
+#####################################
+# Description:
+# * Size bounded SQLite store of file profiles (ex: ColumnAttributes),
+# keyed by file contents, profiler version and profile options,
+# with least recently used profiles evicted first.
+
+from contextlib import closing
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import time
+
+class ProfileCache(object):
+    """
+    * Persistent store of pickled file profiles in SQLite database.
+    """
+    # Increment when profiling changes so that stored profiles are rebuilt:
+    __profilerVersion = 2
+    __blockSize = 1024 ** 2
+    def __init__(self, path, maxBytes = 1024 ** 3):
+        """
+        * Open (or create) store in SQLite database at path.
+        Inputs:
+        * path: Path to SQLite database file in existing folder.
+        Optional:
+        * maxBytes: Maximum total size of stored profiles in bytes. Least
+        recently used profiles are removed when exceeded.
+        """
+        errs = []
+        if not isinstance(path, str):
+            errs.append('path must be a string.')
+        elif not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+            errs.append('path must be in an existing folder.')
+        if not isinstance(maxBytes, int):
+            errs.append('maxBytes must be an integer.')
+        elif maxBytes <= 0:
+            errs.append('maxBytes must be positive.')
+        if errs:
+            raise Exception('\n'.join(errs))
+        self.__path = path
+        self.__maxBytes = maxBytes
+        with closing(sqlite3.connect(self.__path)) as conn, conn:
+            conn.execute('CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, hash TEXT)')
+            conn.execute('CREATE TABLE IF NOT EXISTS profiles (key TEXT PRIMARY KEY, path TEXT, version INTEGER, profile BLOB, bytes INTEGER, lastused REAL)')
+            # Remove profiles built by other profiler versions:
+            conn.execute('DELETE FROM profiles WHERE version != ?', (ProfileCache.__profilerVersion,))
+    ####################
+    # Interface Methods:
+    ####################
+    def Get(self, path, **options):
+        """
+        * Return stored profile of file at path with options, or None
+        if file has not been profiled or contents have changed.
+        Inputs:
+        * path: Path to source file.
+        Optional:
+        * options: Profile options (ex: delim, sheets, skiprows).
+        """
+        with closing(sqlite3.connect(self.__path)) as conn, conn:
+            key = self.__Key(conn, path, options)
+            row = conn.execute('SELECT profile FROM profiles WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            try:
+                profile = pickle.loads(row[0])
+            except Exception:
+                # Stored profile is unreadable, rebuild:
+                conn.execute('DELETE FROM profiles WHERE key = ?', (key,))
+                return None
+            # Mark as recently used:
+            conn.execute('UPDATE profiles SET lastused = ? WHERE key = ?', (time.time(), key))
+            return profile
+
+    def Store(self, path, profile, **options):
+        """
+        * Store profile of file at path with options.
+        Inputs:
+        * path: Path to source file.
+        * profile: Picklable profile object.
+        Optional:
+        * options: Profile options (ex: delim, sheets, skiprows).
+        """
+        blob = pickle.dumps(profile, protocol = pickle.HIGHEST_PROTOCOL)
+        with closing(sqlite3.connect(self.__path)) as conn, conn:
+            key = self.__Key(conn, path, options)
+            conn.execute('INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?, ?, ?)',
+                         (key, os.path.abspath(path).lower(), ProfileCache.__profilerVersion, blob, len(blob), time.time()))
+            self.__Evict(conn, key)
+
+    def Invalidate(self, path):
+        """
+        * Remove all stored profiles of file at path.
+        Inputs:
+        * path: Path to source file.
+        """
+        path = os.path.abspath(path).lower()
+        with closing(sqlite3.connect(self.__path)) as conn, conn:
+            conn.execute('DELETE FROM profiles WHERE path = ?', (path,))
+            conn.execute('DELETE FROM files WHERE path = ?', (path,))
+
+    def Clear(self):
+        """
+        * Remove all stored profiles.
+        """
+        with closing(sqlite3.connect(self.__path)) as conn:
+            with conn:
+                conn.execute('DELETE FROM profiles')
+                conn.execute('DELETE FROM files')
+            conn.execute('VACUUM')
+
+    ####################
+    # Private Helpers:
+    ####################
+    def __Key(self, conn, path, options):
+        """
+        * Return key string for contents of file at path and options.
+        """
+        key = [self.__ContentHash(conn, path), ProfileCache.__profilerVersion, os.path.basename(path).lower(), options]
+        return hashlib.md5(json.dumps(key, default = str, sort_keys = True).encode()).hexdigest()
+
+    def __ContentHash(self, conn, path):
+        """
+        * Return hash of contents of file at path, only reading
+        file if size or modification time have changed.
+        """
+        stat = os.stat(path)
+        fullPath = os.path.abspath(path).lower()
+        row = conn.execute('SELECT hash FROM files WHERE path = ? AND size = ? AND mtime = ?', (fullPath, stat.st_size, stat.st_mtime_ns)).fetchone()
+        if not row is None:
+            return row[0]
+        contentHash = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda : f.read(ProfileCache.__blockSize), b''):
+                contentHash.update(block)
+        contentHash = contentHash.hexdigest()
+        conn.execute('INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)', (fullPath, stat.st_size, stat.st_mtime_ns, contentHash))
+        return contentHash
+
+    def __Evict(self, conn, keep):
+        """
+        * Remove least recently used profiles until total size
+        is within maxBytes, never removing keep.
+        """
+        total = conn.execute('SELECT COALESCE(SUM(bytes), 0) FROM profiles').fetchone()[0]
+        if total <= self.__maxBytes:
+            return
+        for key, size in conn.execute('SELECT key, bytes FROM profiles WHERE key != ? ORDER BY lastused', (keep,)).fetchall():
+            if total <= self.__maxBytes:
+                break
+            conn.execute('DELETE FROM profiles WHERE key = ?', (key,))
+            total -= size
@@ -0,0 +1,56 @@
+#####################################
+# BenchmarkParallelCompare.py
+#####################################
+# Description:
+# * Time DataComparer keyed comparison of synthetic datasets
+# using increasing numbers of worker processes, and verify that
+# every worker count reports the same differences.
+# Usage: python benchmarks/BenchmarkParallelCompare.py --rows 5000000 --workers 1 2 4 8 16
+
+from argparse import ArgumentParser
+import os
+import sys
+from tempfile import mkdtemp
+from time import perf_counter
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(root, 'DynamicETLDashboard', 'DynamicETL_Dashboard'))
+
+from ETL.DataComparer import DataComparer
+import numpy as np
+from pandas import DataFrame, read_excel
+
+def BenchmarkParallelCompare(numRows, workerCounts):
+    """
+    * Return { Workers -> Seconds } to generate comparison report
+    for each worker count.
+    """
+    gen = np.random.default_rng(0)
+    data_valid = DataFrame({'TradeId' : np.arange(numRows), 'Qty' : gen.integers(0, 1000, numRows), 
+                            'Price' : gen.random(numRows), 'Trader' : gen.choice(['A', 'B', 'C', 'D'], numRows)})
+    data_test = data_valid.sample(frac = 1, random_state = 0)
+    data_test.loc[data_test.index[0:1000], 'Price'] = -1
+    folder = mkdtemp(prefix = 'BenchmarkParallelCompare_')
+    timings, reports = {}, {}
+    for workers in workerCounts:
+        path = os.path.join(folder, 'Workers%d.xlsx' % workers)
+        start = perf_counter()
+        DataComparer.GenerateComparisonReport(path, data_test, data_valid, pKey = 'TradeId', workers = workers)
+        timings[workers] = perf_counter() - start
+        reports[workers] = read_excel(path, sheet_name = None)
+        os.remove(path)
+        print ('%d worker(s): %.2f seconds (%.2fx)' % (workers, timings[workers], timings[workerCounts[0]] / timings[workers]))
+    os.rmdir(folder)
+    first = reports[workerCounts[0]]
+    for workers, report in reports.items():
+        if any([not report[sheet].equals(first[sheet]) for sheet in first]):
+            raise Exception('Report with %d worker(s) differs from report with %d worker(s).' % (workers, workerCounts[0]))
+    return timings
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = 'Benchmark DataComparer worker scaling.')
+    parser.add_argument('--rows', type = int, default = 5000000)
+    parser.add_argument('--workers', type = int, nargs = '+', default = [1, 2, 4, 8, 16])
+    args = parser.parse_args()
+    print ('%d CPU(s) available.' % os.cpu_count())
+    BenchmarkParallelCompare(args.rows, args.workers)
@@ -0,0 +1,76 @@
+#####################################
+# BenchmarkTypeInference.py
+#####################################
+# Description:
+# * Time DataReader.Read against DataReader.Read at a baseline git
+# revision (per value type checks, using Helpers.StringIsDT at same revision)
+# on the same synthetic pipe delimited file, and verify both infer the same
+# column types. Baseline dates are cast to datetime64[ns], since pandas >= 2
+# does not allow unit-less datetime64.
+# Usage: python benchmarks/BenchmarkTypeInference.py --rows 200000 --baseline 139ae02
+
+from argparse import ArgumentParser
+import os
+from subprocess import check_output
+import sys
+from tempfile import mkdtemp
+from time import perf_counter
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+folder = os.path.join(root, 'DynamicETLDashboard', 'DynamicETL_Dashboard')
+sys.path.insert(0, folder)
+
+from ETL.DataReader import DataReader
+import numpy as np
+from pandas import DataFrame, Timestamp, to_timedelta
+
+def LoadBaseline(baseline):
+    """
+    * Return DataReader class at baseline git revision, with
+    the Helpers functions it uses from the same revision.
+    """
+    helpers, reader = {}, {}
+    source = check_output(['git', 'show', '%s:./Utilities/Helpers.py' % baseline], cwd = folder).decode()
+    exec(compile(source, 'Helpers@%s' % baseline, 'exec'), helpers)
+    source = check_output(['git', 'show', '%s:./ETL/DataReader.py' % baseline], cwd = folder).decode()
+    source = source.replace('from DynamicETL_Dashboard.Utilities.Helpers import IsNumeric, StringIsDT', '')
+    source = source.replace("astype('datetime64')", "astype('datetime64[ns]')")
+    reader.update({ 'IsNumeric' : helpers['IsNumeric'], 'StringIsDT' : helpers['StringIsDT'] })
+    exec(compile(source, 'DataReader@%s' % baseline, 'exec'), reader)
+    return reader['DataReader']
+
+def BenchmarkTypeInference(numRows, baseline):
+    """
+    * Return (baseline seconds, current seconds) to read synthetic file.
+    """
+    gen = np.random.default_rng(0)
+    data = DataFrame({'TradeId' : np.arange(numRows), 'Price' : gen.random(numRows).round(4), 'Trader' : gen.choice(['A', 'B', 'C', 'D'], numRows),
+                      'TradeDate' : (Timestamp('2020-01-01') + to_timedelta(gen.integers(0, 900, numRows), 'D')).strftime('%m/%d/%Y')})
+    tempFolder = mkdtemp(prefix = 'BenchmarkTypeInference_')
+    path = os.path.join(tempFolder, 'Data.csv')
+    data.to_csv(path, sep = '|', index = False)
+    baselineReader = LoadBaseline(baseline)
+    try:
+        start = perf_counter()
+        before = baselineReader.Read(path, delim = '|')
+        perValue = perf_counter() - start
+        start = perf_counter()
+        after = DataReader.Read(path, delim = '|')
+        vectorized = perf_counter() - start
+    finally:
+        os.remove(path)
+        os.rmdir(tempFolder)
+    types = DataFrame({'Baseline' : before.dtypes.astype(str), 'Current' : after.dtypes.astype(str)})
+    print (types)
+    print ('Baseline DataReader.Read (%s): %.2f seconds' % (baseline, perValue))
+    print ('Current DataReader.Read: %.2f seconds (%.1fx)' % (vectorized, perValue / vectorized))
+    if (types['Baseline'] != types['Current']).any():
+        raise Exception('Inferred types differ from baseline.')
+    return perValue, vectorized
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description = 'Benchmark DataReader type inference against a baseline revision.')
+    parser.add_argument('--rows', type = int, default = 200000)
+    parser.add_argument('--baseline', default = '139ae02')
+    args = parser.parse_args()
+    BenchmarkTypeInference(args.rows, args.baseline)
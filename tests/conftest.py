@@ -0,0 +1,14 @@
+#####################################
+# conftest.py
+#####################################
+# Description:
+# * Make project modules importable the same way
+# scripts import them (ex: from ETL.DataReader import DataReader).
+
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in [os.path.join(root, 'DynamicETLDashboard'), os.path.join(root, 'DynamicETLDashboard', 'DynamicETL_Dashboard')]:
+    if not folder in sys.path:
+        sys.path.insert(0, folder)
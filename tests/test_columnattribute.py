@@ -0,0 +1,26 @@
+#####################################
+# test_columnattribute.py
+#####################################
+# Description:
+# * Test ColumnAttribute profiling.
+
+from Columns.ColumnAttribute import ColumnAttribute
+import numpy as np
+from pandas import Series
+import pytest
+
+@pytest.mark.parametrize('numDistinct', [10, 24, 25, 30])
+def test_nullable_column_type_ignores_nulls(numDistinct):
+    dates = ['2020-01-%02d' % (day + 1) for day in range(numDistinct)]
+    numbers = [str(num) for num in range(numDistinct)]
+    for values, expected in [(dates, 'datetime'), (numbers, 'float')]:
+        profile = ColumnAttribute.Profile(Series([None] + values + [np.nan] + values, dtype = object))
+        assert profile['Type'] == expected
+        assert profile['IsNullable']
+        assert profile['NumNulls'] == 2
+        assert profile['UniqueCount'] == numDistinct
+
+def test_all_null_column_is_varchar():
+    profile = ColumnAttribute.Profile(Series([None, None], dtype = object))
+    assert profile['Type'] == 'varchar(max)'
+    assert profile['UniqueCount'] == 0
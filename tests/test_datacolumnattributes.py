@@ -0,0 +1,34 @@
+#####################################
+# test_datacolumnattributes.py
+#####################################
+# Description:
+# * Test DataColumnAttributes file profiling.
+
+from Columns import DataColumnAttributes as module
+from Columns.DataColumnAttributes import DataColumnAttributes
+import pytest
+
+def WriteFiles(tmp_path, numFiles = 3):
+    """
+    * Write small csv files to folder and return { FileName -> Path }.
+    """
+    paths = {}
+    for num in range(numFiles):
+        path = tmp_path / ('data_%d.csv' % num)
+        path.write_text('Id,Name\n%s\n' % '\n'.join(['%d,n%d' % (row, row) for row in range(10)]))
+        paths[path.name] = str(path)
+    return paths
+
+def test_profiles_files_serially_by_default(tmp_path, monkeypatch):
+    def NoPool(*args, **kwargs):
+        raise AssertionError('Process pool should not be used by default.')
+    monkeypatch.setattr(module, 'ProcessPoolExecutor', NoPool)
+    monkeypatch.setattr(module.os, 'cpu_count', lambda : 4)
+    attributes = DataColumnAttributes()
+    attributes.GetDataAttributes(str(tmp_path), None, filePaths = WriteFiles(tmp_path), delim = ',')
+    assert len(attributes.FilePaths) == 3
+
+def test_workers_must_be_positive_integer(tmp_path):
+    for workers in [None, 0, 1.5]:
+        with pytest.raises(Exception, match = 'workers'):
+            DataColumnAttributes().GetDataAttributes(str(tmp_path), None, filePaths = WriteFiles(tmp_path), workers = workers)
@@ -0,0 +1,114 @@
+#####################################
+# test_datacomparer.py
+#####################################
+# Description:
+# * Test DataComparer reports.
+
+from ETL.ComparisonCache import ComparisonCache
+from ETL.DataComparer import DataComparer
+from ETL.DataReader import DataReader
+import numpy as np
+from pandas import concat, DataFrame, read_excel
+import pytest
+
+def ReadReport(path):
+    """
+    * Return { Sheet -> DataFrame } for report.
+    """
+    return read_excel(str(path), sheet_name = None)
+
+def AssertSameReports(left, right):
+    """
+    * Assert that reports have same sheets and contents.
+    """
+    left, right = ReadReport(left), ReadReport(right)
+    assert list(left) == list(right)
+    for sheet in left:
+        assert left[sheet].equals(right[sheet]), sheet
+
+def SampleData(numRows = 5000, seed = 0):
+    """
+    * Return (data_test, data_valid) with a few differing rows.
+    """
+    rng = np.random.default_rng(seed)
+    data_valid = DataFrame({ 'Id' : np.arange(numRows), 'Value' : rng.integers(0, 100, numRows), 'Name' : rng.choice(['a', 'b', 'c'], numRows) })
+    data_test = data_valid.copy()
+    data_test.loc[[3, 500], 'Value'] = -1
+    return data_test, data_valid
+
+@pytest.mark.parametrize('pKey', ['Id', None])
+def test_incremental_report_only_compares_changed_partitions(tmp_path, pKey):
+    data_test, data_valid = SampleData()
+    folder = tmp_path / 'cache'
+    folder.mkdir()
+    compare = lambda data, name : DataComparer.GenerateIncrementalReport(str(tmp_path / name), data, data_valid, ComparisonCache(str(folder)), 'Table', '2020-07-12', pKey = pKey)
+    assert compare(data_test, 'first.xlsx') > 1
+    assert compare(data_test, 'second.xlsx') == 0
+    AssertSameReports(tmp_path / 'first.xlsx', tmp_path / 'second.xlsx')
+    # Changed and duplicated rows are compared again:
+    data_test.loc[7, 'Name'] = 'z'
+    assert 1 <= compare(data_test, 'changed.xlsx') <= 2
+    DataComparer.GenerateComparisonReport(str(tmp_path / 'full.xlsx'), data_test, data_valid, pKey = pKey)
+    AssertSameReports(tmp_path / 'changed.xlsx', tmp_path / 'full.xlsx')
+    assert compare(concat([data_test, data_test.iloc[[9]]], ignore_index = True), 'duplicated.xlsx') == 1
+
+def NumDiffering(path):
+    """
+    * Return # of Differing Rows in report summary.
+    """
+    return int(read_excel(str(path), sheet_name = 'Summary', header = None).iloc[1, 1])
+
+@pytest.mark.parametrize('pKey', ['Id', None])
+@pytest.mark.parametrize('mode', [{}, { 'workers' : 2 }, { 'memoryBudget' : 10 ** 4 }], ids = ['memory', 'workers', 'memorybudget'])
+def test_null_and_empty_string_are_equal(tmp_path, pKey, mode):
+    data_valid = DataFrame({ 'Id' : [1, 2, 3, 4], 'Name' : [None, 'b', np.nan, 'd'], 'Value' : [1.5, np.nan, 3.0, 4.0] })
+    data_test = DataFrame({ 'Id' : [1, 2, 3, 4], 'Name' : ['', 'b', '', 'x'], 'Value' : [1.5, np.nan, 3.0, 4.0] })
+    path = tmp_path / 'report.xlsx'
+    DataComparer.GenerateComparisonReport(str(path), data_test, data_valid, pKey = pKey, **mode)
+    assert NumDiffering(path) == 1
+    diffs = ReadReport(path)['Differences']
+    assert (diffs['Name'].astype(str).str.contains('d')).all()
+
+@pytest.mark.parametrize('mode', [{}, { 'workers' : 2 }, { 'memoryBudget' : 10 ** 4 }], ids = ['memory', 'workers', 'memorybudget'])
+def test_differences_are_ordered_by_key(tmp_path, mode):
+    data_test, data_valid = SampleData(2000)
+    data_test.loc[[1500, 20, 700], 'Value'] = -1
+    # Shuffle both datasets, so that order does not follow either input:
+    data_test = data_test.sample(frac = 1, random_state = 1)
+    data_valid = data_valid.sample(frac = 1, random_state = 2)
+    path = tmp_path / 'keyed.xlsx'
+    DataComparer.GenerateComparisonReport(str(path), data_test, data_valid, pKey = 'Id', **mode)
+    assert list(ReadReport(path)['Differences']['Id']) == [3, 20, 500, 700, 1500]
+    # Without primary key, valid rows are ordered by shared columns in alphabetical order (Id, Name, Value):
+    path = tmp_path / 'unkeyed.xlsx'
+    DataComparer.GenerateComparisonReport(str(path), data_test, data_valid, **mode)
+    diffs = ReadReport(path)['Differences']
+    assert list(diffs['Id']) == [3, 20, 500, 700, 1500]
+
+@pytest.mark.parametrize('content', ['', 'Id,Value,Name\n'], ids = ['empty', 'header'])
+@pytest.mark.parametrize('numRows', [5, 0])
+def test_streaming_report_with_file_without_rows(tmp_path, content, numRows):
+    data_test = DataFrame({ 'Id' : np.arange(numRows), 'Value' : np.arange(numRows), 'Name' : ['a'] * numRows })
+    filePath = tmp_path / 'data.csv'
+    filePath.write_text(content)
+    chunks = list(DataReader.ReadChunks(str(filePath)))
+    # File without header has no columns, so table columns are used instead:
+    data_valid = chunks if chunks else [data_test.iloc[:0]]
+    path = tmp_path / 'report.xlsx'
+    DataComparer.GenerateStreamingReport(str(path), [data_test], data_valid, 'Id')
+    assert NumDiffering(path) == numRows
+
+@pytest.mark.parametrize('pKey', ['Id', None])
+def test_partitioned_reports_match_in_memory_report(tmp_path, pKey):
+    numRows = 20000
+    rng = np.random.default_rng(0)
+    data_valid = DataFrame({ 'Id' : np.arange(numRows), 'Qty' : rng.integers(0, 1000, numRows), 'Trader' : rng.choice(['A', 'B', 'C', 'D'], numRows) })
+    # Float test keys must be matched with integer valid keys:
+    data_test = data_valid.astype({ 'Id' : float }).drop(index = [40])
+    data_test.loc[[5, 17], 'Qty'] = -1
+    data_test.loc[numRows] = [numRows + 100.0, 1, 'A']
+    DataComparer.GenerateComparisonReport(str(tmp_path / 'memory.xlsx'), data_test, data_valid, pKey = pKey)
+    for num, mode in enumerate([{ 'memoryBudget' : 10 ** 6 }, { 'workers' : 2 }, { 'memoryBudget' : 10 ** 6, 'workers' : 2 }]):
+        path = tmp_path / ('partitioned_%d.xlsx' % num)
+        DataComparer.GenerateComparisonReport(str(path), data_test, data_valid, pKey = pKey, **mode)
+        AssertSameReports(path, tmp_path / 'memory.xlsx')
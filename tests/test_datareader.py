@@ -0,0 +1,44 @@
+#####################################
+# test_datareader.py
+#####################################
+# Description:
+# * Test DataReader type inference.
+
+from ETL.DataReader import DataReader
+import pytest
+
+def ReadColumn(tmp_path, values):
+    """
+    * Write values to single column csv file and
+    return column as read by DataReader.
+    """
+    path = tmp_path / 'data.csv'
+    path.write_text('A\n%s\n' % '\n'.join(values))
+    return DataReader.Read(str(path))['A']
+
+@pytest.mark.parametrize('values', [
+    ['2020-01-01', '9999-12-31'],
+    ['Jan', 'Feb', 'Mar', 'Apr'],
+    ['2020-01-01T00:00:00+01:00', '2020-01-02T00:00:00-05:00'],
+], ids = ['sentinel', 'monthnames', 'mixedzones'])
+def test_invalid_datetimes_are_strings(tmp_path, values):
+    column = ReadColumn(tmp_path, values)
+    assert column.dtype.kind in 'OT'
+    assert list(column) == values
+
+@pytest.mark.parametrize('values', [
+    ['1', '12345678901234567890'],
+    ['12345678901234567890', '22345678901234567890'],
+    ['-9223372036854775809', '1'],
+], ids = ['uint64', 'alluint64', 'belowint64'])
+def test_integers_outside_int64_are_strings(tmp_path, values):
+    column = ReadColumn(tmp_path, values)
+    assert column.dtype.kind in 'OT'
+    assert list(column) == values
+
+def test_valid_types_are_inferred(tmp_path):
+    assert ReadColumn(tmp_path, ['1', '-9223372036854775808', '9223372036854775807']).dtype == 'int64'
+    assert ReadColumn(tmp_path, ['1.5', '2']).dtype == 'float64'
+    assert ReadColumn(tmp_path, ['1.5', '12345678901234567890']).dtype == 'float64'
+    assert ReadColumn(tmp_path, ['2020-01-01', '2262-04-11']).dtype == 'datetime64[ns]'
+    assert str(ReadColumn(tmp_path, ['2020-01-01T00:00:00+01:00', '2020-01-02T00:00:00+01:00']).dtype).startswith('datetime64[ns,')